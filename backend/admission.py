@@ -0,0 +1,207 @@
+# admission.py
+# ===================
+# MystAI - Admission control (uç nokta sınıfı başına eşzamanlılık + kuyruk,
+# istemci başına token bucket)
+#
+# Uç noktalar sınıflara ayrılır:
+# - report  : LLM'li uzun raporlar (/predict, /astrology-premium, /solar-return, /transits)
+# - compute : CPU ağırlıklı, LLM'siz işler (PDF, harita verisi, sinastri, ...)
+# - diğerleri (/ping, /chart/<id>, /audio, tarot asset'leri, cache'ten servis
+#   edilen JSON) sınırsız geçer; ağır sınıflar dolsa bile bekletilmez.
+#
+# Her sınıfın `concurrency` kadar çalışan slotu ve `queue` kadar bekleme yeri
+# vardır. Kuyruk doluysa istek beklemeden 503 alır; kuyrukta `wait` saniyeden
+# (veya istek deadline'ından) uzun bekleyen de 503 alır. İstemci başına token
+# bucket aşılırsa 429 döner. Her iki durumda da Retry-After gönderilir.
+#
+# Not: sınırlar süreç başınadır. Gunicorn'da sınıf izolasyonu için thread'li
+# worker (gthread) gerekir; N worker'da toplam sınır N katıdır.
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ENDPOINT_CLASSES = {
+    "predict": "report",
+    "astrology_premium": "report",
+    "solar_return": "report",
+    "transits": "report",
+    "generate_pdf": "compute",
+    "chart_data": "compute",
+    "synastry": "compute",
+    "relocation": "compute",
+    "lunar_return": "compute",
+    "rectification": "compute",
+    "progressions": "compute",
+    "tarot_draw_route": "compute",
+    "tarot_spread_image": "compute",
+}
+
+
+def _class_config(name, concurrency, queue, wait, rate, burst):
+    prefix = f"ADMISSION_{name.upper()}_"
+    env = os.environ.get
+    return {
+        "concurrency": int(env(prefix + "CONCURRENCY", concurrency)),
+        "queue": int(env(prefix + "QUEUE", queue)),
+        "wait": float(env(prefix + "WAIT", wait)),
+        # istemci başına: dakikada `rate` istek, en fazla `burst` ardışık
+        "rate": float(env(prefix + "RATE", rate)),
+        "burst": int(env(prefix + "BURST", burst)),
+    }
+
+
+CLASS_LIMITS = {
+    "report": _class_config("report", 8, 16, 20.0, 10, 5),
+    "compute": _class_config("compute", 4, 32, 10.0, 120, 30),
+}
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION", "1").lower() not in ("0", "false", "no")
+# Bellekte tutulacak en fazla istemci bucket'ı (LRU)
+MAX_CLIENTS = 10000
+
+
+class Rejected(Exception):
+    """İstek kabul edilmedi: 429 (rate limit) veya 503 (kuyruk dolu / bekleme aşıldı)."""
+
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class ClassLimiter:
+    """Sabit sayıda slot + sınırlı bekleme kuyruğu (Condition ile; sıra garantisi yok)."""
+
+    def __init__(self, name, concurrency, queue, wait, **_):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.wait = wait
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        # Ortalama servis süresi (EWMA) → Retry-After tahmini
+        self.service_time = 1.0
+        self._cond = threading.Condition()
+
+    def retry_after(self):
+        return max(self.service_time * (self.waiting + 1) / self.concurrency, 1.0)
+
+    def acquire(self, max_wait=None):
+        wait = self.wait if max_wait is None else min(self.wait, max_wait)
+        with self._cond:
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return
+            if self.waiting >= self.queue or wait <= 0:
+                self.rejected += 1
+                raise Rejected(503, f"Sunucu yoğun ({self.name}); lütfen biraz sonra tekrar deneyin",
+                               self.retry_after())
+            self.waiting += 1
+            deadline = time.monotonic() + wait
+            try:
+                while self.active >= self.concurrency:
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        self.timeouts += 1
+                        raise Rejected(503, f"Sunucu yoğun ({self.name}); kuyrukta bekleme süresi aşıldı",
+                                       self.retry_after())
+                    self._cond.wait(left)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+
+    def release(self, seconds):
+        with self._cond:
+            self.active -= 1
+            self.service_time += 0.2 * (seconds - self.service_time)
+            # Tek notify, tam o anda zaman aşımıyla çıkan bir bekleyene giderse
+            # slot boşta kalır; kuyruk sınırlı olduğundan hepsini uyandırmak ucuz
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "concurrency": self.concurrency,
+                "queue": self.queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "service_time": round(self.service_time, 3),
+            }
+
+
+class TokenBuckets:
+    """İstemci anahtarı → (token, son güncelleme); dakikada `rate` token dolar."""
+
+    def __init__(self, rate, burst, max_clients=MAX_CLIENTS):
+        self.per_second = rate / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self.limited = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Token alınamazsa bir sonraki token'a kalan saniyeyi döner, aksi halde None."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = None
+            else:
+                self.limited += 1
+                wait = (1 - tokens) / self.per_second
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class Admission:
+    def __init__(self, limits=CLASS_LIMITS, endpoint_classes=ENDPOINT_CLASSES):
+        self.endpoint_classes = endpoint_classes
+        self.limiters = {name: ClassLimiter(name, **cfg) for name, cfg in limits.items()}
+        self.buckets = {name: TokenBuckets(cfg["rate"], cfg["burst"]) for name, cfg in limits.items()}
+
+    def classify(self, endpoint):
+        return self.endpoint_classes.get(endpoint)
+
+    def admit(self, endpoint, client_key, max_wait=None):
+        """
+        Slot alınırsa release için bir bilet (sınıf, başlangıç) döner; sınırsız
+        uç noktalar için None. Kabul edilmezse Rejected fırlatır.
+        """
+        cls = self.classify(endpoint)
+        if cls is None:
+            return None
+        wait = self.buckets[cls].take(client_key)
+        if wait is not None:
+            raise Rejected(429, "Çok fazla istek; lütfen biraz sonra tekrar deneyin", wait)
+        self.limiters[cls].acquire(max_wait)
+        return cls, time.perf_counter()
+
+    def release(self, ticket):
+        cls, started = ticket
+        self.limiters[cls].release(time.perf_counter() - started)
+
+    def stats(self):
+        return {
+            name: {**limiter.stats(), "rate_limited": self.buckets[name].limited}
+            for name, limiter in self.limiters.items()
+        }
+
+
+def retry_after_header(seconds) -> str:
+    return str(max(math.ceil(seconds), 1))
@@ -0,0 +1,72 @@
+# asteroids.py
+# ===================
+# MystAI - Ana asteroidler (Chiron, Ceres, Pallas, Juno, Vesta, Pholus)
+#
+# Konumlar ephe/seas_*.se1 dosyalarından gelir. Bu dosyalar sadece istek
+# asteroid içerdiğinde, ilgili yüzyıl dosyası için açılır (Swiss Ephemeris
+# dosyayı ilk hesapta yükler). Dosya yoksa Moshier yedeği olmadığından açık
+# bir hata verilir.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import EPHE_PATH, assign_houses, degree_to_sign
+
+ASTEROID_IDS = {
+    "Chiron": swe.CHIRON,
+    "Ceres": swe.CERES,
+    "Pallas": swe.PALLAS,
+    "Juno": swe.JUNO,
+    "Vesta": swe.VESTA,
+    "Pholus": swe.PHOLUS,
+}
+ASTEROID_NAMES = tuple(ASTEROID_IDS)
+
+
+def _asteroid_file(jd_ut: float) -> str:
+    """Tarihe karşılık gelen seas dosyası (her dosya 600 yıl kapsar)."""
+    year = swe.revjul(jd_ut, swe.GREG_CAL)[0]
+    base = (year // 600) * 6
+    return f"seas_{base:02d}.se1" if base >= 0 else f"seasm{-base:02d}.se1"
+
+
+@lru_cache(maxsize=32)
+def _has_file(filename: str) -> bool:
+    return os.path.exists(os.path.join(EPHE_PATH, filename))
+
+
+def asteroid_positions(jd_ut: float, names=ASTEROID_NAMES, cusps=None):
+    """
+    İstenen asteroidlerin konumları.
+    cusps verilirse (12,) ev cusp'larına göre ev yerleşimi de eklenir.
+    Döner: [{"name", "lon", "sign", "degree_in_sign", "retrograde"[, "house"]}, ...]
+    """
+    unknown = [n for n in names if n not in ASTEROID_IDS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen asteroid: {', '.join(unknown)}")
+    filename = _asteroid_file(jd_ut)
+    if not _has_file(filename):
+        raise ValueError(f"Asteroid efemeris dosyası bulunamadı: {filename}")
+
+    lons = []
+    out = []
+    for name in names:
+        xx, _ = swe.calc_ut(jd_ut, ASTEROID_IDS[name], swe.FLG_SWIEPH | swe.FLG_SPEED)
+        sign, deg_in_sign = degree_to_sign(xx[0])
+        lons.append(xx[0])
+        out.append({
+            "name": name,
+            "lon": xx[0],
+            "sign": sign,
+            "degree_in_sign": deg_in_sign,
+            "retrograde": xx[3] < 0,
+        })
+
+    if cusps is not None and out:
+        houses = assign_houses(np.array(lons), cusps)
+        for row, house in zip(out, houses.tolist()):
+            row["house"] = house
+    return out
@@ -1,6 +1,8 @@
 import os
+import json
+import numpy as np
 import swisseph as swe
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 # ==========================
@@ -22,12 +24,70 @@ PLANET_IDS = {
     "Pluto": swe.PLUTO,
 }
 
+# Ev sistemleri (Swiss Ephemeris hsys kodları)
+HOUSE_SYSTEMS = {
+    "placidus": b'P',
+    "koch": b'K',
+    "porphyry": b'O',
+    "regiomontanus": b'R',
+    "campanus": b'C',
+    "equal": b'E',
+    "whole_sign": b'W',
+}
+DEFAULT_HOUSE_SYSTEM = "placidus"
+
+# swe.houses ascmc vektörünün alan isimleri (sırası sabit)
+ASCMC_NAMES = [
+    "asc", "mc", "armc", "vertex",
+    "equatorial_asc", "co_asc_koch", "co_asc_munkasey", "polar_asc",
+]
+
+PLANET_NAMES = tuple(PLANET_IDS)
+HOUSE_SYSTEM_NAMES = {code: name for name, code in HOUSE_SYSTEMS.items()}
+
+# Kompakt harita kaydı (sabit şema, ~270 byte/harita).
+# Tek harita: 0-d dizi; toplu işler: (N,) dizi — aynı bellek düzeni.
+CHART_DTYPE = np.dtype([
+    ("julian_day", "<f8"),
+    ("lon", "<f8", (len(PLANET_NAMES),)),
+    ("house", "i1", (len(PLANET_NAMES),)),
+    ("cusps", "<f8", (12,)),
+    ("ascmc", "<f8", (len(ASCMC_NAMES),)),
+    ("hsys", "S1"),
+])
+
 SIGNS = [
     "Koç", "Boğa", "İkizler", "Yengeç", "Aslan", "Başak",
     "Terazi", "Akrep", "Yay", "Oğlak", "Kova", "Balık"
 ]
 
 
+# Burç meta verisi (index SIGNS ile aynı sırada)
+SIGN_META = [
+    {"tr": "Koç",     "en": "Aries",       "symbol": "♈", "element": "fire",  "modality": "cardinal"},
+    {"tr": "Boğa",    "en": "Taurus",      "symbol": "♉", "element": "earth", "modality": "fixed"},
+    {"tr": "İkizler", "en": "Gemini",      "symbol": "♊", "element": "air",   "modality": "mutable"},
+    {"tr": "Yengeç",  "en": "Cancer",      "symbol": "♋", "element": "water", "modality": "cardinal"},
+    {"tr": "Aslan",   "en": "Leo",         "symbol": "♌", "element": "fire",  "modality": "fixed"},
+    {"tr": "Başak",   "en": "Virgo",       "symbol": "♍", "element": "earth", "modality": "mutable"},
+    {"tr": "Terazi",  "en": "Libra",       "symbol": "♎", "element": "air",   "modality": "cardinal"},
+    {"tr": "Akrep",   "en": "Scorpio",     "symbol": "♏", "element": "water", "modality": "fixed"},
+    {"tr": "Yay",     "en": "Sagittarius", "symbol": "♐", "element": "fire",  "modality": "mutable"},
+    {"tr": "Oğlak",   "en": "Capricorn",   "symbol": "♑", "element": "earth", "modality": "cardinal"},
+    {"tr": "Kova",    "en": "Aquarius",    "symbol": "♒", "element": "air",   "modality": "fixed"},
+    {"tr": "Balık",   "en": "Pisces",      "symbol": "♓", "element": "water", "modality": "mutable"},
+]
+
+# Majör açılar: (isim, açı, orb) — orb'lar chart_generator.ASPECTS ile aynı
+ASPECT_TYPES = [
+    ("conjunction", 0,   6),
+    ("sextile",     60,  4),
+    ("square",      90,  5),
+    ("trine",       120, 5),
+    ("opposition",  180, 6),
+]
+
+
 def degree_to_sign(deg: float):
     """0–360 dereceyi (burç adı, burç içi derece) olarak döndür."""
     deg = float(deg) % 360.0
@@ -43,16 +103,8 @@ def local_to_utc(year, month, day, hour, minute, tz_name: str):
     return dt_local.astimezone(ZoneInfo("UTC"))
 
 
-# ==========================
-#   ANA HESAP FONKSİYONU
-# ==========================
-def compute_birth_chart(date_str, time_str, lat, lon, tz_name):
-    """
-    date_str  : 'YYYY-MM-DD'
-    time_str  : 'HH:MM'
-    lat, lon  : float
-    tz_name   : 'Europe/Istanbul' gibi IANA timezone
-    """
+def julian_day_ut(date_str, time_str, tz_name):
+    """Yerel 'YYYY-MM-DD' + 'HH:MM' → (utc datetime, Julian Day UT)."""
     year, month, day = map(int, date_str.split("-"))
     hour, minute = map(int, time_str.split(":"))
 
@@ -69,49 +121,453 @@ def compute_birth_chart(date_str, time_str, lat, lon, tz_name):
         hour_decimal,
         swe.GREG_CAL
     )
+    return utc_dt, jd_ut
+
+
+def _house_code(house_system: str) -> bytes:
+    try:
+        return HOUSE_SYSTEMS[house_system]
+    except KeyError:
+        raise ValueError(f"Bilinmeyen ev sistemi: {house_system}") from None
+
+
+# ==========================
+#   EV YERLEŞİMİ (vektörel)
+# ==========================
+def assign_houses(planet_lons, cusps):
+    """
+    Gezegen boylamlarını evlere (1–12) yerleştirir.
+
+    planet_lons : (P,) veya (N, P) boylamlar
+    cusps       : (12,) veya (N, 12) ev cusp'ları
+
+    Cusp'lar 1. ev başlangıcına göre kaydırılıp 0–360 arasında monoton hale
+    getirilir (0°'dan geçen ev de dahil). N harita tek bir düz diziye
+    satır başına 360° ofsetle dizilir; böylece tüm gezegenler tek bir
+    np.searchsorted (ikili arama) çağrısıyla yerleştirilir.
+    """
+    lons = np.asarray(planet_lons, dtype=float)
+    cusps = np.asarray(cusps, dtype=float)
+    single = lons.ndim == 1
+    lons = np.atleast_2d(lons)
+    cusps = np.atleast_2d(cusps)
+
+    n = cusps.shape[0]
+    origin = cusps[:, :1]
+    rel_cusps = (cusps - origin) % 360.0
+    rel_lons = (lons - origin) % 360.0
+
+    offsets = (np.arange(n) * 360.0)[:, None]
+    flat_cusps = (rel_cusps + offsets).ravel()
+    idx = np.searchsorted(flat_cusps, (rel_lons + offsets).ravel(), side="right")
+
+    houses = idx.reshape(lons.shape) - np.arange(n)[:, None] * 12
+    return houses[0] if single else houses
+
+
+def compute_houses_batch(jd_uts, lats, lons, house_system=DEFAULT_HOUSE_SYSTEM, planet_lons=None):
+    """
+    Çok sayıda harita için ev verisini tek geçişte hesaplar.
+
+    jd_uts, lats, lons : (N,) diziler
+    planet_lons        : opsiyonel (N, P) gezegen boylamları → ev yerleşimi
+
+    Döner: {"cusps": (N, 12), "ascmc": (N, 8), "planet_houses": (N, P) | None}
+    """
+    hsys = _house_code(house_system)
+    jd_uts = np.asarray(jd_uts, dtype=float)
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+
+    n = len(jd_uts)
+    cusps = np.empty((n, 12))
+    ascmc = np.empty((n, len(ASCMC_NAMES)))
+    for i in range(n):
+        h, a = swe.houses(jd_uts[i], lats[i], lons[i], hsys)
+        cusps[i] = h[:12]
+        ascmc[i] = a[:len(ASCMC_NAMES)]
+
+    planet_houses = None
+    if planet_lons is not None:
+        planet_houses = assign_houses(planet_lons, cusps)
+
+    return {"cusps": cusps, "ascmc": ascmc, "planet_houses": planet_houses}
+
+
+# ==========================
+#   KOMPAKT HARİTA KAYDI
+# ==========================
+def _jd_to_utc_iso(jd_ut: float) -> str:
+    """Julian Day UT → '1990-05-17T11:30:00+00:00' (saniyeye yuvarlanmış)."""
+    y, m, d, h = swe.revjul(jd_ut, swe.GREG_CAL)
+    dt = datetime(y, m, d, tzinfo=timezone.utc) + timedelta(seconds=round(h * 3600))
+    return dt.isoformat()
+
+
+def _point(lon: float) -> dict:
+    sign, deg = degree_to_sign(lon)
+    return {"lon": float(lon), "sign": sign, "degree_in_sign": float(deg)}
+
+
+class ChartRecord:
+    """
+    CHART_DTYPE kaydı üzerinde ince bir sarmalayıcı.
+
+    Diziler (lons, houses_of, cusps, ascmc) kopya değil, alttaki kaydın
+    görünümleridir; (N,) bir toplu diziden alınan kayıtlar da aynı belleği
+    paylaşır. compute_birth_chart sözlük şeması to_dict() ile üretilir.
+    """
+
+    __slots__ = ("_rec",)
+
+    def __init__(self, rec):
+        self._rec = rec
+
+    # ---- görünümler ----
+    @property
+    def julian_day(self) -> float:
+        return float(self._rec["julian_day"])
+
+    @property
+    def lons(self):
+        return self._rec["lon"]
+
+    @property
+    def houses_of(self):
+        return self._rec["house"]
+
+    @property
+    def cusps(self):
+        return self._rec["cusps"]
+
+    @property
+    def ascmc(self):
+        return self._rec["ascmc"]
+
+    @property
+    def house_system(self) -> str:
+        return HOUSE_SYSTEM_NAMES[bytes(self._rec["hsys"])]
+
+    @property
+    def utc(self) -> str:
+        return _jd_to_utc_iso(self.julian_day)
+
+    @property
+    def asc(self) -> float:
+        return float(self._rec["ascmc"][0])
+
+    @property
+    def mc(self) -> float:
+        return float(self._rec["ascmc"][1])
+
+    @property
+    def sign_indices(self):
+        return (self._rec["lon"] // 30.0).astype(np.int8)
+
+    def placements(self):
+        """(isim, boylam, ev) üçlüleri — çizim ve prompt için sözlüksüz gezinti."""
+        return zip(PLANET_NAMES, self._rec["lon"].tolist(), self._rec["house"].tolist())
+
+    # ---- serileştirme ----
+    def to_dict(self) -> dict:
+        """compute_birth_chart'ın tarihsel sözlük şeması."""
+        planets = []
+        for name, lon, house in self.placements():
+            planets.append({"name": name, **_point(lon), "house": house})
+
+        return {
+            "utc": self.utc,
+            "julian_day": self.julian_day,
+            "asc": _point(self.asc),
+            "mc": _point(self.mc),
+            "planets": planets,
+            "houses": tuple(self._rec["cusps"].tolist()),
+            "house_system": self.house_system,
+            "ascmc": dict(zip(ASCMC_NAMES, self._rec["ascmc"].tolist())),
+        }
+
+    def to_json(self) -> str:
+        """Kompakt JSON (sadece sayısal alanlar + ev sistemi)."""
+        return json.dumps({
+            "jd": self.julian_day,
+            "hsys": self.house_system,
+            "lon": self._rec["lon"].tolist(),
+            "house": self._rec["house"].tolist(),
+            "cusps": self._rec["cusps"].tolist(),
+            "ascmc": self._rec["ascmc"].tolist(),
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        d = json.loads(text)
+        rec = np.zeros((), dtype=CHART_DTYPE)
+        rec["julian_day"] = d["jd"]
+        rec["hsys"] = _house_code(d["hsys"])
+        rec["lon"] = d["lon"]
+        rec["house"] = d["house"]
+        rec["cusps"] = d["cusps"]
+        rec["ascmc"] = d["ascmc"]
+        return cls(rec)
+
+    def to_bytes(self) -> bytes:
+        return self._rec.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """to_bytes çıktısını kopyasız (salt okunur) kayda çevirir."""
+        return cls(np.frombuffer(data, dtype=CHART_DTYPE)[0])
+
+
+def chart_records(arr):
+    """(N,) CHART_DTYPE dizisinden, belleği paylaşan ChartRecord listesi."""
+    return [ChartRecord(arr[i]) for i in range(len(arr))]
+
+
+def compute_chart_records_batch(jd_uts, lats, lons, house_system=DEFAULT_HOUSE_SYSTEM):
+    """N doğum anı/yeri için (N,) CHART_DTYPE dizisi üretir."""
+    jd_uts = np.asarray(jd_uts, dtype=float)
+    arr = np.zeros(len(jd_uts), dtype=CHART_DTYPE)
+    arr["julian_day"] = jd_uts
+    arr["hsys"] = _house_code(house_system)
+    for i, jd in enumerate(jd_uts):
+        arr["lon"][i] = [swe.calc_ut(jd, pid)[0][0] for pid in PLANET_IDS.values()]
+
+    houses = compute_houses_batch(jd_uts, lats, lons, house_system, planet_lons=arr["lon"])
+    arr["cusps"] = houses["cusps"]
+    arr["ascmc"] = houses["ascmc"]
+    arr["house"] = houses["planet_houses"]
+    return arr
+
+
+# ==========================
+#   ANA HESAP FONKSİYONU
+# ==========================
+def compute_chart_record(date_str, time_str, lat, lon, tz_name, house_system=DEFAULT_HOUSE_SYSTEM):
+    """compute_birth_chart ile aynı hesap; sonucu kompakt ChartRecord olarak döner."""
+    hsys = _house_code(house_system)
+    _, jd_ut = julian_day_ut(date_str, time_str, tz_name)
+
+    rec = np.zeros((), dtype=CHART_DTYPE)
+    rec["julian_day"] = jd_ut
+    rec["hsys"] = hsys
 
     # ============== PLANETS =================
-    planet_data = []
-    for name, pid in PLANET_IDS.items():
-        # PY-Swisseph: calc_ut → (xx, retflag)
-        xx, _ = swe.calc_ut(jd_ut, pid)
-        lon_p = xx[0]  # sadece ekliptik boylamı kullanıyoruz
-
-        sign_name, degree_in_sign = degree_to_sign(lon_p)
-
-        planet_data.append({
-            "name": name,
-            "lon": float(lon_p),
-            "sign": sign_name,
-            "degree_in_sign": float(degree_in_sign),
-        })
+    # PY-Swisseph: calc_ut → (xx, retflag); sadece ekliptik boylamı kullanıyoruz
+    rec["lon"] = [swe.calc_ut(jd_ut, pid)[0][0] for pid in PLANET_IDS.values()]
 
     # ============== HOUSES ==================
-    lat = float(lat)
-    lon = float(lon)
+    houses, ascmc = swe.houses(jd_ut, float(lat), float(lon), hsys)
+    rec["cusps"] = houses[:12]
+    rec["ascmc"] = ascmc[:len(ASCMC_NAMES)]
+    rec["house"] = assign_houses(rec["lon"], rec["cusps"])
+
+    return ChartRecord(rec)
 
-    # Placidus ev sistemi → 'P'
-    houses, ascmc = swe.houses(jd_ut, lat, lon, b'P')
 
-    asc = float(ascmc[0])
-    mc = float(ascmc[1])
+def compute_birth_chart(date_str, time_str, lat, lon, tz_name, house_system=DEFAULT_HOUSE_SYSTEM):
+    """
+    date_str     : 'YYYY-MM-DD'
+    time_str     : 'HH:MM'
+    lat, lon     : float
+    tz_name      : 'Europe/Istanbul' gibi IANA timezone
+    house_system : HOUSE_SYSTEMS anahtarı (varsayılan Placidus)
+    """
+    return compute_chart_record(
+        date_str, time_str, lat, lon, tz_name, house_system
+    ).to_dict()
 
-    asc_sign, asc_deg = degree_to_sign(asc)
-    mc_sign, mc_deg = degree_to_sign(mc)
+
+# ==========================
+#   AÇILAR + ÖZET
+# ==========================
+def compute_aspects(planets):
+    """
+    Gezegen çiftleri arasındaki majör açıları bulur.
+    Döner: [{p1, p2, type, angle, orb}, ...]
+    """
+    aspects = []
+    n = len(planets)
+    for i in range(n):
+        for j in range(i + 1, n):
+            diff = abs(planets[i]["lon"] - planets[j]["lon"]) % 360.0
+            if diff > 180.0:
+                diff = 360.0 - diff
+            for name, angle, orb in ASPECT_TYPES:
+                if abs(diff - angle) <= orb:
+                    aspects.append({
+                        "p1": planets[i]["name"],
+                        "p2": planets[j]["name"],
+                        "type": name,
+                        "angle": angle,
+                        "orb": abs(diff - angle),
+                    })
+                    break
+    return aspects
+
+
+def describe_chart(chart: dict) -> dict:
+    """
+    compute_birth_chart çıktısını açı listesi ve burç index'leriyle
+    zenginleştirir (LLM'siz /chart-data için).
+    Girdi sözlüğü değiştirilmez.
+    """
+    def point(p):
+        return {
+            "lon": p["lon"],
+            "sign": p["sign"],
+            "sign_index": int(p["lon"] % 360.0 // 30),
+            "degree_in_sign": p["degree_in_sign"],
+        }
+
+    planets = []
+    for p in chart["planets"]:
+        planets.append({"name": p["name"], **point(p), "house": p["house"]})
 
     return {
-        "utc": utc_dt.isoformat(),
-        "julian_day": jd_ut,
-        "asc": {
-            "lon": asc,
-            "sign": asc_sign,
-            "degree_in_sign": asc_deg,
-        },
-        "mc": {
-            "lon": mc,
-            "sign": mc_sign,
-            "degree_in_sign": mc_deg,
-        },
-        "planets": planet_data,
-        "houses": houses,
+        "utc": chart["utc"],
+        "julian_day": chart["julian_day"],
+        "asc": point(chart["asc"]),
+        "mc": point(chart["mc"]),
+        "planets": planets,
+        "houses": list(chart["houses"]),
+        "house_system": chart["house_system"],
+        "ascmc": chart["ascmc"],
+        "aspects": compute_aspects(chart["planets"]),
     }
+
+
+# ==========================
+#   SİNASTRİ / KOMPOZİT
+# ==========================
+ASPECT_NAMES = [name for name, _, _ in ASPECT_TYPES]
+_ASPECT_ANGLES = np.array([angle for _, angle, _ in ASPECT_TYPES], dtype=float)
+_ASPECT_ORBS = np.array([orb for _, _, orb in ASPECT_TYPES], dtype=float)
+
+# Uyum skoru için kaba ağırlıklar: yumuşak açılar +, sert açılar −.
+# Skor = Σ ağırlık × (1 − orb / max_orb); tam açı tam puan alır.
+SYNASTRY_WEIGHTS = {
+    "conjunction": 1.0,
+    "sextile": 0.6,
+    "square": -0.5,
+    "trine": 0.8,
+    "opposition": -0.3,
+}
+_SYNASTRY_WEIGHTS = np.array([SYNASTRY_WEIGHTS[n] for n in ASPECT_NAMES])
+
+
+def stack_chart_records(records):
+    """ChartRecord listesini tek bir (N,) CHART_DTYPE dizisinde toplar."""
+    return np.array([r._rec for r in records], dtype=CHART_DTYPE)
+
+
+def aspect_grid(lons_a, lons_b):
+    """
+    İki boylam kümesi arasındaki tam açı ızgarası.
+
+    lons_a : (..., P), lons_b : (..., Q) — baş boyutlar broadcast edilir,
+             örn. (P,) ile (N, Q) → (N, P, Q): bir harita × N kayıtlı harita.
+    Döner  : (aspect_idx, orb) — aspect_idx ASPECT_TYPES index'i (yoksa -1),
+             orb derece cinsinden (açı yoksa nan).
+    """
+    a = np.asarray(lons_a, dtype=float)[..., :, None]
+    b = np.asarray(lons_b, dtype=float)[..., None, :]
+    sep = np.abs((a - b + 180.0) % 360.0 - 180.0)
+
+    idx = np.full(sep.shape, -1, dtype=np.int8)
+    orb = np.full(sep.shape, np.nan)
+    # Orb aralıkları çakışmaz; compute_aspects'teki sıra korunur
+    for k in range(len(ASPECT_TYPES)):
+        dev = np.abs(sep - _ASPECT_ANGLES[k])
+        hit = (dev <= _ASPECT_ORBS[k]) & (idx < 0)
+        idx[hit] = k
+        orb[hit] = dev[hit]
+    return idx, orb
+
+
+def synastry_scores(idx, orb):
+    """aspect_grid çıktısından (..., P, Q) → (...) uyum skoru."""
+    has = idx >= 0
+    k = np.where(has, idx, 0)
+    strength = np.where(has, 1.0 - np.nan_to_num(orb) / _ASPECT_ORBS[k], 0.0)
+    return (_SYNASTRY_WEIGHTS[k] * strength).sum(axis=(-2, -1))
+
+
+def match_charts(lons, candidate_lons):
+    """
+    Tek bir haritayı N kayıtlı haritayla eşleştirir (döngüsüz).
+    lons: (P,), candidate_lons: (N, Q) → (N,) skor.
+    """
+    return synastry_scores(*aspect_grid(lons, candidate_lons))
+
+
+def midpoints(a, b):
+    """Kısa yay üzerindeki orta noktalar (kompozit harita)."""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    return (a + ((b - a + 180.0) % 360.0 - 180.0) / 2.0) % 360.0
+
+
+def _aspect_list(idx, orb):
+    out = []
+    for i, j in zip(*np.nonzero(idx >= 0)):
+        k = int(idx[i, j])
+        out.append({
+            "p1": PLANET_NAMES[i],
+            "p2": PLANET_NAMES[j],
+            "type": ASPECT_NAMES[k],
+            "angle": int(_ASPECT_ANGLES[k]),
+            "orb": float(orb[i, j]),
+        })
+    return out
+
+
+def compute_synastry(records):
+    """
+    N harita için tüm ikili sinastri analizleri (tek geçişte).
+
+    records: ChartRecord listesi ya da (N,) CHART_DTYPE dizisi
+    Her (i < j) çifti için: açı ızgarası, ev overlay'leri (i'nin gezegenleri
+    j'nin evlerinde ve tersi), uyum skoru ve orta nokta kompozit harita.
+    """
+    arr = records if isinstance(records, np.ndarray) else stack_chart_records(records)
+    n = len(arr)
+    if n < 2:
+        raise ValueError("Sinastri için en az iki harita gerekli")
+
+    lons = arr["lon"]
+    cusps = arr["cusps"]
+
+    # (N, N, P, Q) ızgara + (N, N) skor matrisi tek seferde
+    idx, orb = aspect_grid(lons[:, None, :], lons[None, :, :])
+    scores = synastry_scores(idx, orb)
+
+    ii, jj = np.triu_indices(n, k=1)
+
+    # Overlay: i'nin gezegenleri j'nin evlerinde (ve tersi), tüm çiftler tek çağrıda
+    a_in_b = assign_houses(lons[ii], cusps[jj])
+    b_in_a = assign_houses(lons[jj], cusps[ii])
+
+    # Kompozit: gezegen ve cusp orta noktaları, evler orta nokta cusp'larına göre
+    comp_lons = midpoints(lons[ii], lons[jj])
+    comp_cusps = midpoints(cusps[ii], cusps[jj])
+    comp_houses = assign_houses(comp_lons, comp_cusps)
+
+    pairs = []
+    for k, (i, j) in enumerate(zip(ii.tolist(), jj.tolist())):
+        comp_planets = []
+        for name, lon, house in zip(PLANET_NAMES, comp_lons[k].tolist(), comp_houses[k].tolist()):
+            comp_planets.append({"name": name, **_point(lon), "house": house})
+
+        pairs.append({
+            "a": i,
+            "b": j,
+            "score": float(scores[i, j]),
+            "aspects": _aspect_list(idx[i, j], orb[i, j]),
+            "a_in_b_houses": dict(zip(PLANET_NAMES, a_in_b[k].tolist())),
+            "b_in_a_houses": dict(zip(PLANET_NAMES, b_in_a[k].tolist())),
+            "composite": {
+                "planets": comp_planets,
+                "houses": comp_cusps[k].tolist(),
+            },
+        })
+    return pairs
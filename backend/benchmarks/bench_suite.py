@@ -0,0 +1,422 @@
+# bench_suite.py
+# ===================
+# Hesap + çizim + PDF benchmark paketi. Sabit fixture'larla (benchmarks/
+# fixtures.py) tek çağrı gecikmesini, toplu hesap throughput'unu ve bellek
+# tepe değerini ölçer; sonuçları kayıtlı baseline ile karşılaştırıp
+# regresyonları işaretler. Ağ kullanmaz (geocode / OpenAI yok).
+#
+# Çalıştırma (backend/ içinden):
+#     python benchmarks/bench_suite.py                 # baseline ile karşılaştır
+#     python benchmarks/bench_suite.py --save          # baseline'ı güncelle (5 tur)
+#     python benchmarks/bench_suite.py --only pdf,render --quick
+#
+# Ölçüm: 1 ısınma çağrısı, sonra en az --min-runs ve vaka başına --budget
+# saniye dolana kadar tekrar; median ve min raporlanır, regresyon kararı min
+# üzerinden verilir (timeit'teki gibi). --rounds N ile paket N tur (vakalar
+# turlar arasında sırayla) koşulur ve vaka başına turların medyanı alınır;
+# tek bir gürültülü tur (paylaşılan CPU) sonucu kaydırmaz. --save
+# varsayılan olarak 5 tur kullanır: baseline tek bir ölçüme dayanmaz.
+# Vaka başına eşik --tolerance ile ölçülen turlar arası yayılımın (baseline
+# ve bu çalıştırma; "spread" − 1) büyüğüdür: gürültüsü yüksek vakalar
+# (render, PDF) kendi gürültüleri içindeki farklar için regresyon vermez.
+# Baseline yalnızca ayrı bir commit'te güncellenmelidir. Bellek tepe değeri
+# ayrı bir çağrıda tracemalloc ile ölçülür (Python + NumPy ayırmaları;
+# matplotlib/Agg'nin C++ tamponları dahil değildir).
+# Baseline makineye özgüdür; farklı makinede karşılaştırma uyarı verir.
+# Çıkış kodu: regresyon varsa 1.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+
+from astro_core import (  # noqa: E402
+    compute_aspects,
+    compute_chart_record,
+    compute_chart_records_batch,
+    match_charts,
+)
+from chart_generator import (  # noqa: E402
+    _compute_aspects,
+    _draw_chart,
+    _planets_for_plot,
+    get_chart_variant,
+    render_chart_svg,
+)
+from fixtures import BIRTHS, random_births, report_text  # noqa: E402
+from generate_pdf import generate_pdf_file  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+CHART_DIR = "/tmp"  # generate_pdf_file haritayı /tmp/{chart_id}.png'de arar
+
+CASES = {}  # ad → (kurulum fonksiyonu, çağrı başına öğe sayısı)
+
+
+def case(name, items=1):
+    """
+    Kurulum fonksiyonu kaydeder. Kurulum (run, reset) döner: run ölçülür,
+    reset (opsiyonel) her çalıştırmadan önce ölçüm dışında çağrılır.
+    """
+
+    def register(setup):
+        CASES[name] = (setup, items)
+        return setup
+
+    return register
+
+
+def _fixture_record(label="istanbul"):
+    _, date, time_, lat, lon, tz = next(b for b in BIRTHS if b[0] == label)
+    return compute_chart_record(date, time_, lat, lon, tz)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except (FileNotFoundError, TypeError):
+        pass
+
+
+# -----------------------------
+# Efemeris
+# -----------------------------
+@case("ephemeris.chart_record", items=len(BIRTHS))
+def _bench_chart_record():
+    def run():
+        for _, date, time_, lat, lon, tz in BIRTHS:
+            compute_chart_record(date, time_, lat, lon, tz)
+
+    return run, None
+
+
+@case("ephemeris.batch_1000", items=1000)
+def _bench_batch():
+    jd, lats, lons = random_births(1000)
+    return (lambda: compute_chart_records_batch(jd, lats, lons)), None
+
+
+# -----------------------------
+# Açılar
+# -----------------------------
+@case("aspects.compute_aspects", items=len(BIRTHS))
+def _bench_aspects():
+    charts = [_fixture_record(b[0]) for b in BIRTHS]
+    planets = [[{"name": n, "lon": float(lon)} for n, lon, *_ in rec.placements()] for rec in charts]
+
+    def run():
+        for p in planets:
+            compute_aspects(p)
+
+    return run, None
+
+
+@case("aspects.chart_plot_aspects", items=len(BIRTHS))
+def _bench_plot_aspects():
+    planets = [_planets_for_plot(_fixture_record(b[0]).placements()) for b in BIRTHS]
+
+    def run():
+        for p in planets:
+            _compute_aspects(p)
+
+    return run, None
+
+
+@case("aspects.synastry_match_10000", items=10000)
+def _bench_synastry():
+    jd, lats, lons = random_births(10000)
+    stored = compute_chart_records_batch(jd, lats, lons)
+    me = stored["lon"][0]
+    return (lambda: match_charts(me, stored["lon"])), None
+
+
+# -----------------------------
+# Çizim
+# -----------------------------
+@case("render.draw_chart_png")
+def _bench_draw():
+    rec = _fixture_record()
+    planets = _planets_for_plot(rec.placements())
+    path = os.path.join(CHART_DIR, f"bench_{uuid.uuid4().hex}.png")
+    return (lambda: _draw_chart(planets, rec.cusps, path, "Astrology Chart", "1990-05-05  •  10:00")), \
+        (lambda: _remove(path))
+
+
+@case("render.chart_svg")
+def _bench_svg():
+    meta = _fixture_record().to_dict()
+    return (lambda: render_chart_svg(meta, "Astrology Chart", "1990-05-05  •  10:00")), None
+
+
+@case("render.variant_webp")
+def _bench_variant():
+    chart_id = _bench_master_chart()
+    state = {}
+
+    def run():
+        state["path"], _ = get_chart_variant(chart_id, size="web", fmt="webp", chart_dir=CHART_DIR)
+
+    return run, (lambda: _remove(state.get("path")))
+
+
+# -----------------------------
+# PDF
+# -----------------------------
+@case("pdf.natal_report_en")
+def _bench_pdf_natal():
+    chart_id = _bench_master_chart()
+    text = report_text("en")
+    state = {}
+
+    def run():
+        state["path"] = generate_pdf_file(
+            text, lang="en", report_type="natal", chart_id=chart_id,
+            birth_date="1990-05-05", birth_time="10:00", birth_place="Istanbul", name="Bench",
+        )
+
+    return run, (lambda: _remove(state.get("path")))
+
+
+@case("pdf.transit_report_tr")
+def _bench_pdf_text():
+    text = report_text("tr")
+    state = {}
+
+    def run():
+        state["path"] = generate_pdf_file(text, lang="tr", report_type="transits")
+
+    return run, (lambda: _remove(state.get("path")))
+
+
+_MASTER = {}
+
+
+def _bench_master_chart():
+    """Varyant / PDF vakaları için tek bir master harita (çalışma sonunda silinir)."""
+    if "id" not in _MASTER:
+        rec = _fixture_record()
+        _MASTER["id"] = f"bench_{uuid.uuid4().hex}"
+        _draw_chart(_planets_for_plot(rec.placements()), rec.cusps,
+                    os.path.join(CHART_DIR, f"{_MASTER['id']}.png"), "Astrology Chart", "")
+    return _MASTER["id"]
+
+
+def _cleanup_master():
+    chart_id = _MASTER.pop("id", None)
+    if chart_id:
+        for name in os.listdir(CHART_DIR):
+            if name.startswith(chart_id):
+                _remove(os.path.join(CHART_DIR, name))
+
+
+# -----------------------------
+# Ölçüm
+# -----------------------------
+def measure(run, reset, items, budget, min_runs, max_runs):
+    if reset:
+        reset()
+    run()  # ısınma (import, font, cache)
+    times = []
+    deadline = time.perf_counter() + budget
+    while len(times) < min_runs or (time.perf_counter() < deadline and len(times) < max_runs):
+        if reset:
+            reset()
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+
+    if reset:
+        reset()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if reset:
+        reset()
+
+    median = statistics.median(times)
+    return {
+        "median_ms": round(median * 1000, 4),
+        "min_ms": round(min(times) * 1000, 4),
+        "runs": len(times),
+        "throughput_per_s": round(items / median, 1) if median else None,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def combine_rounds(rounds):
+    """Aynı vakanın tur sonuçları → tur başına değerlerin medyanı."""
+    if len(rounds) == 1:
+        return rounds[0]
+    out = {key: round(statistics.median(r[key] for r in rounds), 4)
+           for key in ("median_ms", "min_ms", "peak_kb")}
+    out["runs"] = sum(r["runs"] for r in rounds)
+    out["rounds"] = len(rounds)
+    out["throughput_per_s"] = statistics.median(r["throughput_per_s"] or 0 for r in rounds) or None
+    # Turlar arası yayılım (min_ms'in en büyük / en küçük oranı): gürültü göstergesi
+    mins = [r["min_ms"] for r in rounds]
+    out["spread"] = round(max(mins) / min(mins), 3) if min(mins) else None
+    return out
+
+
+def measure_rounds(names, rounds, args):
+    """Paketi `rounds` tur koşar (her turda tüm vakalar) → vaka başına tur sonuçları listesi."""
+    per_case = {name: [] for name in names}
+    for i in range(rounds):
+        for name in names:
+            setup, items = CASES[name]
+            run, reset = setup()
+            per_case[name].append(measure(run, reset, items, args.budget, args.min_runs, args.max_runs))
+            label = f"[{i + 1}/{rounds}] " if rounds > 1 else ""
+            print(f"  {label}{name:<32} {per_case[name][-1]['median_ms']:>10.3f} ms", file=sys.stderr)
+    return per_case
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(terse=True),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+    }
+
+
+def _noise(*results):
+    """Turlar arası yayılımın en büyüğü, oran olarak (spread 1.4 → 0.4); tek turda 0."""
+    return max((r.get("spread") or 1.0) - 1.0 for r in results)
+
+
+def compare(results, baseline, tolerance, mem_tolerance, min_delta_ms):
+    """
+    Vaka başına (durum, süre değişimi, bellek değişimi, süre eşiği);
+    durum: "REGRESYON" | "iyileşme" | "ok" | "yeni". Süre eşiği tolerance ile
+    ölçülen turlar arası yayılımın büyüğüdür.
+    """
+    verdicts = {}
+    for name, res in results.items():
+        base = (baseline or {}).get("cases", {}).get(name)
+        if not base:
+            verdicts[name] = ("yeni", None, None, None)
+            continue
+        limit = max(tolerance, _noise(base, res))
+        # min, paylaşılan makinelerdeki gürültüye median'dan çok daha az duyarlı
+        change = res["min_ms"] / base["min_ms"] - 1.0 if base["min_ms"] else 0.0
+        delta = res["min_ms"] - base["min_ms"]
+        mem_change = res["peak_kb"] / base["peak_kb"] - 1.0 if base.get("peak_kb") else 0.0
+        mem_delta = res["peak_kb"] - base.get("peak_kb", 0)
+        if (change > limit and delta > min_delta_ms) or (mem_change > mem_tolerance and mem_delta > 64):
+            status = "REGRESYON"
+        elif change < -limit and -delta > min_delta_ms:
+            status = "iyileşme"
+        else:
+            status = "ok"
+        verdicts[name] = (status, change, mem_change, limit)
+    return verdicts
+
+
+def _pct(x):
+    return "" if x is None else f"{x * 100:+.0f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MystAI benchmark paketi")
+    parser.add_argument("--only", default="", help="virgüllü ad önekleri (ör. pdf,render)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="sonuçları baseline olarak yaz")
+    parser.add_argument("--json", help="sonuçları bu dosyaya da yaz")
+    parser.add_argument("--quick", action="store_true", help="kısa ölçüm (CI / hızlı kontrol)")
+    parser.add_argument("--budget", type=float, default=2.0, help="vaka başına saniye")
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--max-runs", type=int, default=200)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="süre regresyon eşiği (oran)")
+    parser.add_argument("--mem-tolerance", type=float, default=0.25, help="bellek regresyon eşiği (oran)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="bunun altındaki farklar gürültü")
+    parser.add_argument("--rounds", type=int, help="paket tur sayısı; vaka başına turların medyanı "
+                                                   "(varsayılan: --save ile 5, aksi halde 1)")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.budget, args.min_runs = 0.3, 3
+    rounds = args.rounds or (5 if args.save else 1)
+
+    prefixes = [p.strip() for p in args.only.split(",") if p.strip()]
+    names = [n for n in CASES if not prefixes or any(n.startswith(p) for p in prefixes)]
+    if not names:
+        print(f"Eşleşen vaka yok. Vakalar: {', '.join(CASES)}")
+        return 2
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != machine_info():
+            print("UYARI: baseline farklı bir makinede/ortamda alınmış; karşılaştırma yaklaşık.")
+            print(f"  baseline: {baseline.get('machine')}")
+            print(f"  şimdiki : {machine_info()}")
+
+    results = {}
+    try:
+        measured = measure_rounds(names, rounds, args)
+        results = {name: combine_rounds(r) for name, r in measured.items()}
+        verdicts = compare(results, baseline, args.tolerance, args.mem_tolerance, args.min_delta_ms)
+        # Gürültü kontrolü: regresyon görünen vakalar 3 tur daha ölçülür ve
+        # karar tüm turların medyanıyla yeniden verilir (tek bir iyi tur yetmez)
+        flagged = [n for n, v in verdicts.items() if v[0] == "REGRESYON"]
+        if flagged:
+            for name, extra in measure_rounds(flagged, 3, args).items():
+                results[name] = combine_rounds(measured[name] + extra)
+                print(f"  {name:<32} tekrar ölçüldü: {results[name]['min_ms']:>10.3f} ms "
+                      f"(min, {results[name]['rounds']} tur medyanı)", file=sys.stderr)
+        verdicts = compare(results, baseline, args.tolerance, args.mem_tolerance, args.min_delta_ms)
+    finally:
+        _cleanup_master()
+
+    print()
+    print(f"{'vaka':<32}{'median':>11}{'min':>11}{'öğe/sn':>12}{'bellek':>11}{'Δ min':>9}{'eşik':>7}"
+          f"{'Δ bellek':>10}  durum")
+    for name, res in results.items():
+        status, change, mem_change, limit = verdicts[name]
+        print(
+            f"{name:<32}{res['median_ms']:>9.3f}ms{res['min_ms']:>9.3f}ms"
+            f"{res['throughput_per_s'] or 0:>12.1f}{res['peak_kb']:>9.0f}KB"
+            f"{_pct(change):>9}{'' if limit is None else f'±{limit * 100:.0f}%':>7}{_pct(mem_change):>10}  {status}"
+        )
+
+    payload = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "machine": machine_info(),
+        "settings": {"budget": args.budget, "min_runs": args.min_runs, "rounds": rounds},
+        "cases": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+    if args.save:
+        if prefixes and os.path.exists(args.baseline):
+            # Kısmi çalıştırma: diğer vakaların baseline'ı korunur
+            with open(args.baseline, encoding="utf-8") as f:
+                payload["cases"] = {**json.load(f).get("cases", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nbaseline yazıldı: {args.baseline}")
+        return 0
+
+    regressions = [n for n, v in verdicts.items() if v[0] == "REGRESYON"]
+    if regressions:
+        print(f"\n{len(regressions)} regresyon: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
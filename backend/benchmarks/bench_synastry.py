@@ -0,0 +1,79 @@
+# bench_synastry.py
+# ===================
+# Bir haritayı N kayıtlı haritayla eşleştirme: vektörel match_charts ile
+# compute_aspects üzerinden çift döngülü saf Python yaklaşımını karşılaştırır.
+#
+# Çalıştırma (backend/ içinden):
+#     python benchmarks/bench_synastry.py [N]
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from astro_core import (  # noqa: E402
+    PLANET_NAMES,
+    SYNASTRY_WEIGHTS,
+    ASPECT_TYPES,
+    compute_aspects,
+    compute_chart_records_batch,
+    compute_synastry,
+    match_charts,
+)
+from fixtures import random_births  # noqa: E402
+
+
+def _naive_scores(lons, candidate_lons):
+    """Her aday için Python döngüleriyle aynı skor (referans)."""
+    orbs = {name: orb for name, _, orb in ASPECT_TYPES}
+    me = [{"name": "a_" + n, "lon": float(x)} for n, x in zip(PLANET_NAMES, lons)]
+    scores = []
+    for cand in candidate_lons:
+        other = [{"name": "b_" + n, "lon": float(x)} for n, x in zip(PLANET_NAMES, cand)]
+        total = 0.0
+        for asp in compute_aspects(me + other):
+            # Sadece kişiler arası açılar
+            if asp["p1"][0] == asp["p2"][0]:
+                continue
+            total += SYNASTRY_WEIGHTS[asp["type"]] * (1.0 - asp["orb"] / orbs[asp["type"]])
+        scores.append(total)
+    return np.array(scores)
+
+
+def main(n=10000):
+    jd, lats, lons = random_births(n)
+
+    t0 = time.perf_counter()
+    stored = compute_chart_records_batch(jd, lats, lons)
+    t_build = time.perf_counter() - t0
+
+    me = stored["lon"][0]
+
+    t0 = time.perf_counter()
+    fast = match_charts(me, stored["lon"])
+    t_fast = time.perf_counter() - t0
+
+    sample = min(n, 1000)
+    t0 = time.perf_counter()
+    slow = _naive_scores(me, stored["lon"][:sample])
+    t_slow = (time.perf_counter() - t0) * n / sample
+
+    assert np.allclose(fast[:sample], slow), "vektörel skor referansla uyuşmuyor"
+
+    t0 = time.perf_counter()
+    compute_synastry(stored[:8])
+    t_pairs = time.perf_counter() - t0
+
+    print(f"kayıtlı harita sayısı      : {n}")
+    print(f"toplu harita hesabı        : {t_build * 1000:9.1f} ms")
+    print(f"match_charts (vektörel)    : {t_fast * 1000:9.2f} ms")
+    print(f"saf Python döngüsü (tahmini): {t_slow * 1000:9.1f} ms")
+    print(f"hızlanma                   : {t_slow / t_fast:9.1f}x")
+    print(f"8 kişilik tam sinastri     : {t_pairs * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
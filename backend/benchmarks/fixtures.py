@@ -0,0 +1,66 @@
+# fixtures.py
+# ===================
+# Benchmark'lar için sabit, gerçekçi doğum verileri ve rapor metni.
+# Ağ gerektirmez: koordinat ve timezone doğrudan verilir (geocode yok).
+
+import numpy as np
+
+BIRTHS = [
+    # (etiket, tarih, saat, enlem, boylam, timezone)
+    ("istanbul", "1990-05-05", "10:00", 41.0082, 28.9784, "Europe/Istanbul"),
+    ("new_york", "1985-11-23", "23:45", 40.7128, -74.0060, "America/New_York"),
+    ("london", "1978-03-26", "01:30", 51.5074, -0.1278, "Europe/London"),
+    ("tokyo", "2001-09-11", "06:15", 35.6762, 139.6503, "Asia/Tokyo"),
+    ("sydney", "1995-01-15", "14:20", -33.8688, 151.2093, "Australia/Sydney"),
+    ("sao_paulo", "1969-07-20", "20:17", -23.5505, -46.6333, "America/Sao_Paulo"),
+    # Kutup dairesinin hemen altı (Placidus ~66.5° üstünde tanımsız)
+    ("reykjavik", "1992-12-21", "12:00", 64.1466, -21.9426, "Atlantic/Reykjavik"),
+    ("cape_town", "2010-06-11", "16:00", -33.9249, 18.4241, "Africa/Johannesburg"),
+]
+
+_PARAGRAPHS_EN = [
+    "Your Sun in Taurus grounds your identity in patience, loyalty and a deep "
+    "appreciation of beauty. You build slowly but your foundations last.",
+    "The Moon in Scorpio gives an intense emotional life; you feel everything "
+    "fully and rarely forget. Trust is earned, not given.",
+    "Mercury close to the Sun sharpens practical intelligence. You prefer ideas "
+    "that can be tested, touched and used.",
+    "Venus and Mars in harmonious aspect suggest relationships that balance "
+    "desire with devotion; conflicts resolve through honest conversation.",
+    "Saturn transiting your tenth house asks for responsibility in career "
+    "matters. Commitments made now shape the next seven years.",
+]
+_PARAGRAPHS_TR = [
+    "Boğa burcundaki Güneş kimliğini sabır, sadakat ve güzelliğe duyulan derin "
+    "bir takdirle besler. Yavaş inşa edersin ama temellerin kalıcıdır.",
+    "Akrep burcundaki Ay yoğun bir duygusal hayat verir; her şeyi derinden "
+    "hisseder ve kolay unutmazsın. Güven verilmez, kazanılır.",
+    "Güneş'e yakın Merkür pratik zekânı keskinleştirir. Denenebilen, "
+    "dokunulabilen ve kullanılabilen fikirleri seversin.",
+    "Venüs ile Mars arasındaki uyumlu açı arzuyu bağlılıkla dengeleyen "
+    "ilişkilere işaret eder; çatışmalar dürüst konuşmayla çözülür.",
+    "Onuncu evinden geçen Satürn kariyerde sorumluluk ister. Şimdi verilen "
+    "sözler önümüzdeki yedi yılı şekillendirir.",
+]
+
+
+def report_text(lang="en", sections=12):
+    """~2300 token'lık (premium rapor uzunluğunda) başlıklı rapor metni."""
+    paragraphs = _PARAGRAPHS_TR if lang == "tr" else _PARAGRAPHS_EN
+    heading = "Bölüm" if lang == "tr" else "Section"
+    lines = []
+    for s in range(sections):
+        lines.append(f"{s + 1}) {heading} {s + 1}")
+        for k in range(3):
+            lines.append(paragraphs[(s + k) % len(paragraphs)])
+        lines.append("")
+    return "\n".join(lines)
+
+
+def random_births(n, seed=42):
+    """Toplu hesaplar için tekrarlanabilir (jd_ut, enlem, boylam) dizileri (1900–2000)."""
+    rng = np.random.default_rng(seed)
+    jd = 2415020.5 + rng.random(n) * 36500.0
+    lats = rng.uniform(-55.0, 60.0, n)
+    lons = rng.uniform(-180.0, 180.0, n)
+    return jd, lats, lons
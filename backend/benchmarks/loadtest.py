@@ -0,0 +1,568 @@
+# loadtest.py
+# ===================
+# Uçtan uca yük testi. Uygulamayı (gunicorn veya Flask) ücretli OpenAI ve
+# kamusal Nominatim yerine yerel taklitlere (fake_upstream.py: chat, TTS,
+# geocode) bağlayarak ayağa kaldırır, tüm uç noktalara karışık trafik sürer ve
+# uç nokta başına throughput + p50/p95/p99 gecikme raporlar. Worker/thread
+# sayısını boyutlamak ve admission / upstream ayarlarını doğrulamak için.
+#
+# Çalıştırma (backend/ içinden):
+#     python benchmarks/loadtest.py --duration 60 --concurrency 32
+#     python benchmarks/loadtest.py --workers 4 --threads 8 --rate 15
+#     python benchmarks/loadtest.py --server flask --mix chart_data=1,calendar=1
+#     python benchmarks/loadtest.py --fault chat.latency=4 --fault chat.error_rate=0.1
+#     python benchmarks/loadtest.py --target http://127.0.0.1:10000 --fake-port 8765
+#
+# Yük modeli:
+# - varsayılan kapalı döngü: --concurrency sanal kullanıcı, her biri senaryo
+#   bitince hemen yenisine başlar (maksimum throughput'u bulmak için)
+# - --rate R: açık döngü, saniyede ortalama R senaryo (Poisson); gecikme
+#   planlanan başlangıçtan ölçülür (coordinated omission olmaz), en fazla
+#   --concurrency senaryo aynı anda uçuşta olur
+# İstekler --clients kadar sanal IP'ye (X-Forwarded-For) dağıtılır; istemci
+# başına rate limit tek bir yük üreticisine takılmasın. Yük üreticisi burada
+# uygulamanın önündeki tek güvenilir proxy rolündedir (TRUSTED_PROXIES=1);
+# --target ile verilen uygulama da buna göre ayarlanmalıdır.
+#
+# Uygulama ortamı: OPENAI_API_KEY (yoksa sahte anahtar), OPENAI_BASE_URL ve
+# NOMINATIM_URL taklide ayarlanır; ADMISSION_*, UPSTREAM_* gibi diğer
+# değişkenler bu sürecin ortamından aynen geçer. --target verilirse uygulama
+# başlatılmaz; taklitler --fake-port'ta açılır, uygulamayı onlara bağlamak
+# kullanıcıya kalır.
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_upstream import serve  # noqa: E402
+from fixtures import BIRTHS, report_text  # noqa: E402
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Taklitlerin varsayılan gecikme profili (sn): gpt-4o uzun rapor ~1.5–3.5 sn,
+# TTS ~1–2 sn, Nominatim ~0.15–0.25 sn. --fault ile tek tek değiştirilir.
+DEFAULT_FAULTS = {
+    "chat.latency": 1.5,
+    "chat.jitter": 2.0,
+    "speech.latency": 1.0,
+    "speech.jitter": 1.0,
+    "search.latency": 0.15,
+    "search.jitter": 0.1,
+}
+
+QUESTIONS_TR = [
+    "Önümüzdeki aylarda kariyerimde nasıl bir değişim bekliyor?",
+    "İlişkimdeki belirsizlik ne zaman netleşir?",
+    "Bu hafta enerjimi neye odaklamalıyım?",
+]
+QUESTIONS_EN = [
+    "What should I focus on in my career this year?",
+    "Will the tension in my relationship ease soon?",
+    "What is the main lesson of this period for me?",
+]
+EVENT_TYPES = ["marriage", "career", "relocation", "child", "education"]
+
+
+# -----------------------------
+# HTTP istemcisi (thread başına keep-alive bağlantı)
+# -----------------------------
+class Client:
+    def __init__(self, base_url, timeout):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body=None, client_id=0):
+        """→ (durum kodu, JSON veya None). Bağlantı hatasında durum 0."""
+        headers = {"X-Forwarded-For": f"10.{client_id // 65536 % 256}.{client_id // 256 % 256}.{client_id % 256}"}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        conn = self._conn()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return 0, None
+        if resp.getheader("Connection", "").lower() == "close":
+            conn.close()
+            self._local.conn = None
+        if resp.getheader("Content-Type", "").startswith("application/json"):
+            try:
+                return resp.status, json.loads(data)
+            except ValueError:
+                pass
+        return resp.status, None
+
+
+# -----------------------------
+# Senaryolar
+# -----------------------------
+def _birth(rng, with_place=True):
+    label, date, time_, lat, lon, tz = rng.choice(BIRTHS)
+    rec = {"birth_date": date, "birth_time": time_}
+    if with_place:
+        rec["birth_place"] = label.replace("_", " ").title()
+    else:
+        rec.update({"latitude": lat, "longitude": lon, "timezone": tz})
+    return rec
+
+
+class Run:
+    """Tek senaryo koşusu; her isteği kendi etiketiyle kaydeder."""
+
+    def __init__(self, client, recorder, rng, client_id, started=None):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.client_id = client_id
+        self._started = started  # açık döngüde ilk isteğin planlanan başlangıcı
+
+    def call(self, label, method, path, body=None):
+        t0 = self._started if self._started is not None else time.perf_counter()
+        self._started = None
+        status, data = self.client.request(method, path, body, self.client_id)
+        self.recorder.add(label, status, time.perf_counter() - t0, t0)
+        return status, data
+
+
+def sc_predict(run):
+    lang = run.rng.choice(["tr", "en"])
+    question = run.rng.choice(QUESTIONS_TR if lang == "tr" else QUESTIONS_EN)
+    status, data = run.call("/predict", "POST", "/predict", {
+        "user_input": question,
+        "language": lang,
+        "reading_type": run.rng.choice(["coffee", "dream", "energy", ""]),
+    })
+    if status == 200 and data and data.get("audio"):
+        run.call("/audio", "GET", data["audio"])
+
+
+def sc_tarot(run):
+    seed = run.rng.randrange(1 << 30)
+    spread = run.rng.choice(["single", "three_card", "celtic_cross"])
+    status, data = run.call("/tarot/draw", "POST", "/tarot/draw", {"spread": spread, "seed": seed})
+    if status != 200 or not data:
+        return
+    run.call("/tarot/spread", "GET", data["spread_image"])
+    for card in data["cards"][:3]:
+        run.call("/tarot/assets", "GET", card["image"])
+    if run.rng.random() < 0.5:
+        run.call("/predict", "POST", "/predict", {
+            "user_input": run.rng.choice(QUESTIONS_EN),
+            "language": "en",
+            "tarot": {"spread": spread, "seed": seed},
+        })
+
+
+def sc_astrology_premium(run):
+    lang = run.rng.choice(["tr", "en"])
+    body = dict(_birth(run.rng), name="Load Test", language=lang, focus_areas=["career", "love"])
+    status, data = run.call("/astrology-premium", "POST", "/astrology-premium", body)
+    if status != 200 or not data or not data.get("chart_id"):
+        return
+    run.call("/chart", "GET", f"{data['chart']}?size=web&format=webp")
+    if run.rng.random() < 0.3:
+        run.call("/generate_pdf", "POST", "/generate_pdf", dict(
+            body, text=report_text(lang), chart_id=data["chart_id"], report_type="natal",
+        ))
+
+
+def sc_solar_return(run):
+    body = dict(_birth(run.rng), language=run.rng.choice(["tr", "en"]))
+    status, data = run.call("/solar-return", "POST", "/solar-return", body)
+    if status == 200 and data and data.get("chart"):
+        run.call("/chart", "GET", f"{data['chart']}?size=thumb")
+
+
+def sc_transits(run):
+    run.call("/transits", "POST", "/transits", dict(_birth(run.rng), language=run.rng.choice(["tr", "en"])))
+
+
+def sc_generate_pdf(run):
+    lang = run.rng.choice(["tr", "en"])
+    body = dict(_birth(run.rng), text=report_text(lang), language=lang,
+                report_type=run.rng.choice(["natal", "transits"]))
+    run.call("/generate_pdf", "POST", "/generate_pdf", body)
+
+
+def sc_chart_data(run):
+    if run.rng.random() < 0.2:
+        records = [_birth(run.rng, with_place=False) for _ in range(10)]
+        run.call("/chart-data", "POST", "/chart-data", {"records": records})
+    else:
+        run.call("/chart-data", "POST", "/chart-data", _birth(run.rng, with_place=run.rng.random() < 0.5))
+
+
+def sc_synastry(run):
+    people = [_birth(run.rng, with_place=run.rng.random() < 0.5) for _ in range(run.rng.choice([2, 2, 3]))]
+    run.call("/synastry", "POST", "/synastry", {"people": people})
+
+
+def sc_relocation(run):
+    body = dict(_birth(run.rng, with_place=False), target_place=run.rng.choice(["Lisbon", "Paris", "Tokyo"]))
+    run.call("/relocation", "POST", "/relocation", body)
+
+
+def sc_lunar_return(run):
+    run.call("/lunar-return", "POST", "/lunar-return", dict(_birth(run.rng, with_place=False), count=3))
+
+
+def sc_rectification(run):
+    rec = _birth(run.rng, with_place=False)
+    year = int(rec["birth_date"][:4])
+    events = [{"date": f"{year + run.rng.randint(18, 40)}-{run.rng.randint(1, 12):02d}-15",
+               "type": run.rng.choice(EVENT_TYPES)} for _ in range(4)]
+    body = {k: rec[k] for k in ("birth_date", "latitude", "longitude", "timezone")}
+    body.update(events=events, step_minutes=4)
+    run.call("/rectification", "POST", "/rectification", body)
+
+
+def sc_progressions(run):
+    body = dict(_birth(run.rng, with_place=False), mode=run.rng.choice(["events", "positions"]))
+    run.call("/progressions", "POST", "/progressions", body)
+
+
+def sc_calendar(run):
+    run.call("/calendar", "GET", "/calendar?kinds=ingress,new_moon,full_moon")
+
+
+def sc_daily_horoscope(run):
+    run.call("/daily-horoscope", "GET", f"/daily-horoscope?sign={run.rng.randrange(12)}&lang={run.rng.choice(['tr', 'en'])}")
+
+
+def sc_tarot_manifest(run):
+    run.call("/tarot/manifest", "GET", "/tarot/manifest")
+
+
+def sc_ping(run):
+    run.call("/ping", "GET", "/ping")
+
+
+# Senaryo → varsayılan ağırlık (kabaca ön yüz trafiğinin dağılımı)
+SCENARIOS = {
+    "predict": (sc_predict, 8),
+    "tarot": (sc_tarot, 6),
+    "astrology_premium": (sc_astrology_premium, 6),
+    "solar_return": (sc_solar_return, 2),
+    "transits": (sc_transits, 2),
+    "generate_pdf": (sc_generate_pdf, 3),
+    "chart_data": (sc_chart_data, 12),
+    "synastry": (sc_synastry, 5),
+    "relocation": (sc_relocation, 3),
+    "lunar_return": (sc_lunar_return, 3),
+    "rectification": (sc_rectification, 1),
+    "progressions": (sc_progressions, 3),
+    "calendar": (sc_calendar, 6),
+    "daily_horoscope": (sc_daily_horoscope, 10),
+    "tarot_manifest": (sc_tarot_manifest, 3),
+    "ping": (sc_ping, 2),
+}
+
+
+def parse_mix(text):
+    """'chart_data=5,ping=1' → yalnızca verilen senaryolar, verilen ağırlıklarla."""
+    if not text:
+        return {name: weight for name, (_, weight) in SCENARIOS.items()}
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Bilinmeyen senaryo: {name} ({', '.join(SCENARIOS)})")
+        mix[name] = float(weight or SCENARIOS[name][1])
+    return mix
+
+
+# -----------------------------
+# Kayıt + rapor
+# -----------------------------
+def percentile(sorted_values, p):
+    """En yakın sıra yöntemi (nearest-rank)."""
+    if not sorted_values:
+        return None
+    k = max(math.ceil(p / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+class Recorder:
+    def __init__(self, measure_from):
+        self.measure_from = measure_from  # ısınma bitişi (perf_counter)
+        self.rows = []  # (etiket, durum, saniye)
+        self.scenarios = 0
+        self._lock = threading.Lock()
+
+    def add(self, label, status, seconds, started):
+        if started < self.measure_from:
+            return
+        with self._lock:
+            self.rows.append((label, status, seconds))
+
+    def scenario_done(self, started):
+        if started >= self.measure_from:
+            with self._lock:
+                self.scenarios += 1
+
+    def summary(self, elapsed):
+        with self._lock:
+            rows = list(self.rows)
+            scenarios = self.scenarios
+        by_label = {}
+        for label, status, seconds in rows:
+            by_label.setdefault(label, []).append((status, seconds))
+        endpoints = {label: _endpoint_stats(items, elapsed) for label, items in sorted(by_label.items())}
+        total = _endpoint_stats([(s, t) for _, s, t in rows], elapsed)
+        return {"elapsed_s": round(elapsed, 2), "scenarios": scenarios,
+                "scenarios_per_s": round(scenarios / elapsed, 2) if elapsed else 0.0,
+                "total": total, "endpoints": endpoints}
+
+
+def _endpoint_stats(items, elapsed):
+    statuses = {}
+    for status, _ in items:
+        statuses[status] = statuses.get(status, 0) + 1
+    ok = sorted(seconds for status, seconds in items if 200 <= status < 400)
+    all_ = sorted(seconds for _, seconds in items)
+    ms = lambda v: None if v is None else round(v * 1000, 1)  # noqa: E731
+    return {
+        "requests": len(items),
+        "ok": len(ok),
+        "rps": round(len(items) / elapsed, 2) if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        # Gecikme yalnızca başarılı cevaplardan (hızlı 429/503'ler yüzdelikleri
+        # aşağı çekmesin); tüm istekler için p99 ayrıca verilir
+        "p50_ms": ms(percentile(ok, 50)),
+        "p95_ms": ms(percentile(ok, 95)),
+        "p99_ms": ms(percentile(ok, 99)),
+        "max_ms": ms(ok[-1] if ok else None),
+        "p99_all_ms": ms(percentile(all_, 99)),
+    }
+
+
+def _fmt_ms(v):
+    return "-" if v is None else (f"{v:.0f}" if v >= 100 else f"{v:.1f}")
+
+
+def print_report(summary, upstream):
+    print(f"\n{summary['elapsed_s']:.0f} sn ölçüm, {summary['scenarios']} senaryo "
+          f"({summary['scenarios_per_s']:.2f}/sn)")
+    header = f"{'uç nokta':<20} {'istek':>6} {'rps':>7} {'ok':>6} {'429':>5} {'503':>5} {'504':>5} " \
+             f"{'5xx':>5} {'bağ.':>5} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}  (ms)"
+    print(header)
+    print("-" * len(header))
+    rows = list(summary["endpoints"].items()) + [("TOPLAM", summary["total"])]
+    for label, st in rows:
+        s = st["statuses"]
+        other_5xx = sum(v for k, v in s.items() if k.startswith("5") and k not in ("503", "504"))
+        print(f"{label:<20} {st['requests']:>6} {st['rps']:>7.2f} {st['ok']:>6} {s.get('429', 0):>5} "
+              f"{s.get('503', 0):>5} {s.get('504', 0):>5} {other_5xx:>5} {s.get('0', 0):>5} "
+              f"{_fmt_ms(st['p50_ms']):>7} {_fmt_ms(st['p95_ms']):>7} {_fmt_ms(st['p99_ms']):>7} "
+              f"{_fmt_ms(st['max_ms']):>7}")
+    print("\nTaklit servisler (istek / hata / kopma / kuyruk):")
+    for route, c in sorted(upstream["counts"].items()):
+        print(f"  {route:<8} {c['requests']:>6} / {c['errors']} / {c['drops']} / {c['tails']}")
+
+
+# -----------------------------
+# Uygulamayı başlatma
+# -----------------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def app_command(server, port, workers, threads):
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-k", "gthread", "-w", str(workers),
+                "--threads", str(threads), "-b", f"127.0.0.1:{port}", "--timeout", "180", "main:app"]
+    if server == "flask":
+        # app.run varsayılan olarak thread'li; PORT ortamdan okunur
+        return [sys.executable, "main.py"]
+    # Serbest komut: {port} yer tutucusu doldurulur
+    return shlex.split(server.format(port=port))
+
+
+def start_app(args, openai_url, nominatim_url):
+    port = args.port or _free_port()
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-loadtest")
+    env.update({"OPENAI_BASE_URL": openai_url, "NOMINATIM_URL": nominatim_url, "PORT": str(port),
+                "TRUSTED_PROXIES": "1"})
+    cmd = app_command(args.server, port, args.workers, args.threads)
+    log = open(args.app_log, "w")
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base = f"http://127.0.0.1:{port}"
+    client = Client(base, timeout=2)
+    deadline = time.monotonic() + args.boot_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Uygulama başlamadan çıktı (kod {proc.returncode}); log: {args.app_log}")
+        if client.request("GET", "/ping")[0] == 200:
+            return proc, base
+        time.sleep(0.25)
+    stop_app(proc)
+    raise RuntimeError(f"Uygulama {args.boot_timeout:.0f} sn içinde hazır olmadı; log: {args.app_log}")
+
+
+def stop_app(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# -----------------------------
+# Yük üretimi
+# -----------------------------
+def drive(args, base_url, mix):
+    client = Client(base_url, timeout=args.timeout)
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    t_start = time.perf_counter()
+    recorder = Recorder(t_start + args.warmup)
+    t_end = t_start + args.warmup + args.duration
+    seeds = random.Random(args.seed)
+
+    def one(rng, started=None):
+        name = rng.choices(names, weights)[0]
+        t0 = started if started is not None else time.perf_counter()
+        run = Run(client, recorder, rng, rng.randrange(args.clients), started)
+        try:
+            SCENARIOS[name][0](run)
+        except Exception as e:
+            # Senaryo kodundaki hata testi durdurmasın; etiketli olarak sayılır
+            recorder.add(f"!{name}", -1, time.perf_counter() - t0, t0)
+            print(f"senaryo hatası ({name}): {e!r}", file=sys.stderr)
+        recorder.scenario_done(t0)
+
+    if args.rate:
+        # Açık döngü: Poisson varışlar, en fazla --concurrency eşzamanlı
+        slots = threading.BoundedSemaphore(args.concurrency)
+        dropped = 0
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            next_at = time.perf_counter()
+            while next_at < t_end:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if slots.acquire(timeout=max(t_end - time.perf_counter(), 0)):
+                    rng = random.Random(seeds.random())
+                    fut = pool.submit(one, rng, next_at)
+                    fut.add_done_callback(lambda _: slots.release())
+                else:
+                    dropped += 1
+                next_at += seeds.expovariate(args.rate)
+        if dropped:
+            print(f"uyarı: {dropped} varış --concurrency sınırı yüzünden gönderilemedi", file=sys.stderr)
+    else:
+        # Kapalı döngü: her sanal kullanıcı süre bitene kadar art arda senaryo koşar
+        def user(seed):
+            rng = random.Random(seed)
+            while time.perf_counter() < t_end:
+                one(rng)
+
+        threads = [threading.Thread(target=user, args=(seeds.random(),), daemon=True)
+                   for _ in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    elapsed = time.perf_counter() - max(recorder.measure_from, t_start)
+    return recorder.summary(elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MystAI uçtan uca yük testi (yerel taklitlerle)")
+    parser.add_argument("--duration", type=float, default=60.0, help="ölçüm süresi (sn)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="ölçüme katılmayan ısınma (sn)")
+    parser.add_argument("--concurrency", type=int, default=16, help="sanal kullanıcı / en fazla uçuştaki senaryo")
+    parser.add_argument("--rate", type=float, default=0.0, help="açık döngü: saniyede senaryo (0 = kapalı döngü)")
+    parser.add_argument("--mix", default="", help="senaryo=ağırlık,... (varsayılan: tümü)")
+    parser.add_argument("--clients", type=int, default=500, help="sanal istemci IP sayısı")
+    parser.add_argument("--timeout", type=float, default=180.0, help="istek başına istemci zaman aşımı (sn)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--server", default="gunicorn",
+                        help="gunicorn | flask | serbest komut ({port} yer tutucusuyla)")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker sayısı")
+    parser.add_argument("--threads", type=int, default=16, help="gunicorn worker başına thread")
+    parser.add_argument("--port", type=int, default=0, help="uygulama portu (0 = boş port)")
+    parser.add_argument("--target", default="", help="zaten çalışan uygulama (başlatılmaz)")
+    parser.add_argument("--fake-port", type=int, default=0, help="taklit servis portu (0 = boş port)")
+    parser.add_argument("--fault", action="append", default=[], metavar="ROTA.AYAR=DEĞER",
+                        help="taklit ayarı, ör. chat.latency=3, speech.error_rate=0.1 (fake_upstream.py)")
+    parser.add_argument("--boot-timeout", type=float, default=90.0)
+    parser.add_argument("--app-log", default="/tmp/mystai-loadtest-app.log")
+    parser.add_argument("--json", default="", help="sonuçları bu dosyaya JSON olarak yaz")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+        faults = dict(DEFAULT_FAULTS)
+        faults.update(dict(item.split("=", 1) for item in args.fault))
+        fake, openai_url, state = serve(port=args.fake_port)
+        state.update(faults)
+    except ValueError as e:
+        parser.error(str(e))
+    nominatim_url = openai_url[: -len("/v1")]
+    print(f"taklitler: OpenAI {openai_url}  Nominatim {nominatim_url}")
+
+    proc = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            proc, base_url = start_app(args, openai_url, nominatim_url)
+        mode = f"açık döngü {args.rate}/sn" if args.rate else "kapalı döngü"
+        print(f"uygulama: {base_url}  ({mode}, eşzamanlılık {args.concurrency}, "
+              f"{args.warmup:.0f}+{args.duration:.0f} sn)")
+        summary = drive(args, base_url, mix)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        if proc is not None:
+            stop_app(proc)
+        fake.shutdown()
+
+    upstream = state.snapshot()
+    print_report(summary, upstream)
+    if args.json:
+        config = {k: v for k, v in vars(args).items() if k != "json"}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": dict(config, mix=mix, faults=upstream["faults"], routes=upstream["routes"]),
+                       **summary, "upstream": upstream["counts"]}, f, ensure_ascii=False, indent=2)
+        print(f"\nJSON: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
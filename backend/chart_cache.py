@@ -0,0 +1,117 @@
+# chart_cache.py
+# ===================
+# MystAI - Harita hesap cache'i (süreç içi LRU)
+#
+# compute_birth_chart deterministiktir: aynı doğum verisi her zaman aynı
+# sonucu verir. /astrology-premium, /chart-data ve benzeri endpoint'ler bu
+# cache üzerinden geçer; böylece ön yüz haritayı tekrar tekrar çizdirirken
+# Swiss Ephemeris hesabı sadece bir kez yapılır.
+#
+# Cache'te iç içe sözlükler yerine kompakt ChartRecord'lar (~270 byte veri)
+# tutulur; get_birth_chart her çağrıda yeni bir sözlük üretir.
+
+import os
+import threading
+from collections import OrderedDict
+
+from astro_core import (
+    DEFAULT_HOUSE_SYSTEM,
+    ChartRecord,
+    compute_chart_record,
+    compute_chart_records_batch,
+)
+
+CHART_CACHE_SIZE = int(os.environ.get("CHART_CACHE_SIZE", "2048"))
+
+
+class ChartCache:
+    """Thread-safe, boyut sınırlı LRU cache."""
+
+    def __init__(self, maxsize: int = CHART_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, fn):
+        value = self.get(key)
+        if value is None:
+            # Hesap kilit dışında yapılır; aynı anahtar için nadir çift hesap zararsızdır
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+chart_cache = ChartCache()
+
+
+def chart_key(date_str, time_str, lat, lon, tz_name, house_system=DEFAULT_HOUSE_SYSTEM):
+    """Cache anahtarı; koordinatlar ~10 m hassasiyete yuvarlanır."""
+    return (
+        date_str,
+        time_str,
+        round(float(lat), 4),
+        round(float(lon), 4),
+        tz_name,
+        house_system,
+    )
+
+
+def get_chart_record(date_str, time_str, lat, lon, tz_name, house_system=DEFAULT_HOUSE_SYSTEM):
+    """compute_chart_record'ın cache'li hali. Dönen kayıt paylaşımlıdır; değiştirilmemeli."""
+    key = chart_key(date_str, time_str, lat, lon, tz_name, house_system)
+    return chart_cache.get_or_compute(
+        key,
+        lambda: compute_chart_record(
+            date_str=date_str,
+            time_str=time_str,
+            lat=lat,
+            lon=lon,
+            tz_name=tz_name,
+            house_system=house_system,
+        ),
+    )
+
+
+def get_birth_chart(date_str, time_str, lat, lon, tz_name, house_system=DEFAULT_HOUSE_SYSTEM):
+    """compute_birth_chart'ın cache'li hali (aynı imza, aynı sözlük şeması)."""
+    return get_chart_record(date_str, time_str, lat, lon, tz_name, house_system).to_dict()
+
+
+def get_chart_record_at(jd_ut, lat, lon, house_system=DEFAULT_HOUSE_SYSTEM):
+    """
+    Yerel tarih/saat yerine doğrudan Julian Day (UT) ile cache'li ChartRecord.
+    Dönüş (return) haritaları gibi hesaplanmış anlar için; JD ~0.1 sn'ye yuvarlanır.
+    """
+    key = ("jd", round(float(jd_ut), 6), round(float(lat), 4), round(float(lon), 4), house_system)
+    return chart_cache.get_or_compute(
+        key,
+        lambda: ChartRecord(compute_chart_records_batch([jd_ut], [lat], [lon], house_system)[0]),
+    )
@@ -4,21 +4,37 @@
 #
 # Bu sürümde:
 # - Tüm astrolojik hesaplamalar astro_core.compute_birth_chart üzerinden gelir.
-# - Swiss Ephemeris + doğru timezone + Placidus ev sistemi kullanılır.
+# - Swiss Ephemeris + doğru timezone + Placidus ev sistemi kullanılır
+#   (house_system ile değiştirilebilir: astro_core.HOUSE_SYSTEMS).
 # - generate_natal_chart:
 #       (chart_id, chart_file_path, chart_meta) döndürür.
 #   chart_meta, astro_core içindeki sözlüğü aynen iletir:
-#       - planets: [{name, lon, sign, degree_in_sign}, ...]
+#       - planets: [{name, lon, sign, degree_in_sign, house}, ...]
 #       - houses: 12 ev cusp derecesi (0–360)
 #       - asc: {lon, sign, degree_in_sign}
 #       - mc:  {lon, sign, degree_in_sign}
+#       - ascmc: swe.houses ascmc vektörü (asc, mc, armc, vertex, ...)
+# - get_chart_variant:
+#       Master PNG'den thumb/web/print boyutlarında PNG/WebP/AVIF/JPEG
+#       varyantlarını türetir ve diskte cache'ler.
+# - render_chart_svg:
+#       Aynı haritayı matplotlib'siz, doğrudan chart_meta'dan SVG olarak üretir.
+# - PNG çizimi (_draw_chart) render havuzunda (render_pool.py) ayrı süreçte
+#   koşar; pyplot kullanılmaz, thread başına tek Figure yeniden kullanılır.
 
 import os
 import math
+import threading
 import uuid
+from xml.sax.saxutils import escape
 
-# Tüm gerçek hesap astro_core'dan gelir
-from astro_core import compute_birth_chart
+from PIL import Image, features
+
+# Tüm gerçek hesap astro_core'dan gelir (chart_cache üzerinden)
+from astro_core import DEFAULT_HOUSE_SYSTEM
+from chart_cache import get_chart_record
+from metrics import cache_hit, cache_miss, span
+from render_pool import render_pool
 
 # -----------------------------------------
 # Matplotlib - headless (Render uyumlu)
@@ -26,9 +42,44 @@ from astro_core import compute_birth_chart
 import matplotlib
 
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from matplotlib.patches import Circle
 
+# -----------------------------------------
+# Çıktı varyantları (tek master render'dan türetilir)
+# -----------------------------------------
+# Master PNG her zaman _draw_chart ile ~1440 px üretilir; küçük boyutlar ve
+# kayıplı formatlar bu dosyadan yeniden boyutlanır ve diskte cache'lenir.
+CHART_VARIANTS = {
+    "thumb": 256,
+    "web": 720,
+    "print": None,  # None → master genişliği
+}
+
+# format → (PIL formatı, mimetype, dosya uzantısı, kaydetme parametreleri)
+CHART_FORMATS = {
+    "png":  ("PNG",  "image/png",  "png",  {"optimize": True}),
+    "webp": ("WEBP", "image/webp", "webp", {"quality": 80, "method": 4}),
+    "avif": ("AVIF", "image/avif", "avif", {"quality": 55, "speed": 8}),
+    "jpg":  ("JPEG", "image/jpeg", "jpg",  {"quality": 90, "optimize": True}),
+}
+
+# Serbest genişlik isteklerinde cache'in şişmemesi için adım/alt sınır
+CHART_WIDTH_STEP = 32
+CHART_MIN_WIDTH = 64
+
+
+def supported_chart_formats():
+    """Bu kurulumda Pillow'un yazabildiği çıktı formatları."""
+    fmts = ["png", "jpg"]
+    if features.check("webp"):
+        fmts.append("webp")
+    if features.check("avif"):
+        fmts.append("avif")
+    return fmts
+
+
 # -----------------------------------------
 # Burç ve gezegen stilleri (sadece görsel)
 # -----------------------------------------
@@ -113,11 +164,36 @@ def _compute_aspects(planets):
 # -----------------------------------------
 # Harita çizimi
 # -----------------------------------------
+_figures = threading.local()
+
+
+def _chart_figure():
+    """
+    Thread başına tek Figure (pyplot'un global durumu thread-safe değil);
+    her çizimde temizlenip yeniden kullanılır, canvas/renderer kurulumu tekrarlanmaz.
+    """
+    fig = getattr(_figures, "fig", None)
+    if fig is None:
+        fig = _figures.fig = Figure(figsize=(6, 6), dpi=240)
+        FigureCanvasAgg(fig)
+    return fig
+
+
 def _draw_chart(
     planets, houses, out_path, title_text="Natal Chart", subtitle_text=""
 ):
-    fig = plt.figure(figsize=(6, 6), dpi=240)
-    ax = plt.subplot(111)
+    fig = _chart_figure()
+    try:
+        _plot_chart(fig, planets, houses, title_text, subtitle_text)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        fig.savefig(out_path, dpi=240, bbox_inches="tight", pad_inches=0.12)
+    finally:
+        # Artist'ler bir sonraki çizime kadar bellekte kalmasın
+        fig.clear()
+
+
+def _plot_chart(fig, planets, houses, title_text, subtitle_text):
+    ax = fig.add_subplot(111)
     ax.set_aspect("equal")
     ax.set_xlim(-1.1, 1.1)
     ax.set_ylim(-1.1, 1.1)
@@ -266,9 +342,117 @@ def _draw_chart(
             fontsize=7,
         )
 
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    fig.savefig(out_path, dpi=240, bbox_inches="tight", pad_inches=0.12)
-    plt.close(fig)
+
+def _planets_for_plot(placements):
+    """
+    (isim, boylam, ...) demetlerini sembol + renk bilgisiyle çizim formatına çevirir.
+    Kaynak: ChartRecord.placements() ya da chart_meta["planets"] sözlükleri.
+    """
+    planets_for_plot = []
+    for name, lon, *_ in placements:
+        lon = float(lon)
+
+        style = PLANET_STYLE.get(name, {"symbol": name[0], "color": "#ffffff"})
+
+        planets_for_plot.append(
+            {
+                "name": name,
+                "symbol": style["symbol"],
+                "lon": lon % 360.0,
+                "color": style["color"],
+            }
+        )
+    return planets_for_plot
+
+
+# -----------------------------------------
+# Vektörel (SVG) harita
+# -----------------------------------------
+# _draw_chart ile aynı geometri; birim çember 100 birime ölçeklenir ve
+# y ekseni SVG için ters çevrilir. Font boyutları ve çizgi kalınlıkları
+# 6in / 240dpi master PNG'deki oranlara göre ayarlanmıştır.
+SVG_SCALE = 100.0
+SVG_FONT = "DejaVu Sans, DejaVu, Segoe UI Symbol, sans-serif"
+
+
+def _svg_xy(r, deg):
+    """Ekliptik derece + yarıçap → SVG koordinatı (0° yukarıda, saat yönünün tersi)."""
+    theta = math.radians(90.0 - deg)
+    return r * math.cos(theta) * SVG_SCALE, -r * math.sin(theta) * SVG_SCALE
+
+
+def _svg_line(x1, y1, x2, y2, color, width, opacity=0.8):
+    return (
+        f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
+        f'stroke="{color}" stroke-width="{width:.2f}" stroke-opacity="{opacity}"/>'
+    )
+
+
+def _svg_text(x, y, text, size, color, anchor="middle", baseline="central", bold=False):
+    weight = ' font-weight="bold"' if bold else ""
+    return (
+        f'<text x="{x:.2f}" y="{y:.2f}" font-size="{size}" fill="{color}" '
+        f'text-anchor="{anchor}" dominant-baseline="{baseline}"{weight}>{escape(text)}</text>'
+    )
+
+
+def render_chart_svg(chart_meta, title_text="Natal Chart", subtitle_text=""):
+    """
+    chart_meta (compute_birth_chart çıktısı) → SVG metni.
+    Figure nesnesi oluşturmaz; tamamen string şablonudur.
+    """
+    planets = _planets_for_plot(
+        (p.get("name"), p.get("lon", 0.0)) for p in chart_meta.get("planets", [])
+    )
+    houses = chart_meta.get("houses", [])
+
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="-112 -122 224 234" '
+        f'font-family="{SVG_FONT}">',
+        '<rect x="-112" y="-122" width="224" height="234" fill="#050816"/>',
+        '<circle r="100" fill="#101735" stroke="#f2d47f" stroke-width="1.3"/>',
+    ]
+
+    # 12 burç bölümü + semboller
+    for i, (_, symbol) in enumerate(SIGNS):
+        bx, by = _svg_xy(1.0, i * 30.0)
+        parts.append(_svg_line(0, 0, bx, by, "#283055", 0.26))
+        tx, ty = _svg_xy(0.88, i * 30.0 + 15.0)
+        parts.append(_svg_text(tx, ty, symbol, 6.6, "#ffe9a3"))
+
+    # İç çember + merkez çekirdek (burç çizgilerini iç alanda örter)
+    parts.append('<circle r="70" fill="#050816" stroke="#f2d47f" stroke-width="0.8"/>')
+    parts.append('<circle r="5" fill="#050816" stroke="#30354f" stroke-width="0.5"/>')
+
+    # Ev çizgileri + numaralar
+    for idx, cusp_deg in enumerate(houses):
+        x2, y2 = _svg_xy(0.7, float(cusp_deg))
+        parts.append(_svg_line(0, 0, x2, y2, "#f8f8ff", 0.53))
+        tx, ty = _svg_xy(0.78, float(cusp_deg))
+        parts.append(_svg_text(tx, ty, str(idx + 1), 4.6, "#cfd2ff"))
+
+    # Aspect çizgileri
+    for asp in _compute_aspects(planets):
+        x1, y1 = _svg_xy(0.67, asp["p1"]["lon"])
+        x2, y2 = _svg_xy(0.67, asp["p2"]["lon"])
+        parts.append(_svg_line(x1, y1, x2, y2, asp["color"], asp["width"] * 0.4))
+
+    # Gezegen sembolleri
+    for pl in planets:
+        x, y = _svg_xy(0.82, pl["lon"])
+        parts.append(f'<circle cx="{x:.2f}" cy="{y:.2f}" r="1.1" fill="{pl["color"]}"/>')
+        tx, ty = _svg_xy(0.86, pl["lon"])
+        parts.append(_svg_text(tx, ty, pl["symbol"], 5.9, pl["color"]))
+
+    # Başlıklar
+    parts.append(
+        _svg_text(0, -105, title_text, 7.2, "#ffe9a3", baseline="auto", bold=True)
+    )
+    if subtitle_text:
+        parts.append(_svg_text(0, -97, subtitle_text, 4.6, "#cfd2ff", baseline="auto"))
+
+    parts.append("</svg>")
+    return "".join(parts)
 
 
 # -----------------------------------------
@@ -281,45 +465,35 @@ def generate_natal_chart(
     longitude: float,
     out_dir: str = "/tmp",
     timezone_str: str = "Europe/Istanbul",
+    house_system: str = DEFAULT_HOUSE_SYSTEM,
 ):
     """
     main.py şunu çağırıyor:
         chart_id, chart_path, chart_meta = generate_natal_chart(...)
 
     Burada:
-        - chart_meta = compute_birth_chart(...) çıktısını aynen döner.
+        - chart_meta = compute_birth_chart(...) çıktısını aynen döner
+          (cache'teki ChartRecord'dan üretilen yeni bir sözlük).
         - chart_path = PNG haritanın dosya yolu
         - chart_id   = PNG ismi için kullanılan uuid (chart_id.png)
     """
 
-    # 1) Gerçek astro veriyi astro_core'dan çek
-    chart_meta = compute_birth_chart(
-        date_str=birth_date,
-        time_str=birth_time,
-        lat=latitude,
-        lon=longitude,
-        tz_name=timezone_str,
-    )
-
-    houses = chart_meta.get("houses", [])
-    planets_meta = chart_meta.get("planets", [])
-
-    # 2) Çizim fonksiyonu için planet listesi hazırla
-    planets_for_plot = []
-    for pm in planets_meta:
-        name = pm.get("name")
-        lon = float(pm.get("lon", 0.0))
+    # 1) Gerçek astro veriyi astro_core'dan çek (kompakt kayıt, cache'li)
+    with span("chart_compute"):
+        record = get_chart_record(
+            date_str=birth_date,
+            time_str=birth_time,
+            lat=latitude,
+            lon=longitude,
+            tz_name=timezone_str,
+            house_system=house_system,
+        )
+        chart_meta = record.to_dict()
 
-        style = PLANET_STYLE.get(name, {"symbol": name[0], "color": "#ffffff"})
+    houses = record.cusps
 
-        planets_for_plot.append(
-            {
-                "name": name,
-                "symbol": style["symbol"],
-                "lon": lon % 360.0,
-                "color": style["color"],
-            }
-        )
+    # 2) Çizim fonksiyonu için planet listesi hazırla (kayıt dizilerinden doğrudan)
+    planets_for_plot = _planets_for_plot(record.placements())
 
     chart_id = uuid.uuid4().hex
     chart_path = os.path.join(out_dir, f"{chart_id}.png")
@@ -327,6 +501,78 @@ def generate_natal_chart(
     title = "Astrology Chart"
     subtitle = f"{birth_date}  •  {birth_time}"
 
-    _draw_chart(planets_for_plot, houses, chart_path, title, subtitle)
+    # Render havuzunda (kuyruk beklemesi dahil); dolu/zaman aşımı → RenderError
+    with span("chart_draw"):
+        render_pool.run(_draw_chart, planets_for_plot, houses, chart_path, title, subtitle)
+
+    # 3) Aynı veriden vektörel SVG (matplotlib'siz, ~ms altı)
+    svg_path = os.path.join(out_dir, f"{chart_id}.svg")
+    with span("chart_svg"), open(svg_path, "w", encoding="utf-8") as f:
+        f.write(render_chart_svg(chart_meta, title, subtitle))
 
     return chart_id, chart_path, chart_meta
+
+
+# -----------------------------------------
+# VARYANT ÜRETİMİ (boyut / format)
+# -----------------------------------------
+def _variant_width(master_width, size=None, width=None):
+    """İstenen preset ya da serbest genişliği master sınırları içinde çözer."""
+    if width:
+        target = int(width)
+        target = -(-target // CHART_WIDTH_STEP) * CHART_WIDTH_STEP
+        target = max(CHART_MIN_WIDTH, target)
+    else:
+        target = CHART_VARIANTS.get(size or "print") or master_width
+    return min(target, master_width)
+
+
+def get_chart_variant(chart_id, size="print", fmt="png", width=None, chart_dir="/tmp"):
+    """
+    Master haritadan ({chart_id}.png) istenen varyantı döndürür.
+
+    size  : CHART_VARIANTS anahtarı ("thumb" | "web" | "print")
+    fmt   : CHART_FORMATS anahtarı ("png" | "webp" | "avif" | "jpg")
+    width : opsiyonel piksel genişliği (size'ı ezer, CHART_WIDTH_STEP'e yuvarlanır)
+
+    Türetilen dosya {chart_id}_{genişlik}.{uzantı} olarak cache'lenir; aynı
+    istek ikinci kez geldiğinde sadece dosya yolu döner.
+    Döner: (path, mimetype) — master yoksa (None, None).
+    """
+    if size not in CHART_VARIANTS:
+        raise ValueError(f"Bilinmeyen boyut: {size}")
+    if fmt not in supported_chart_formats():
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+
+    master_path = os.path.join(chart_dir, f"{chart_id}.png")
+    if not os.path.exists(master_path):
+        return None, None
+
+    pil_format, mimetype, ext, save_kwargs = CHART_FORMATS[fmt]
+
+    with Image.open(master_path) as master:
+        target = _variant_width(master.width, size, width)
+
+        # Master'ın kendisi isteniyorsa yeniden kodlamaya gerek yok
+        if fmt == "png" and target == master.width:
+            return master_path, mimetype
+
+        out_path = os.path.join(chart_dir, f"{chart_id}_{target}.{ext}")
+        if os.path.exists(out_path):
+            cache_hit("chart_variant")
+            return out_path, mimetype
+        cache_miss("chart_variant")
+
+        img = master
+        if target != master.width:
+            height = round(master.height * target / master.width)
+            img = master.resize((target, height), Image.LANCZOS)
+        if pil_format != "PNG":
+            img = img.convert("RGB")
+
+        # Eşzamanlı isteklerde yarım dosya servis edilmesin diye önce geçici isme yaz
+        tmp_path = f"{out_path}.{uuid.uuid4().hex}.tmp"
+        img.save(tmp_path, pil_format, **save_kwargs)
+        os.replace(tmp_path, out_path)
+
+    return out_path, mimetype
@@ -0,0 +1,397 @@
+# daily_horoscope.py
+# ===================
+# MystAI - Günlük burç yorumları (önceden üretim + burç başına cache)
+#
+# Genel burç içeriği kişiye özel değildir: günde bir kez 12 burç × {tr, en}
+# = 24 metin üretilir ve /daily-horoscope isteği LLM'e hiç gitmeden cache'ten
+# döner.
+#
+# - sky_for_day     : günün transitleri (UTC öğlen haritası, açılar, takvim olayları)
+# - DailyStore      : (tarih, burç, dil) başına JSON dosyası + bellek içi kopya;
+#                     yarım kalan bir üretim sadece eksik burçlarla tamamlanır
+# - generate_day    : eksik girdiler sınırlı sayıda eşzamanlı LLM çağrısıyla üretilir;
+#                     gün başına dosya kilidi → aynı günü tek süreç üretir
+# - DailyScheduler  : arka plan iş parçacığı; her gün DAILY_HOUR_UTC'de bugün ve yarın
+# - LocalLLM        : ağsız, deterministik yerel LLM (DAILY_LLM=local; test/geliştirme)
+#
+# Elle çalıştırma (backend/ içinden):
+#     python daily_horoscope.py [YYYY-MM-DD] [--local]
+
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import swisseph as swe
+
+from astro_core import SIGN_META, SIGNS, ChartRecord, compute_aspects, compute_chart_records_batch
+from planet_calendar import CalendarNotReady, get_calendar
+
+DAILY_DIR = os.environ.get(
+    "DAILY_DIR", os.path.join(os.path.dirname(__file__), "data", "daily")
+)
+DAILY_MODEL = os.environ.get("DAILY_MODEL", "gpt-4o")
+DAILY_LLM = os.environ.get("DAILY_LLM", "openai")
+# Aynı anda en fazla bu kadar LLM çağrısı (rate limit'i canlı trafiğe bırakmak için)
+DAILY_CONCURRENCY = int(os.environ.get("DAILY_CONCURRENCY", "4"))
+# Günlük üretim saati (UTC); bugün + yarın üretilir, böylece UTC'nin önündeki
+# saat dilimleri de kendi "bugün"lerini hazır bulur
+DAILY_HOUR_UTC = int(os.environ.get("DAILY_HOUR_UTC", "0"))
+DAILY_KEEP_DAYS = int(os.environ.get("DAILY_KEEP_DAYS", "7"))
+# Başarısız girdi varsa bu kadar saniye sonra yeniden denenir
+DAILY_RETRY_SECONDS = 600
+DAILY_MAX_TOKENS = 700
+
+LANGS = ("tr", "en")
+
+
+def generation_days(now=None):
+    """Üretimi yapılan günler: (bugün, yarın), UTC."""
+    now = now or datetime.now(timezone.utc)
+    return tuple((now + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in (0, 1))
+
+
+def parse_sign(value) -> int:
+    """'Koç' | 'Aries' | 'aries' | 0..11 → burç indeksi."""
+    text = str(value).strip()
+    if text.isdigit() and int(text) < 12:
+        return int(text)
+    for i, meta in enumerate(SIGN_META):
+        if text.lower() in (meta["tr"].lower(), meta["en"].lower()):
+            return i
+    raise ValueError(f"Bilinmeyen burç: {value}")
+
+
+def _day_jd(day: str) -> float:
+    y, m, d = (int(x) for x in day.split("-"))
+    return swe.julday(y, m, d, 0.0, swe.GREG_CAL)
+
+
+# -----------------------------
+# Günün gökyüzü (ortak, burçtan bağımsız)
+# -----------------------------
+def sky_for_day(day: str) -> dict:
+    """
+    Günün transitleri: UTC 12:00 gezegen konumları, gezegenler arası açılar ve
+    gezegen takvimindeki o güne ait olaylar.
+    """
+    jd0 = _day_jd(day)
+    record = ChartRecord(compute_chart_records_batch([jd0 + 0.5], [0.0], [0.0], "whole_sign")[0])
+    chart = record.to_dict()
+    try:
+        events = get_calendar().query(jd0, jd0 + 1)
+    except CalendarNotReady:
+        # Olaysız metinler cache'e girmesin; gün daha sonra yeniden denenir
+        raise
+    except Exception:
+        traceback.print_exc()
+        events = []
+    return {
+        "date": day,
+        "planets": [{"name": p["name"], "lon": p["lon"], "sign_index": int(p["lon"] // 30)}
+                    for p in chart["planets"]],
+        "aspects": compute_aspects(chart["planets"]),
+        "events": events,
+    }
+
+
+def build_daily_prompts(sky: dict, sign: int, lang: str):
+    """(system, user) — burcun kendisini 1. ev sayan güneş burcu evleriyle."""
+    meta = SIGN_META[sign]
+    name = meta[lang]
+    lines = []
+    for p in sky["planets"]:
+        house = (p["sign_index"] - sign) % 12 + 1
+        planet_sign = SIGN_META[p["sign_index"]][lang]
+        lines.append(f"- {p['name']}: {planet_sign} {p['lon'] % 30:.1f}° ({house}. ev)" if lang == "tr"
+                     else f"- {p['name']}: {planet_sign} {p['lon'] % 30:.1f}° (house {house})")
+    aspects = [f"- {a['p1']} {a['type']} {a['p2']} (orb {a['orb']:.1f}°)" for a in sky["aspects"]]
+    events = [f"- {e['utc'][11:16]} UTC {e['kind']} {e['body']} {SIGN_META[e['sign_index']][lang]}"
+              for e in sky["events"]]
+
+    if lang == "tr":
+        system = (
+            "Sen MystAI adında sıcak, profesyonel ve destekleyici bir astrologsun. "
+            "Günlük burç yorumlarını kısa, somut ve umut veren bir dille yazarsın; "
+            "korkutucu veya kaderci ifadeler kullanmazsın."
+        )
+        user = (
+            f"{sky['date']} tarihi için {name} burcunun günlük yorumunu yaz.\n\n"
+            "Günün gezegen konumları (güneş burcu evleriyle):\n" + "\n".join(lines) + "\n\n"
+            "Açılar:\n" + ("\n".join(aspects) or "- yok") + "\n\n"
+            "Günün olayları:\n" + ("\n".join(events) or "- yok") + "\n\n"
+            "3 kısa paragraf yaz: genel enerji, aşk ve ilişkiler, iş ve para. "
+            "Sonda tek cümlelik bir günün tavsiyesi ver."
+        )
+    else:
+        system = (
+            "You are MystAI, a warm, professional and supportive astrologer. "
+            "You write short, concrete and hopeful daily horoscopes and avoid "
+            "fear-based or fatalistic language."
+        )
+        user = (
+            f"Write the daily horoscope for {name} for {sky['date']}.\n\n"
+            "Planet positions of the day (solar houses):\n" + "\n".join(lines) + "\n\n"
+            "Aspects:\n" + ("\n".join(aspects) or "- none") + "\n\n"
+            "Events of the day:\n" + ("\n".join(events) or "- none") + "\n\n"
+            "Write 3 short paragraphs: overall energy, love and relationships, work and money. "
+            "End with a one-sentence tip of the day."
+        )
+    return system, user
+
+
+# -----------------------------
+# Yerel LLM (ağsız)
+# -----------------------------
+class LocalLLM:
+    """
+    OpenAI istemcisinin chat.completions.create arayüzünü taklit eder.
+    Cevap prompt'tan deterministik üretilir; delay ile gecikme, fail_every ile
+    her N. çağrıda hata simüle edilir.
+    """
+
+    def __init__(self, delay=0.0, fail_every=0):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, max_tokens=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail_every and n % self.fail_every == 0:
+            raise RuntimeError("LocalLLM: simüle edilmiş hata")
+        prompt = messages[-1]["content"]
+        text = f"[{model}] " + prompt.splitlines()[0]
+        message = SimpleNamespace(role="assistant", content=text)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(text) // 4),
+        )
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+class DailyStore:
+    """(tarih, burç, dil) → girdi; disk kalıcı, bellek sıcak kopya."""
+
+    def __init__(self, root=DAILY_DIR, keep_days=DAILY_KEEP_DAYS):
+        self.root = root
+        self.keep_days = keep_days
+        self._mem = {}
+        self._lock = threading.Lock()
+
+    def _path(self, day, sign, lang):
+        return os.path.join(self.root, day, f"{sign:02d}_{lang}.json")
+
+    def get(self, day, sign, lang):
+        key = (day, sign, lang)
+        entry = self._mem.get(key)
+        if entry is None:
+            try:
+                with open(self._path(day, sign, lang), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return None
+            with self._lock:
+                self._mem[key] = entry
+        return entry
+
+    def put(self, entry):
+        path = self._path(entry["date"], entry["sign_index"], entry["language"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self._lock:
+            self._mem[(entry["date"], entry["sign_index"], entry["language"])] = entry
+
+    def missing(self, day):
+        return [(s, lang) for s in range(12) for lang in LANGS if self.get(day, s, lang) is None]
+
+    def oldest(self, today):
+        """Saklanan en eski gün (bugün - keep_days)."""
+        return (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=self.keep_days)).strftime("%Y-%m-%d")
+
+    def prune(self, today):
+        """keep_days'ten eski ve yarından ileri günleri diskten ve bellekten siler."""
+        cutoff = self.oldest(today)
+        latest = (datetime.strptime(today, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        with self._lock:
+            for key in [k for k in self._mem if not cutoff <= k[0] <= latest]:
+                del self._mem[key]
+        if not os.path.isdir(self.root):
+            return
+        for day in os.listdir(self.root):
+            if not cutoff <= day <= latest:
+                folder = os.path.join(self.root, day)
+                for name in os.listdir(folder):
+                    os.remove(os.path.join(folder, name))
+                os.rmdir(folder)
+
+
+store = DailyStore()
+
+
+# -----------------------------
+# Üretim
+# -----------------------------
+def _generate_one(llm, sky, sign, lang):
+    system, user = build_daily_prompts(sky, sign, lang)
+    completion = llm.chat.completions.create(
+        model=DAILY_MODEL,
+        messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
+        max_tokens=DAILY_MAX_TOKENS,
+    )
+    return {
+        "date": sky["date"],
+        "sign": SIGNS[sign],
+        "sign_index": sign,
+        "language": lang,
+        "text": completion.choices[0].message.content.strip(),
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def generate_day(day, llm, daily_store=None, workers=DAILY_CONCURRENCY, force=False) -> dict:
+    """
+    Günün eksik (force=True ise tüm) girdilerini üretir. En fazla `workers`
+    eşzamanlı LLM çağrısı yapılır; tek bir burçtaki hata diğerlerini durdurmaz.
+    Süreçler arası gün kilidi: aynı günü başka bir süreç üretiyorsa bitmesi
+    beklenir, sonra yalnızca hâlâ eksik olanlar üretilir.
+    Gezegen takvimi hazır değilse CalendarNotReady (hiçbir girdi yazılmaz).
+    Döner: {"date", "generated", "cached", "failed": [(burç, dil), ...], "seconds"}
+    """
+    daily_store = daily_store or store
+    t0 = time.perf_counter()
+    folder = os.path.join(daily_store.root, day)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            jobs = [(s, lang) for s in range(12) for lang in LANGS] if force else daily_store.missing(day)
+            failed = []
+            if jobs:
+                sky = sky_for_day(day)
+
+                def run(job):
+                    try:
+                        daily_store.put(_generate_one(llm, sky, *job))
+                        return None
+                    except Exception:
+                        traceback.print_exc()
+                        return job
+
+                with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                    failed = [job for job in pool.map(run, jobs) if job is not None]
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return {
+        "date": day,
+        "generated": len(jobs) - len(failed),
+        "cached": 24 - len(jobs),
+        "failed": failed,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def get_llm(default_client=None):
+    """DAILY_LLM=local ise yerel LLM, aksi halde verilen OpenAI istemcisi."""
+    if DAILY_LLM == "local":
+        return LocalLLM()
+    if default_client is None:
+        # Yer tutucu metinler sessizce gerçek yorumların yerine geçmesin
+        raise ValueError("DAILY_LLM=openai için OpenAI istemcisi gerekli (yerel LLM için DAILY_LLM=local)")
+    return default_client
+
+
+# -----------------------------
+# Zamanlayıcı
+# -----------------------------
+class DailyScheduler:
+    """
+    Arka plan iş parçacığı: her gün DAILY_HOUR_UTC'de bugün ve yarını üretir,
+    eski günleri temizler. ensure() cache'te olmayan bugün/yarın için tek
+    seferlik arka plan üretimi başlatır (süreçte aynı gün için ikinci kez
+    başlatmaz; süreçler arasında generate_day'in gün kilidi tekilleştirir);
+    başka günler ücretli LLM çağrısı tetiklemez.
+    """
+
+    def __init__(self, llm, daily_store=None, hour_utc=DAILY_HOUR_UTC):
+        self.llm = llm
+        self.store = daily_store or store
+        self.hour_utc = hour_utc
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_run = None
+
+    def ensure(self, day) -> bool:
+        """Arka plan üretimi başlatıldıysa True."""
+        if day not in generation_days():
+            return False
+        with self._lock:
+            if day in self._inflight:
+                return False
+            self._inflight.add(day)
+        threading.Thread(target=self._run_day, args=(day,), daemon=True).start()
+        return True
+
+    def _run_day(self, day):
+        try:
+            self.last_run = generate_day(day, self.llm, self.store)
+            return self.last_run
+        finally:
+            with self._lock:
+                self._inflight.discard(day)
+
+    def _seconds_until_next_run(self, now):
+        run = now.replace(hour=self.hour_utc, minute=0, second=0, microsecond=0)
+        if run <= now:
+            run += timedelta(days=1)
+        return (run - now).total_seconds()
+
+    def _loop(self):
+        while True:
+            now = datetime.now(timezone.utc)
+            failed = False
+            for day in generation_days(now):
+                try:
+                    failed |= bool(self._run_day(day)["failed"])
+                except Exception:
+                    traceback.print_exc()
+                    failed = True
+            self.store.prune(now.strftime("%Y-%m-%d"))
+            wait = self._seconds_until_next_run(datetime.now(timezone.utc))
+            time.sleep(min(wait, DAILY_RETRY_SECONDS) if failed else wait)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="daily-horoscope", daemon=True)
+            self._thread.start()
+        return self
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    day = args[0] if args else datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    if "--local" in sys.argv or DAILY_LLM == "local":
+        llm = LocalLLM()
+    else:
+        from openai import OpenAI
+
+        llm = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    result = generate_day(day, llm, force="--force" in sys.argv)
+    print(json.dumps(result, ensure_ascii=False))
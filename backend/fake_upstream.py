@@ -0,0 +1,282 @@
+# fake_upstream.py
+# ===================
+# MystAI - Hata enjekte eden yerel OpenAI + Nominatim taklidi (upstream
+# katmanını ve yük testlerini ücretli/kamusal servislere gitmeden çalıştırmak için)
+#
+# Uç noktalar (OpenAI SDK'nın ve geopy'nin beklediği biçimde):
+# - POST /v1/chat/completions : deterministik kısa cevap + usage      (rota: chat)
+# - POST /v1/audio/speech     : sahte MP3 baytları                    (rota: speech)
+# - GET  /search?q=...        : Nominatim cevabı; bilinen şehirler gerçek
+#                               koordinatla, diğerleri sorgu hash'inden (rota: search)
+# - GET  /_faults             : geçerli hata ayarları + rota başına sayaçlar
+# - POST /_faults             : hata ayarlarını çalışırken değiştirir (JSON, kısmi)
+#
+# Hata ayarları (her istek için bağımsız zar atılır):
+#   latency / jitter      : temel gecikme + [0, jitter) rastgele ek (sn)
+#   tail_rate/tail_latency: bu oranda istek tail_latency kadar bekler (hedge testi)
+#   error_rate/error_status: bu oranda istek error_status döner (429/500/503 …)
+#   drop_rate             : bu oranda bağlantı cevapsız kapatılır
+# "speech.latency" gibi rota önekli anahtarlar yalnızca o rotayı değiştirir
+# (ör. TTS sohbetten yavaş, geocode hızlı).
+#
+# Çalıştırma (backend/ içinden):
+#     python fake_upstream.py --port 8765 --latency 0.3 --error-rate 0.2 --route speech.latency=2
+#     OPENAI_BASE_URL=http://127.0.0.1:8765/v1 NOMINATIM_URL=http://127.0.0.1:8765 \
+#         OPENAI_API_KEY=x python main.py
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_FAULTS = {
+    "latency": 0.0,
+    "jitter": 0.0,
+    "tail_rate": 0.0,
+    "tail_latency": 5.0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "drop_rate": 0.0,
+}
+
+ROUTES = ("chat", "speech", "search")
+
+FAKE_MP3 = b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb\x90\x00" * 256
+
+# Geocode taklidi: bilinen yerler gerçek koordinatla (timezone araması anlamlı
+# olsun), bilinmeyenler sorgu hash'inden türetilen sabit bir noktayla döner
+KNOWN_PLACES = {
+    "istanbul": (41.0082, 28.9784, "İstanbul, Türkiye"),
+    "ankara": (39.9334, 32.8597, "Ankara, Türkiye"),
+    "izmir": (38.4237, 27.1428, "İzmir, Türkiye"),
+    "new york": (40.7128, -74.0060, "New York, United States"),
+    "london": (51.5074, -0.1278, "London, United Kingdom"),
+    "paris": (48.8566, 2.3522, "Paris, France"),
+    "lisbon": (38.7223, -9.1393, "Lisboa, Portugal"),
+    "tokyo": (35.6762, 139.6503, "東京都, 日本"),
+    "sydney": (-33.8688, 151.2093, "Sydney, Australia"),
+    "sao paulo": (-23.5505, -46.6333, "São Paulo, Brasil"),
+    "reykjavik": (64.1466, -21.9426, "Reykjavík, Ísland"),
+    "cape town": (-33.9249, 18.4241, "Cape Town, South Africa"),
+}
+
+
+def _fault_key(key):
+    """'latency' → (None, 'latency'); 'speech.latency' → ('speech', 'latency')."""
+    route, _, name = key.rpartition(".")
+    if name not in DEFAULT_FAULTS or (route and route not in ROUTES):
+        raise ValueError(f"Bilinmeyen ayar: {key}")
+    return route or None, name
+
+
+class FaultState:
+    def __init__(self, routes=None, **faults):
+        self.faults = dict(DEFAULT_FAULTS)
+        self.routes = {}  # rota → yalnızca farklı olan ayarlar
+        self.counts = {}  # rota → {"requests", "errors", "drops", "tails"}
+        self.lock = threading.Lock()
+        self.update(faults)
+        for route, overrides in (routes or {}).items():
+            self.update({f"{route}.{k}": v for k, v in overrides.items()})
+
+    def update(self, changes):
+        parsed = []
+        for key, value in changes.items():
+            route, name = _fault_key(key)
+            parsed.append((route, name, type(DEFAULT_FAULTS[name])(value)))
+        with self.lock:
+            for route, name, value in parsed:
+                target = self.routes.setdefault(route, {}) if route else self.faults
+                target[name] = value
+
+    def faults_for(self, route):
+        with self.lock:
+            return {**self.faults, **self.routes.get(route, {})}
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "faults": dict(self.faults),
+                "routes": {r: dict(f) for r, f in self.routes.items()},
+                "counts": {r: dict(c) for r, c in self.counts.items()},
+            }
+
+    def count(self, route, key):
+        with self.lock:
+            counts = self.counts.setdefault(route, {"requests": 0, "errors": 0, "drops": 0, "tails": 0})
+            counts[key] += 1
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # SDK keep-alive havuzu gerçekçi olsun
+    state: FaultState = None
+
+    def log_message(self, *args):
+        pass
+
+    def handle_one_request(self):
+        # İstemci deadline/hedge yüzünden bağlantıyı erken kapatabilir
+        try:
+            super().handle_one_request()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _inject(self, route):
+        """Gecikme/hata/kopma uygular; cevap burada verildiyse True döner."""
+        state = self.state
+        state.count(route, "requests")
+        f = state.faults_for(route)
+        delay = f["latency"] + random.uniform(0, f["jitter"])
+        if random.random() < f["tail_rate"]:
+            state.count(route, "tails")
+            delay = max(delay, f["tail_latency"])
+        time.sleep(delay)
+
+        if random.random() < f["drop_rate"]:
+            state.count(route, "drops")
+            self.close_connection = True
+            return True
+        if random.random() < f["error_rate"]:
+            state.count(route, "errors")
+            status = f["error_status"]
+            headers = {"Retry-After": "1"} if status in (429, 503) else None
+            self._json(status, {"error": {"message": f"injected {status}", "type": "server_error"}}, headers)
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/_faults":
+            return self._json(200, self.state.snapshot())
+        if url.path == "/search":
+            if self._inject("search"):
+                return
+            query = (parse_qs(url.query).get("q") or [""])[0]
+            return self._json(200, self._places(query))
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        payload = self._read_json()
+        if self.path == "/_faults":
+            try:
+                self.state.update(payload)
+            except (ValueError, TypeError) as e:
+                return self._json(400, {"error": str(e)})
+            return self._json(200, self.state.snapshot())
+
+        if self.path.endswith("/chat/completions"):
+            if not self._inject("chat"):
+                self._json(200, self._completion(payload))
+            return
+        if self.path.endswith("/audio/speech"):
+            if self._inject("speech"):
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(FAKE_MP3)))
+            self.end_headers()
+            self.wfile.write(FAKE_MP3)
+            return
+        self._json(404, {"error": {"message": "not found"}})
+
+    @staticmethod
+    def _places(query):
+        """Nominatim format=json cevabı (geopy yalnızca lat/lon/display_name okur)."""
+        key = query.split(",")[0].strip().lower()
+        if not key:
+            return []
+        if key in KNOWN_PLACES:
+            lat, lon, name = KNOWN_PLACES[key]
+        else:
+            h = hashlib.sha1(key.encode()).digest()
+            lat = int.from_bytes(h[:4], "big") / 2**32 * 120.0 - 55.0
+            lon = int.from_bytes(h[4:8], "big") / 2**32 * 360.0 - 180.0
+            name = query
+        return [{
+            "place_id": int.from_bytes(hashlib.sha1(key.encode()).digest()[:4], "big"),
+            "lat": f"{lat:.7f}",
+            "lon": f"{lon:.7f}",
+            "display_name": name,
+            "class": "place",
+            "type": "city",
+            "importance": 0.8,
+        }]
+
+    @staticmethod
+    def _completion(payload):
+        messages = payload.get("messages") or [{"content": ""}]
+        prompt = messages[-1].get("content") or ""
+        text = f"[{payload.get('model', 'fake')}] " + (prompt.splitlines() or [""])[0][:200]
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        return {
+            "id": f"chatcmpl-fake-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": prompt_tokens + len(text) // 4,
+            },
+        }
+
+
+def serve(host="127.0.0.1", port=8765, routes=None, **faults):
+    """
+    Sunucuyu arka plan iş parçacığında başlatır → (server, base_url, state).
+    base_url OpenAI içindir (".../v1"); Nominatim kökü "/v1"siz hâlidir.
+    routes: {"speech": {"latency": 2.0}, ...} rota bazlı farklı ayarlar.
+    """
+    state = FaultState(routes, **faults)
+    handler = type("FaultHandler", (Handler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1", state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hata enjekte eden yerel OpenAI taklidi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for key, value in DEFAULT_FAULTS.items():
+        parser.add_argument("--" + key.replace("_", "-"), type=type(value), default=value)
+    parser.add_argument("--route", action="append", default=[], metavar="ROTA.AYAR=DEĞER",
+                        help="rota bazlı ayar, ör. speech.latency=2 (tekrarlanabilir)")
+    args = parser.parse_args(argv)
+    faults = {k: getattr(args, k) for k in DEFAULT_FAULTS}
+    server, url, state = serve(args.host, args.port, **faults)
+    try:
+        state.update(dict(item.split("=", 1) for item in args.route))
+    except ValueError as e:
+        parser.error(str(e))
+    snap = state.snapshot()
+    print(f"fake upstream: {url}  {snap['faults']}  {snap['routes']}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# fixed_stars.py
+# ===================
+# MystAI - Sabit yıldız kavuşumları
+#
+# sefstars.txt bir kez okunur ve J2000 ekliptik boylamına göre sıralı bir
+# indekse dönüştürülür (StarIndex). Yıldızlar birbirine göre neredeyse
+# hareketsizdir; tarih farkı, tüm kataloğu aynı miktarda kaydıran presesyon
+# ile karşılanır. Böylece her gezegen için aday yıldızlar np.searchsorted
+# (ikili arama) ile bulunur; swe.fixstar2_ut yalnızca adaylar için, kesin
+# orb hesabında çağrılır.
+
+import os
+from functools import lru_cache
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import EPHE_PATH, PLANET_NAMES, degree_to_sign
+
+FIXED_STARS_PATH = os.path.join(EPHE_PATH, "sefstars.txt")
+
+# Varsayılan orb (derece) ve parlaklık sınırı (kadir; küçük = parlak)
+FIXED_STAR_ORB = 1.0
+FIXED_STAR_MAX_MAG = 2.5
+# İstemci değerlerinin üst sınırları: daha geniş orb / sönük yıldız, her
+# istekte çok daha fazla fixstar2_ut çağrısı demektir. Parlaklık sınırı
+# MAG_STEP'e yuvarlanır; star_index cache'i az sayıda anahtarla kalır.
+FIXED_STAR_MAX_ORB = 2.0
+FIXED_STAR_MAG_LIMIT = 3.0
+MAG_STEP = 0.5
+
+J2000 = 2451545.0
+OBLIQUITY_J2000 = 23.4392911
+# Ekliptik boylamda genel presesyon (derece / Jülyen yılı)
+PRECESSION_RATE = 50.2903 / 3600.0
+
+# İndeks araması için pay: öz hareket + presesyonun doğrusal olmaması
+SEARCH_MARGIN = 0.5
+
+
+def _parse_catalog(path=FIXED_STARS_PATH):
+    """
+    sefstars.txt → [(ad, nomenklatür, RA°, Dec°, kadir), ...]
+    Aynı yıldızın farklı yazımları (nomenklatüre göre) tek kayda indirilir;
+    1950 ekinokslu özel kayıtlar (ör. galaktik noktalar) atlanır.
+    """
+    rows = []
+    seen = set()
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) < 14 or parts[2] == "1950":
+                continue
+            name, nomenclature = parts[0], parts[1]
+            if nomenclature in seen:
+                continue
+            seen.add(nomenclature)
+
+            ra = (float(parts[3]) + float(parts[4]) / 60.0 + float(parts[5]) / 3600.0) * 15.0
+            dec = abs(float(parts[6])) + float(parts[7]) / 60.0 + float(parts[8]) / 3600.0
+            if parts[6].startswith("-"):
+                dec = -dec
+            rows.append((name, nomenclature, ra, dec, float(parts[13])))
+    return rows
+
+
+class StarIndex:
+    """J2000 ekliptik boylamına göre sıralı yıldız indeksi."""
+
+    __slots__ = ("names", "nomenclature", "lon", "mag", "_wrapped")
+
+    def __init__(self, rows):
+        ra = np.radians([r[2] for r in rows])
+        dec = np.radians([r[3] for r in rows])
+        eps = np.radians(OBLIQUITY_J2000)
+
+        lon = np.degrees(np.arctan2(
+            np.sin(ra) * np.cos(eps) + np.tan(dec) * np.sin(eps), np.cos(ra))) % 360.0
+
+        order = np.argsort(lon)
+        self.names = [rows[i][0] for i in order]
+        self.nomenclature = [rows[i][1] for i in order]
+        self.lon = lon[order]
+        self.mag = np.array([rows[i][4] for i in order])
+        # 0°/360° geçişi için üç kopya: tek searchsorted ile sarmalı aralık
+        self._wrapped = np.concatenate([self.lon - 360.0, self.lon, self.lon + 360.0])
+
+    def __len__(self):
+        return len(self.lon)
+
+    def candidates(self, lons, jd_ut, width):
+        """
+        lons: (P,) tarih boylamları → her biri için ±width içindeki yıldız indeksleri.
+        """
+        shift = PRECESSION_RATE * (jd_ut - J2000) / 365.25
+        q = (np.asarray(lons, dtype=float) - shift) % 360.0
+        lo = np.searchsorted(self._wrapped, q - width, side="left")
+        hi = np.searchsorted(self._wrapped, q + width, side="right")
+        n = len(self.lon)
+        return [np.arange(a, b) % n for a, b in zip(lo.tolist(), hi.tolist())]
+
+
+@lru_cache(maxsize=8)
+def star_index(max_mag=FIXED_STAR_MAX_MAG) -> StarIndex:
+    """Katalog süreç başına bir kez okunur; parlaklık sınırına göre cache'lenir."""
+    rows = [r for r in _parse_catalog() if r[4] <= max_mag]
+    return StarIndex(rows)
+
+
+def star_contacts(lons, jd_ut, names=PLANET_NAMES, orb=FIXED_STAR_ORB, max_mag=FIXED_STAR_MAX_MAG):
+    """
+    Gezegen ↔ sabit yıldız boylam kavuşumları (orb içinde).
+    orb [0, FIXED_STAR_MAX_ORB], max_mag en fazla FIXED_STAR_MAG_LIMIT olacak
+    şekilde kırpılır.
+    Döner: [{"planet", "star", "nomenclature", "magnitude", "lon", "lat", "sign", "orb"}, ...]
+    """
+    orb = min(max(float(orb), 0.0), FIXED_STAR_MAX_ORB)
+    max_mag = min(round(float(max_mag) / MAG_STEP) * MAG_STEP, FIXED_STAR_MAG_LIMIT)
+    index = star_index(max_mag)
+    lons = np.asarray(lons, dtype=float)
+    out = []
+    exact = {}
+    for p, cand in enumerate(index.candidates(lons, jd_ut, orb + SEARCH_MARGIN)):
+        for i in cand.tolist():
+            nom = index.nomenclature[i]
+            if nom not in exact:
+                xx, _, _ = swe.fixstar2_ut("," + nom, jd_ut)
+                exact[nom] = (xx[0], xx[1])
+            star_lon, star_lat = exact[nom]
+            diff = abs(float((lons[p] - star_lon + 180.0) % 360.0 - 180.0))
+            if diff > orb:
+                continue
+            out.append({
+                "planet": names[p],
+                "star": index.names[i],
+                "nomenclature": nom,
+                "magnitude": float(index.mag[i]),
+                "lon": star_lon,
+                "lat": star_lat,
+                "sign": degree_to_sign(star_lon)[0],
+                "orb": diff,
+            })
+    out.sort(key=lambda c: c["orb"])
+    return out
@@ -1,12 +1,44 @@
+# generate_pdf.py
+# ===================
+# MystAI - PDF rapor dizgisi (logo + kapak + harita / tarot açılımı + uzun rapor)
+#
+# generate_pdf_file saf bir fonksiyondur: girdiler JSON'a çevrilebilir,
+# çıktı PDF dosyasının yoludur. /generate_pdf bunu render havuzunda
+# (render_pool.py) ayrı süreçte çalıştırır.
+
 import os
+import time
 import uuid
+from functools import lru_cache
+
 from fpdf import FPDF
 from PIL import Image
 
+from chart_generator import get_chart_variant
+from metrics import observe_stage, span
+from tarot_render import render_spread
+
 BASE_DIR = os.path.dirname(__file__)
 FONT_PATH_TTF = os.path.join(BASE_DIR, "fonts", "DejaVuSans.ttf")
 LOGO_PATH = os.path.abspath(os.path.join(BASE_DIR, "..", "images", "mystai-logo.png"))
 
+# Logo sayfada 16 mm; 1024 px kaynak her PDF'te yeniden sıkıştırılmasın diye
+# bir kez bu genişliğe indirilip bellekte tutulur (~300 dpi)
+LOGO_PX = 256
+
+REPORT_TYPES = ("natal", "solar", "transits", "tarot")
+
+
+@lru_cache(maxsize=1)
+def _logo_image():
+    if not (LOGO_PATH and os.path.exists(LOGO_PATH)):
+        return None
+    with Image.open(LOGO_PATH) as im:
+        im.load()
+        if im.width > LOGO_PX:
+            return im.resize((LOGO_PX, round(im.height * LOGO_PX / im.width)), Image.LANCZOS)
+        return im.copy()
+
 
 class MystPDF(FPDF):
     def __init__(self, *args, **kwargs):
@@ -16,20 +48,21 @@ class MystPDF(FPDF):
             self.add_font("DejaVu", "B", FONT_PATH_TTF, uni=True)
 
     def header(self):
-        if LOGO_PATH and os.path.exists(LOGO_PATH):
-            self.image(LOGO_PATH, 12, 8, 22)
+        logo = _logo_image()
+        if logo is not None:
+            self.image(logo, 10, 7, 16)
 
-        self.set_xy(40, 9)
-        self.set_font("DejaVu", "B", 12)
+        self.set_xy(28, 8)
+        self.set_font("DejaVu", "B", 11)
         self.set_text_color(25, 30, 55)
-        self.cell(0, 6, "MystAI Astrology", ln=1)
+        self.cell(0, 5, "MystAI Astrology", ln=1)
 
-        self.set_xy(40, 15)
+        self.set_xy(28, 14)
         self.set_font("DejaVu", "", 8)
         self.set_text_color(110, 115, 150)
-        self.cell(0, 4, "mystai.ai • AI-powered divination & astrology", ln=1)
+        self.cell(0, 4, "mystai.ai  •  AI-powered divination & astrology", ln=1)
 
-        self.ln(6)
+        self.ln(4)
         self.set_text_color(25, 25, 40)
 
     def footer(self):
@@ -39,6 +72,67 @@ class MystPDF(FPDF):
         self.cell(0, 8, f"MystAI.ai • Page {self.page_no()}", align="C")
 
 
+def _titles(lang, report_type, tarot):
+    """(başlık, alt başlık, rapor giriş başlığı)"""
+    if lang == "tr":
+        if report_type == "tarot":
+            title = "MystAI Tarot Açılımı"
+            sub = (
+                "Bu rapor, seçilen kartları açılımdaki yerleriyle birlikte yorumlayarak "
+                "sorunun etrafındaki enerjiyi ve olasılıkları anlatır."
+            )
+        elif report_type == "solar":
+            title = "MystAI Güneş Dönüşü (Solar Return) Astroloji Raporu"
+            sub = (
+                "Bu rapor, doğum haritan ile güneş dönüşü haritanı bir araya getirerek "
+                "önümüzdeki yaklaşık bir yılın ana temalarını yorumlar."
+            )
+        elif report_type == "transits":
+            title = "MystAI Transit Astroloji Raporu"
+            sub = (
+                "Bu rapor, güncel gökyüzü hareketlerini (transitleri) doğum haritanla ilişkilendirerek "
+                "yakın gelecekte öne çıkan enerjileri açıklar."
+            )
+        else:
+            title = "MystAI Natal Doğum Haritası Raporu"
+            sub = (
+                "Bu rapor, doğum haritanın sembollerini yorumlayarak kişilik, yaşam amacı, "
+                "ilişkiler ve kader potansiyelin hakkında derinlemesine içgörüler sunar."
+            )
+        intro_heading = (
+            "Detaylı tarot yorumun aşağıdadır:" if tarot else "Detaylı astroloji raporun aşağıdadır:"
+        )
+    else:
+        if report_type == "tarot":
+            title = "MystAI Tarot Reading"
+            sub = (
+                "This report interprets the drawn cards in their spread positions, "
+                "describing the energy and possibilities around your question."
+            )
+        elif report_type == "solar":
+            title = "MystAI Solar Return Astrology Report"
+            sub = (
+                "This report combines your natal chart with your solar return chart "
+                "to describe the main themes of the year ahead."
+            )
+        elif report_type == "transits":
+            title = "MystAI Transit Astrology Report"
+            sub = (
+                "This report relates current planetary transits to your natal chart, "
+                "highlighting the key energies around you now and in the near future."
+            )
+        else:
+            title = "MystAI Natal Astrology Report"
+            sub = (
+                "This report interprets the symbols of your natal chart to explore your "
+                "personality, life purpose, relationships and destiny potential."
+            )
+        intro_heading = (
+            "Your detailed tarot reading is below:" if tarot else "Your detailed astrology report is below:"
+        )
+    return title, sub, intro_heading
+
+
 def generate_pdf_file(
     text: str,
     lang: str = "en",
@@ -48,48 +142,31 @@ def generate_pdf_file(
     birth_time: str = None,
     birth_place: str = None,
     name: str = None,
+    chart_format: str = "png",
+    solar_year=None,
+    tarot: dict = None,
+    out_dir: str = "/tmp",
+    chart_dir: str = "/tmp",
 ):
-    pdf_id = uuid.uuid4().hex
-    pdf_path = f"/tmp/{pdf_id}.pdf"
-
+    """
+    PDF'i {out_dir}/{uuid}.pdf olarak yazar ve yolunu döner.
+    chart_format: 'png' (raster, print varyantı JPEG) | 'svg' (vektörel)
+    tarot: resolve_draw çıktısı; kompozit görsel harita gibi sayfaya yerleştirilir
+    """
     if lang not in ("tr", "en"):
         lang = "en"
-
-    if report_type not in ("natal", "solar", "transits"):
+    if report_type not in REPORT_TYPES:
         report_type = "natal"
 
+    pdf_path = os.path.join(out_dir, f"{uuid.uuid4().hex}.pdf")
+
+    layout_t0 = time.perf_counter()
     pdf = MystPDF()
     pdf.set_auto_page_break(auto=True, margin=18)
     pdf.alias_nb_pages()
     pdf.add_page()
 
-    if lang == "tr":
-        if report_type == "solar":
-            title = "MystAI Güneş Dönüşü Astroloji Raporu"
-            sub = (
-                "Bu rapor, doğum haritan ile güneş dönüşü haritanı bir araya getirerek "
-                "yaklaşık bir yıllık ana temaları özetler."
-            )
-        elif report_type == "transits":
-            title = "MystAI Transit Astroloji Raporu"
-            sub = "Bu rapor güncel gezegen hareketlerini doğum haritanla ilişkilendirir."
-        else:
-            title = "MystAI Natal Doğum Haritası Raporu"
-            sub = "Bu rapor kişilik, yaşam amacı, ilişkiler ve ruhsal yapı hakkında içgörü sunar."
-
-        intro = "Detaylı astroloji raporun aşağıdadır:"
-    else:
-        if report_type == "solar":
-            title = "MystAI Solar Return Astrology Report"
-            sub = "Your annual solar return chart interpreted for themes and lessons."
-        elif report_type == "transits":
-            title = "MystAI Transit Astrology Report"
-            sub = "Current planetary movements interpreted against your natal chart."
-        else:
-            title = "MystAI Natal Astrology Report"
-            sub = "Your natal chart interpreted for personality, relationships and destiny."
-
-        intro = "Your detailed astrology report is below:"
+    title, sub, intro_heading = _titles(lang, report_type, tarot)
 
     pdf.set_font("DejaVu", "B", 17)
     pdf.set_text_color(30, 32, 60)
@@ -101,51 +178,100 @@ def generate_pdf_file(
     pdf.multi_cell(0, 6, sub)
     pdf.ln(6)
 
-    meta = []
+    meta_lines = []
     if birth_date and birth_time and birth_place:
         if lang == "tr":
-            meta.append(f"Doğum: {birth_date} • {birth_time} • {birth_place}")
+            meta_lines.append(f"Doğum: {birth_date} • {birth_time} • {birth_place}")
         else:
-            meta.append(f"Birth: {birth_date} • {birth_time} • {birth_place}")
-
+            meta_lines.append(f"Birth: {birth_date} • {birth_time} • {birth_place}")
+    if solar_year and report_type == "solar":
+        if lang == "tr":
+            meta_lines.append(f"Güneş dönüşü yılı: {solar_year}")
+        else:
+            meta_lines.append(f"Solar return year: {solar_year}")
     if name:
-        meta.append(f"{'Danışan' if lang=='tr' else 'Client'}: {name}")
+        if lang == "tr":
+            meta_lines.append(f"Danışan: {name}")
+        else:
+            meta_lines.append(f"Client: {name}")
 
-    if meta:
+    if meta_lines:
         pdf.set_font("DejaVu", "", 9)
         pdf.set_text_color(105, 110, 140)
-        pdf.multi_cell(0, 4.5, "  •  ".join(meta))
+        pdf.multi_cell(0, 4.5, "  •  ".join(meta_lines))
         pdf.ln(5)
 
+    has_chart_page = False
     if chart_id and report_type in ("natal", "solar"):
-        chart_path = f"/tmp/{chart_id}.png"
-        if os.path.exists(chart_path):
-            img = Image.open(chart_path).convert("RGB")
-            temp_jpg = f"/tmp/{chart_id}_rgb.jpg"
-            img.save(temp_jpg, "JPEG", quality=95)
+        chart_file = os.path.join(chart_dir, f"{chart_id}.png")
+        chart_svg = os.path.join(chart_dir, f"{chart_id}.svg")
+        if os.path.exists(chart_file) or os.path.exists(chart_svg):
+            try:
+                if chart_format == "svg" and os.path.exists(chart_svg):
+                    # Vektörel harita: her zoom seviyesinde net
+                    chart_image = chart_svg
+                else:
+                    # Baskı varyantı JPEG olarak bir kez üretilir, sonraki PDF'lerde cache'ten gelir
+                    chart_image, _ = get_chart_variant(chart_id, size="print", fmt="jpg", chart_dir=chart_dir)
+                    if chart_image is None:
+                        # Yalnızca SVG varsa (PNG silinmiş / üretilmemiş) vektörel haritaya düş
+                        chart_image = chart_svg
+
+                img_width = 140
+                x = (210 - img_width) / 2
+                y = pdf.get_y() + 2
 
-            img_width = 140
+                pdf.image(chart_image, x=x, y=y, w=img_width)
+                has_chart_page = True
+            except Exception as e:
+                print("PDF image error:", e)
+
+    if tarot:
+        try:
+            spread_image, _ = render_spread(tarot, "jpg")
+            with Image.open(spread_image) as im:
+                ratio = im.height / im.width
+            # Dikey açılımlar (Kelt haçı) sayfaya sığsın diye yüksekliğe göre sınırlanır
+            img_width = min(170, 175 / ratio)
             x = (210 - img_width) / 2
-            y = pdf.get_y() + 4
+            pdf.image(spread_image, x=x, y=pdf.get_y() + 2, w=img_width)
+            pdf.set_y(pdf.get_y() + 2 + img_width * ratio + 6)
 
-            pdf.image(temp_jpg, x=x, y=y, w=img_width)
-            pdf.add_page()
+            pdf.set_font("DejaVu", "", 10)
+            pdf.set_text_color(60, 62, 95)
+            for i, card in enumerate(tarot["cards"], 1):
+                if lang == "tr":
+                    state = " (ters)" if card["reversed"] else ""
+                    line = f"{i}. {card['position_tr']}: {card['tr']}{state}"
+                else:
+                    state = " (reversed)" if card["reversed"] else ""
+                    line = f"{i}. {card['position_en']}: {card['en']}{state}"
+                pdf.multi_cell(0, 5, line)
+                pdf.ln(0.5)
+            has_chart_page = True
+        except Exception as e:
+            print("PDF tarot image error:", e)
+
+    if has_chart_page:
+        pdf.add_page()
 
-    pdf.set_font("DejaVu", "B", 13)
     pdf.set_text_color(35, 35, 55)
-    pdf.multi_cell(0, 7, intro)
+    pdf.set_font("DejaVu", "B", 13)
+    pdf.multi_cell(0, 7, intro_heading)
     pdf.ln(3)
 
     pdf.set_font("DejaVu", "", 11)
     pdf.set_text_color(25, 25, 40)
 
-    for line in text.split("\n"):
-        line = line.strip()
+    for raw_line in text.split("\n"):
+        line = raw_line.strip()
         if not line:
             pdf.ln(2)
             continue
         pdf.multi_cell(0, 5.5, line)
         pdf.ln(0.5)
 
-    pdf.output(pdf_path)
+    observe_stage("pdf_layout", time.perf_counter() - layout_t0)
+    with span("pdf_output"):
+        pdf.output(pdf_path)
     return pdf_path
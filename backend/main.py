@@ -2,38 +2,116 @@
 # MystAI - Full Premium Backend (Commercial Ready)
 # --------------------------------------------
 # Özellikler:
-# - /predict           : Normal fal / sohbet + TTS (OpenAI TTS PRO)
+# - /predict           : Normal fal / sohbet + TTS (OpenAI TTS PRO; opsiyonel "tarot" açılım verisi)
+# - /tarot/draw        : Seed'li tarot çekimi + kart görsel URL'leri (LLM'siz)
+# - /tarot/manifest    : Kart WebP varyantları + sprite haritası
+# - /tarot/assets/<ad> : Hash'li kart görselleri (immutable cache)
+# - /tarot/spread/...  : Açılım kompozit görseli (çekim başına cache'li)
 # - /astrology-premium : Natal (uzun rapor + gerçek doğum haritası PNG)
-# - /solar-return      : Solar return raporu + solar harita PNG
-# - /transits          : Transit odaklı uzun rapor (haritasız)
-# - /generate_pdf      : Profesyonel PDF (logo + kapak + harita + uzun rapor)
+# - /solar-return      : Solar return raporu + solar harita PNG (tam dönüş anı)
+# - /lunar-return      : Lunar return anları + haritaları (LLM'siz, JSON)
+# - /rectification     : Hayat olaylarına göre doğum saati rektifikasyonu (LLM'siz, JSON)
+# - /transits          : Transit odaklı uzun rapor (haritasız; yaklaşan gök olayları ile)
+# - /daily-horoscope   : Günlük burç yorumu (önceden üretilmiş, LLM beklemesiz)
+# - /calendar          : Gezegen takvimi (burç geçişleri, duruşlar, lunasyonlar, tutulmalar)
+# - /chart-data        : LLM'siz harita verisi (JSON, tekil veya toplu;
+#                       birth_time yok/"unknown" → öğlen haritası + gün profili;
+#                       opsiyonel "fixed_stars" ve "asteroids")
+# - /synastry          : İki (veya N) kişi için sinastri + kompozit harita (LLM'siz)
+# - /relocation        : Astrokartografi çizgileri + seçilen şehir için relocated harita
+# - /progressions      : Progresyon / solar arc zaman çizelgesi (NDJSON akışı)
+# - /generate_pdf      : Profesyonel PDF (logo + kapak + harita / tarot açılımı + uzun rapor)
 # - /audio/<id>        : TTS dosyası
-# - /chart/<id>        : Harita PNG dosyası
+# - /chart/<id>        : Harita görseli (?size=thumb|web|print, ?format=png|webp|avif|jpg|auto, ?w=px)
+# - /chart/<id>.svg    : Harita SVG (vektörel, matplotlib'siz)
+# - /metrics           : Prometheus metinleri (süre histogramları, cache, token, kuyruklar)
+# - /debug/profiles    : Profillenen isteklerin flame graph yığınları (X-Profile admin başlığı)
 #
 # Notlar:
 # - Haritalar Swiss Ephemeris + gerçek timezone ile hesaplanır (Astro.com uyumlu).
-# - Ev sistemi: chart_generator içindeki sisteme göre (Placidus).
+# - Doğum saati bilinmiyorsa (/astrology-premium, /chart-data) öğlen haritası
+#   ile birlikte gün içi burç değişimleri ve ASC aralıkları verilir (unknown_time).
+# - Ev sistemi: varsayılan Placidus; istekte "house_system" ile değiştirilebilir
+#   (astro_core.HOUSE_SYSTEMS).
 # - PDF: DejaVuSans.ttf ile tam Unicode (TR/EN) desteği.
+# - Admission control (admission.py): rapor ve hesaplama uç noktaları ayrı
+#   eşzamanlılık + kuyruk sınırlarıyla çalışır; dolunca hızlı 503/429 döner,
+#   hafif uç noktalar (/ping, /chart/<id>, asset'ler) etkilenmez.
+# - OpenAI çağrıları upstream.py üzerinden: istek deadline'ı, jitter'lı retry,
+#   opsiyonel hedge ve circuit breaker (upstream kapalıysa hızlı 503 + Retry-After).
+# - Harita PNG çizimi ve PDF dizgisi ısıtılmış bir süreç havuzunda koşar
+#   (render_pool.py): GIL'i tutan render'lar diğer istekleri bekletmez.
+# - Yük testi: benchmarks/loadtest.py uygulamayı OPENAI_BASE_URL / NOMINATIM_URL
+#   ile yerel taklitlere (fake_upstream.py) bağlayıp karışık trafik sürer.
 # ============================================
 
 import os
 import sys
+import json
 import uuid
+import time
+import threading
 import traceback
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-from openai import OpenAI
+from werkzeug.middleware.proxy_fix import ProxyFix
 from langdetect import detect
-from fpdf import FPDF
 from geopy.geocoders import Nominatim
 from timezonefinder import TimezoneFinder
-from PIL import Image
 
 # chart_generator.py aynı klasörde
 sys.path.append(os.path.dirname(__file__))
-from chart_generator import generate_natal_chart  # Swiss Ephemeris tabanlı
+from astro_core import (
+    DEFAULT_HOUSE_SYSTEM,
+    HOUSE_SYSTEMS,
+    PLANET_NAMES,
+    SIGN_META,
+    ChartRecord,
+    compute_synastry,
+    describe_chart,
+)
+from admission import ADMISSION_ENABLED, Admission, Rejected, retry_after_header
+from asteroids import ASTEROID_NAMES, asteroid_positions
+from chart_cache import chart_cache, get_chart_record
+from daily_horoscope import DailyScheduler, generation_days, get_llm, parse_sign, store as daily_store
+from fixed_stars import FIXED_STAR_MAX_MAG, FIXED_STAR_ORB, star_contacts
+from generate_pdf import generate_pdf_file
+from metrics import (
+    METRICS_ENABLED,
+    bind_endpoint,
+    cache_hit,
+    cache_miss,
+    gauge_add,
+    inc,
+    lru_collector,
+    observe,
+    register_collector,
+    render as render_metrics,
+    span,
+    timed,
+    unbind_endpoint,
+)
+from planet_calendar import EVENT_KINDS, CalendarNotReady, get_calendar, start_refresher as start_calendar_refresher
+from profiler import profiler
+from progressions import aspect_events, date_to_jd, progressed_positions, progression_slice
+from prompts import MAX_USER_TEXT_TOKENS, READING_TYPES, assemble, clip_text, record_usage, static_prefix, usage_snapshot
+from relocation import angular_planets, instant_state, planet_lines, relocated_chart
+from render_pool import RenderError, in_worker, render_pool
+from rectification import rectify
+from tarot import SPREADS, asset_path, build_tarot_context, draw as tarot_draw, get_manifest, resolve_draw
+from tarot_render import COMPOSITE_FORMATS, draw_from_token, preload_card_bitmaps, render_spread, spread_token
+from returns import jd_to_local, next_returns, return_charts, solar_return_jd
+from unknown_time import NOON, day_profile, stable_planets
+from upstream import Upstream, UpstreamError, clear_deadline, make_client, remaining, set_deadline
+from chart_generator import (  # Swiss Ephemeris tabanlı
+    generate_natal_chart,
+    get_chart_variant,
+    supported_chart_formats,
+)
 
 # -----------------------------
 # Flask & CORS
@@ -41,6 +119,14 @@ from chart_generator import generate_natal_chart  # Swiss Ephemeris tabanlı
 app = Flask(__name__)
 CORS(app)
 
+# Önümüzdeki güvenilir proxy sayısı (Render: 1). X-Forwarded-For'un sağdan
+# bu kadar hop'u proxy'lerce yazılır; request.remote_addr gerçek istemci
+# adresi olur. Soldaki hop'lar istemcinin kendi yazdığı başlıktır, güvenilmez.
+# Uygulamaya doğrudan erişiliyorsa 0 olmalı.
+TRUSTED_PROXIES = int(os.environ.get("TRUSTED_PROXIES", "1"))
+if TRUSTED_PROXIES > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
 # -----------------------------
 # OpenAI Client
 # -----------------------------
@@ -48,26 +134,42 @@ OPENAI_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_KEY:
     raise Exception("OPENAI_API_KEY bulunamadı!")
 
-client = OpenAI(api_key=OPENAI_KEY)
+# Havuzlu istemci + retry / hedge / circuit breaker katmanı (upstream.py);
+# OPENAI_BASE_URL ile yerel taklide (fake_upstream.py) yönlendirilebilir
+client = make_client(OPENAI_KEY)
+llm = Upstream(client)
 
-# -----------------------------
-# Yol sabitleri (logo, font)
-# -----------------------------
-BACKEND_DIR = os.path.dirname(__file__)
-ROOT_DIR = os.path.abspath(os.path.join(BACKEND_DIR, ".."))
+# İstek başına toplam süre; istemci X-Request-Timeout (sn) ile kısaltabilir.
+# Upstream denemeleri kalan süreyi aşmaz, süre bitince 504 döner.
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", "120"))
+
+# Günlük burç yorumları: DAILY_PREGEN=1 ise bu süreç her gün 24 metni
+# önceden üretir (çok worker'lı kurulumda tek bir süreçte açılmalı)
+daily_scheduler = DailyScheduler(get_llm(llm))
+if os.environ.get("DAILY_PREGEN", "").lower() in ("1", "true", "yes") and not in_worker():
+    daily_scheduler.start()
 
-FONT_PATH_TTF = os.path.join(BACKEND_DIR, "fonts", "DejaVuSans.ttf")
-LOGO_PATH = os.path.join(ROOT_DIR, "images", "mystai-logo.png")
+# Harita çizimi ve PDF dizgisi için ısıtılmış süreç havuzu (render_pool.py).
+# Worker'lar şimdi açılır; spawn edilen worker'ın kendisi havuz açmaz.
+render_pool.start()
 
 # -----------------------------
 # Geocoder (doğum yeri → lat/lon)
 # -----------------------------
-geolocator = Nominatim(user_agent="mystai-astrology")
+# NOMINATIM_URL ile kendi Nominatim kurulumuna veya yük testinde yerel
+# taklide (fake_upstream.py) yönlendirilebilir
+_nominatim = urlsplit(os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org"))
+geolocator = Nominatim(
+    user_agent="mystai-astrology",
+    domain=_nominatim.netloc + _nominatim.path.rstrip("/"),
+    scheme=_nominatim.scheme or "https",
+)
 
 # TimezoneFinder instance
 tf = TimezoneFinder()
 
 
+@timed("geocode")
 def geocode_place(place: str):
     """Şehir/ülke bilgisinden enlem-boylam bulur. Hata olursa (0,0) döner."""
     try:
@@ -79,6 +181,7 @@ def geocode_place(place: str):
     return 0.0, 0.0
 
 
+@timed("timezone")
 def get_timezone_from_latlon(lat: float, lon: float) -> str:
     """
     Enlem-boylamdan IANA timezone ismini bulur.
@@ -97,105 +200,18 @@ def get_timezone_from_latlon(lat: float, lon: float) -> str:
         return "UTC"
 
 
-# -----------------------------
-# SYSTEM PROMPT
-# -----------------------------
-def build_system_prompt(kind: str, lang: str) -> str:
+def resolve_timezone(value, lat: float, lon: float) -> str:
     """
-    kind: "general" | "astrology" | "solar_return" | "transit"
+    İstemcinin verdiği IANA timezone'u doğrular; verilmemişse koordinattan bulur.
+    Geçersiz değer ValueError (→ 400) olur.
     """
-    if lang == "tr":
-        # ==== TÜRKÇE SİSTEM PROMPTLARI ====
-        base_general = (
-            "Sen MystAI adında mistik, profesyonel ve çok içten bir fal ve enerji yorumcusun. "
-            "Kahve falı, tarot, el falı, enerji ve rüya yorumları yaparsın. "
-            "Kullanıcıya derin, pozitif, gerçekçi ve güçlendirici bir dille hitap edersin. "
-            "Onu gerçekten dinleyen bir insan gibi, sıcak ve samimi konuşursun. "
-            "Gerektiğinde psikolojik içgörüler verirsin ama asla yargılayıcı olmazsın. "
-            "Korkutucu, tehditkâr, lanet gibi görülebilecek veya kesin kaderci cümleler kullanmazsın; "
-            "her zaman özgür iradeyi, kişinin seçimlerini ve iç gücünü vurgularsın. "
-            "Cevaplarını paragraflara böl, hikâye anlatır gibi akıcı yaz. "
-            "Özellikle girişte enerjiyi ve şu anki durumu anlat, ortada duyguları ve süreci derinleştir, "
-            "sonda ise net, umut veren tavsiyeler ve yakın geleceğe dair olasılıkları paylaş. "
-        )
-
-        base_astro = (
-            "Sen MystAI adında mistik, profesyonel ve destekleyici bir astroloji yorumcusun. "
-            "Kullanıcıya derin, pozitif, gerçekçi ve güçlendirici bir dille açıklama yaparsın. "
-            "Korkutucu, tehditkâr, kesin kaderci ifadeler kullanmazsın; özgür iradeyi ve bilinçli seçimleri vurgularsın. "
-        )
-
-        mapping = {
-            "general": (
-                base_general
-                + "Genel enerji, sezgi ve rehberlik sun. Fal, enerji ve sembolik dil kullanabilirsin; "
-                  "kullanıcının aşk, ilişkiler, kariyer, para ve kişisel dönüşüm alanlarına dokunan, "
-                  "kalbine işleyen bir yorum yap."
-            ),
-            "astrology": (
-                base_astro
-                + "Teknik astroloji bilgin çok yüksek. Doğum haritasını gezegenler, burçlar, evler ve açılar üzerinden "
-                  "profesyonel şekilde yorumla. Güneş, Ay, ASC, MC, kişisel ve dışsal gezegenleri ayrı ayrı ele al. "
-                  "Metni mutlaka başlıklar ve paragraflarla düzenli yaz."
-            ),
-            "solar_return": (
-                base_astro
-                + "Solar return (güneş dönüşü) haritasını yıllık tema olarak yorumla. "
-                  "Bu yılın ana derslerini ve fırsatlarını; aşk, kariyer, para, ruhsal gelişim ve kişisel dönüşüm "
-                  "başlıkları altında detaylıca açıkla."
-            ),
-            "transit": (
-                base_astro
-                + "Güncel transit gezegenlerin danışanın doğum haritası üzerindeki etkilerini yorumla. "
-                  "Özellikle Satürn, Uranüs, Neptün, Plüton transitlerinin önemli süreçlerini, aynı zamanda Jüpiter ve Mars "
-                  "gibi daha hızlı gezegenlerin etkilerini de ele al. Somut öneriler ver."
-            ),
-        }
-    else:
-        # ==== ENGLISH SYSTEM PROMPT ====
-        base_general = (
-            "You are MystAI, a mystical, professional and very warm fortune & energy reader. "
-            "You read coffee cups, tarot, palm, energy and dreams. "
-            "You speak in a deep, comforting, realistic and empowering tone, like a close friend who truly listens. "
-            "You may offer psychological insight, but you are never judgmental. "
-            "You avoid fear-based, threatening or fatalistic language; instead you highlight free will, choice and inner strength. "
-            "Write in clear paragraphs, like telling a flowing story. "
-            "Begin with the current energy, then explore emotions and the situation in depth, "
-            "and finally give hopeful, practical advice and possibilities for the near future. "
-        )
-
-        base_astro = (
-            "You are MystAI, a mystical, professional and supportive astrologer. "
-            "You speak in a deep, empowering and realistic tone. "
-            "You avoid fear-based or fatalistic language and always emphasise free will and conscious choices. "
-        )
-
-        mapping = {
-            "general": (
-                base_general
-                + "Offer intuitive guidance and symbolic insight. "
-                  "Touch on love, relationships, career, money and personal transformation in a heartfelt, inspiring way."
-            ),
-            "astrology": (
-                base_astro
-                + "You are highly skilled in technical astrology. Interpret the natal chart using planets, signs, houses "
-                  "and aspects in a professional way. Highlight Sun, Moon, ASC, MC, personal and outer planets. "
-                  "Organise the text with headings and clear paragraphs."
-            ),
-            "solar_return": (
-                base_astro
-                + "Interpret the solar return chart as the main theme for the year ahead. "
-                  "Describe love, career, money, spiritual growth and personal transformation as yearly topics."
-            ),
-            "transit": (
-                base_astro
-                + "Explain how the current planetary transits affect the natal chart. "
-                  "Pay special attention to Saturn, Uranus, Neptune, and Pluto processes, as well as Jupiter and Mars. "
-                  "Give concrete, practical advice."
-            ),
-        }
-
-    return mapping.get(kind, mapping["general"])
+    if not value:
+        return get_timezone_from_latlon(lat, lon)
+    try:
+        ZoneInfo(value)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        raise ValueError(f"Geçersiz timezone: {value}")
+    return value
 
 
 def degree_to_sign(deg: float) -> str:
@@ -212,11 +228,8 @@ def degree_to_sign(deg: float) -> str:
     return signs[index]
 
 
-def build_chart_summary(chart_meta: dict, lang: str) -> str:
-    """AI'ya gönderilecek gerçek harita özetini üretir."""
-    if not chart_meta:
-        return ""
-
+def _summary_rows_from_dict(chart_meta: dict):
+    """Sözlük biçimli chart_meta → (asc_sign, asc_deg, mc_sign, mc_deg, gezegen satırları)."""
     planets = chart_meta.get("planets", [])
 
     # --- ASC & MC: dict veya float gelebilir ---
@@ -267,9 +280,32 @@ def build_chart_summary(chart_meta: dict, lang: str) -> str:
                 "name": p_name,
                 "degree": degree_val,
                 "sign": p_sign,
+                "house": p.get("house"),
             }
         )
 
+    return asc_sign, asc_deg, mc_sign, mc_deg, fixed
+
+
+def build_chart_summary(chart_meta, lang: str) -> str:
+    """
+    AI'ya gönderilecek gerçek harita özetini üretir.
+    chart_meta: compute_birth_chart sözlüğü ya da astro_core.ChartRecord
+    """
+    if not chart_meta:
+        return ""
+
+    if isinstance(chart_meta, ChartRecord):
+        # Kompakt kayıt: şema sabit, dizilerden doğrudan okunur
+        asc_sign, asc_deg = degree_to_sign(chart_meta.asc), chart_meta.asc
+        mc_sign, mc_deg = degree_to_sign(chart_meta.mc), chart_meta.mc
+        fixed = [
+            {"name": name, "degree": lon, "sign": degree_to_sign(lon), "house": house}
+            for name, lon, house in chart_meta.placements()
+        ]
+    else:
+        asc_sign, asc_deg, mc_sign, mc_deg, fixed = _summary_rows_from_dict(chart_meta)
+
     lines = []
 
     if lang == "tr":
@@ -281,8 +317,9 @@ def build_chart_summary(chart_meta: dict, lang: str) -> str:
 
         for p in fixed:
             if p["sign"]:
+                house_txt = f" — {p['house']}. ev" if p["house"] else ""
                 lines.append(
-                    f"• {p['name']}: {p['sign']} ({p['degree']:.2f}°)"
+                    f"• {p['name']}: {p['sign']} ({p['degree']:.2f}°){house_txt}"
                 )
     else:
         en_signs = {
@@ -313,13 +350,309 @@ def build_chart_summary(chart_meta: dict, lang: str) -> str:
         for p in fixed:
             if p["sign"]:
                 en_name = en_signs.get(p["sign"], p["sign"])
+                house_txt = f" — house {p['house']}" if p["house"] else ""
                 lines.append(
-                    f"• {p['name']}: {en_name} ({p['degree']:.2f}°)"
+                    f"• {p['name']}: {en_name} ({p['degree']:.2f}°){house_txt}"
                 )
 
     return "\n".join(lines)
 
 
+UNKNOWN_BIRTH_TIME = "unknown"
+
+
+def _birth_time_unknown(birth_time) -> bool:
+    return not birth_time or str(birth_time).strip().lower() in (UNKNOWN_BIRTH_TIME, "bilinmiyor")
+
+
+def build_unknown_time_summary(record: ChartRecord, profile: dict, lang: str) -> str:
+    """
+    Doğum saati bilinmediğinde AI'ya gönderilecek özet: öğlen haritasındaki
+    gezegenler, gün içinde burç değiştirenler ve ASC burç aralıkları.
+    Evler ve açılar bilinçli olarak verilmez.
+    """
+    en = {m["tr"]: m["en"] for m in SIGN_META}
+    stable = set(stable_planets(profile))
+    changes = {c["planet"]: c for c in profile["sign_changes"]}
+    lines = []
+
+    if lang == "tr":
+        lines.append(
+            "Doğum saati bilinmiyor. Gezegenler öğlen (12:00) haritasına göredir; "
+            "Yükselen, MC ve evler kesin değildir, bunları olasılık olarak anlat."
+        )
+        for name, lon, _ in record.placements():
+            if name in stable:
+                lines.append(f"• {name}: {degree_to_sign(lon)} ({lon:.2f}°) — gün boyunca sabit")
+            else:
+                c = changes[name]
+                lines.append(f"• {name}: {c['from']} → {c['to']} (saat {c['time']}'de burç değiştiriyor)")
+        lines.append("Yükselen burç saat aralıkları:")
+        for iv in profile["asc_intervals"]:
+            lines.append(f"• {iv['start']}–{iv['end']}: {iv['sign']}")
+    else:
+        lines.append(
+            "Birth time is unknown. Planets are taken from the noon (12:00) chart; "
+            "the Ascendant, MC and houses are uncertain, so present them as possibilities."
+        )
+        for name, lon, _ in record.placements():
+            if name in stable:
+                lines.append(f"• {name}: {en[degree_to_sign(lon)]} ({lon:.2f}°) — same sign all day")
+            else:
+                c = changes[name]
+                lines.append(f"• {name}: {en[c['from']]} → {en[c['to']]} (changes sign at {c['time']})")
+        lines.append("Ascendant sign by time of birth:")
+        for iv in profile["asc_intervals"]:
+            lines.append(f"• {iv['start']}–{iv['end']}: {en[iv['sign']]}")
+
+    return "\n".join(lines)
+
+
+# Transit raporuna eklenen yaklaşan olaylar (gün); Ay burç geçişleri hariç
+TRANSIT_CALENDAR_DAYS = 90
+
+# Takvim dosyası arka planda hazırlanır ve kapsamı bu pencereyi
+# karşılamadığında yeniden hesaplanır (planet_calendar.py)
+if not in_worker():
+    start_calendar_refresher(TRANSIT_CALENDAR_DAYS)
+_CALENDAR_LABELS = {
+    "tr": {
+        "ingress": "{body} {sign} burcuna geçiyor",
+        "station_retrograde": "{body} {sign} burcunda retro başlıyor",
+        "station_direct": "{body} {sign} burcunda düz harekete geçiyor",
+        "new_moon": "Yeni Ay ({sign})",
+        "full_moon": "Dolunay ({sign})",
+        "solar_eclipse": "Güneş tutulması ({sign})",
+        "lunar_eclipse": "Ay tutulması ({sign})",
+    },
+    "en": {
+        "ingress": "{body} enters {sign}",
+        "station_retrograde": "{body} stations retrograde in {sign}",
+        "station_direct": "{body} stations direct in {sign}",
+        "new_moon": "New Moon in {sign}",
+        "full_moon": "Full Moon in {sign}",
+        "solar_eclipse": "Solar eclipse in {sign}",
+        "lunar_eclipse": "Lunar eclipse in {sign}",
+    },
+}
+
+
+def build_calendar_summary(start_jd: float, days: int, lang: str) -> str:
+    """Önümüzdeki günlerin gök olayları (takvim dosyasından, LLM'e tek satırlık maddeler)."""
+    en = {m["tr"]: m["en"] for m in SIGN_META}
+    labels = _CALENDAR_LABELS.get(lang, _CALENDAR_LABELS["en"])
+    lines = []
+    for ev in get_calendar().query(start_jd, start_jd + days):
+        if ev["kind"] == "ingress" and ev["body"] == "Moon":
+            continue
+        sign = ev["sign"] if lang == "tr" else en[ev["sign"]]
+        lines.append(f"• {ev['utc'][:10]}: " + labels[ev["kind"]].format(body=ev["body"], sign=sign))
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Ölçüm (metrics.py) — ilk hook, böylece kuyruk bekleme ve redler de sayılır
+# -----------------------------
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+
+@app.before_request
+def _start_metrics():
+    if not METRICS_ENABLED:
+        return
+    endpoint = request.endpoint or "unmatched"
+    env = request.environ
+    env["mystai.metrics"] = (bind_endpoint(endpoint), endpoint, time.perf_counter())
+    gauge_add("mystai_requests_in_flight", 1, endpoint=endpoint)
+
+
+@app.after_request
+def _record_status(response):
+    request.environ["mystai.status"] = response.status_code
+    return response
+
+
+@app.teardown_request
+def _finish_metrics(exc=None):
+    started = request.environ.pop("mystai.metrics", None)
+    if started is None:
+        return
+    token, endpoint, t0 = started
+    status = request.environ.get("mystai.status", 500)
+    observe("mystai_request_seconds", time.perf_counter() - t0, endpoint=endpoint)
+    inc("mystai_requests_total", endpoint=endpoint, status=status)
+    gauge_add("mystai_requests_in_flight", -1, endpoint=endpoint)
+    unbind_endpoint(token)
+
+
+# -----------------------------
+# İstek deadline'ı (upstream çağrıları için)
+# -----------------------------
+@app.before_request
+def _start_deadline():
+    # X-Request-Timeout yalnızca kısaltabilir; ≤ 0 / sayı olmayan değer yok sayılır
+    # (set_deadline(0) "deadline yok" demektir)
+    budget = REQUEST_DEADLINE
+    try:
+        requested = float(request.headers.get("X-Request-Timeout", budget))
+    except ValueError:
+        requested = budget
+    if requested > 0:
+        budget = min(budget, requested)
+    request.environ["mystai.deadline"] = set_deadline(budget)
+
+
+@app.teardown_request
+def _clear_deadline(exc=None):
+    token = request.environ.pop("mystai.deadline", None)
+    if token is not None:
+        clear_deadline(token)
+
+
+def _retry_later(message: str, status: int, retry_after=None):
+    """Geçici red (429/502/503/504) + Retry-After; istemci tekrar deneyebilir."""
+    resp = jsonify({"error": message, "retryable": True})
+    resp.status_code = status
+    if retry_after:
+        resp.headers["Retry-After"] = retry_after_header(retry_after)
+    return resp
+
+
+def _upstream_error(e: UpstreamError):
+    return _retry_later(str(e), e.status, e.retry_after)
+
+
+def _render_error(e: RenderError):
+    return _retry_later(str(e), e.status, e.retry_after)
+
+
+# -----------------------------
+# Admission control (admission.py)
+# -----------------------------
+admission = Admission()
+
+
+def _client_key() -> str:
+    # ProxyFix (TRUSTED_PROXIES) sonrası remote_addr; ham X-Forwarded-For
+    # istemci kontrolündedir ve anahtar olarak kullanılmaz
+    return request.remote_addr or "-"
+
+
+@app.before_request
+def _admit():
+    if not ADMISSION_ENABLED or request.method == "OPTIONS":
+        return None
+    try:
+        ticket = admission.admit(request.endpoint, _client_key(), max_wait=remaining())
+    except Rejected as e:
+        return _retry_later(str(e), e.status, e.retry_after)
+    if ticket:
+        request.environ["mystai.admission"] = ticket
+    return None
+
+
+@app.teardown_request
+def _release_admission(exc=None):
+    ticket = request.environ.pop("mystai.admission", None)
+    if ticket:
+        admission.release(ticket)
+
+
+# -----------------------------
+# Profilleme (profiler.py) — yalnızca kabul edilen istekler, oranla veya
+# "X-Profile: <PROFILE_ADMIN_TOKEN>" başlığıyla
+# -----------------------------
+@app.before_request
+def _start_profile():
+    if not profiler.enabled or (request.endpoint or "").startswith("debug_"):
+        return
+    session = profiler.start(request.endpoint, request.headers.get("X-Profile"))
+    if session:
+        request.environ["mystai.profile"] = session
+
+
+@app.after_request
+def _profile_header(response):
+    session = request.environ.get("mystai.profile")
+    if session:
+        response.headers["X-Profile-Id"] = session.id
+    return response
+
+
+@app.teardown_request
+def _stop_profile(exc=None):
+    session = request.environ.pop("mystai.profile", None)
+    if session:
+        try:
+            profiler.stop(session)
+        except Exception:
+            traceback.print_exc()
+
+
+# -----------------------------
+# Metrics toplayıcıları (scrape anında okunur)
+# -----------------------------
+@register_collector
+def _collect_chart_cache():
+    return [
+        ("mystai_cache_hits_total", "counter", None, {"cache": "chart"}, chart_cache.hits),
+        ("mystai_cache_misses_total", "counter", None, {"cache": "chart"}, chart_cache.misses),
+    ]
+
+
+lru_collector("prompt_prefix", static_prefix)
+lru_collector("progression_slice", progression_slice)
+
+
+@register_collector
+def _collect_llm_usage():
+    rows = []
+    for endpoint, totals in usage_snapshot().items():
+        rows.append(("mystai_llm_requests_total", "counter", "LLM çağrıları (uç nokta)",
+                     {"endpoint": endpoint}, totals["requests"]))
+        rows.append(("mystai_llm_prompt_truncations_total", "counter", "Bütçeye sığdırılan prompt'lar",
+                     {"endpoint": endpoint}, totals["truncated"]))
+        for kind in ("prompt_tokens", "cached_tokens", "completion_tokens", "estimated_input_tokens"):
+            rows.append(("mystai_llm_tokens_total", "counter", "Upstream token sayıları",
+                         {"endpoint": endpoint, "kind": kind}, totals[kind]))
+    return rows
+
+
+@register_collector
+def _collect_upstream():
+    rows = []
+    for op, stats in llm.stats().items():
+        for key in ("calls", "failures", "retries", "hedges", "hedge_wins", "rejected"):
+            rows.append((f"mystai_upstream_{key}_total", "counter", None, {"op": op}, stats[key]))
+        rows.append(("mystai_upstream_breaker_open", "gauge", "Circuit breaker açık mı (1/0)",
+                     {"op": op}, int(stats["breaker"] != "closed")))
+    return rows
+
+
+@register_collector
+def _collect_admission():
+    rows = []
+    for cls, stats in admission.stats().items():
+        rows.append(("mystai_admission_active", "gauge", "Sınıfta çalışan istekler", {"class": cls}, stats["active"]))
+        rows.append(("mystai_admission_waiting", "gauge", "Sınıf kuyruğunda bekleyenler", {"class": cls}, stats["waiting"]))
+        for key in ("admitted", "rejected", "timeouts", "rate_limited"):
+            rows.append((f"mystai_admission_{key}_total", "counter", None, {"class": cls}, stats[key]))
+    return rows
+
+
+@register_collector
+def _collect_render_pool():
+    stats = render_pool.stats()
+    rows = [
+        ("mystai_render_workers", "gauge", "Render havuzu süreç sayısı (0 = süreç içi)", {}, stats["workers"]),
+        ("mystai_render_in_flight", "gauge", "Render havuzunda çalışan + bekleyen işler", {}, stats["in_flight"]),
+        ("mystai_render_capacity", "gauge", "Render havuzu iş sınırı (worker + kuyruk)", {}, stats["capacity"]),
+    ]
+    for key in ("submitted", "completed", "failed", "rejected", "timeouts", "restarts"):
+        rows.append((f"mystai_render_{key}_total", "counter", None, {}, stats[key]))
+    return rows
+
+
 # -----------------------------
 # HEALTH CHECK
 # -----------------------------
@@ -333,6 +666,50 @@ def ping():
     return jsonify({"status": "ok"})
 
 
+def _profile_admin() -> bool:
+    return profiler.is_admin(request.headers.get("X-Profile"))
+
+
+@app.route("/debug/profiles")
+def debug_profiles():
+    """Profil özeti (admin). PROFILE_ADMIN_TOKEN yoksa uç nokta yok sayılır."""
+    if not _profile_admin():
+        return jsonify({"error": "Bulunamadı"}), 404
+    return jsonify(profiler.summary())
+
+
+@app.route("/debug/profiles/<endpoint>.collapsed")
+def debug_profile_aggregate(endpoint):
+    """Endpoint başına birikmiş yığınlar (flamegraph.pl / speedscope girdisi)."""
+    if not _profile_admin():
+        return jsonify({"error": "Bulunamadı"}), 404
+    text = profiler.aggregate_text(endpoint)
+    if text is None:
+        return jsonify({"error": "Bu endpoint için profil yok"}), 404
+    return Response(text, mimetype="text/plain")
+
+
+@app.route("/debug/profiles/req/<profile_id>")
+def debug_profile_request(profile_id):
+    """Tek isteğin profili (X-Profile-Id); .collapsed veya .pstats."""
+    if not _profile_admin():
+        return jsonify({"error": "Bulunamadı"}), 404
+    path = profiler.request_file(profile_id)
+    if not path:
+        return jsonify({"error": "Profil bulunamadı"}), 404
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus metin formatı; METRICS_TOKEN tanımlıysa Bearer token ister."""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"error": "Yetkisiz"}), 401
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics kapalı (METRICS=0)"}), 404
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 # =====================================================
 #  /predict (fal + sohbet + OpenAI TTS PRO)
 # =====================================================
@@ -349,123 +726,43 @@ def predict():
         if not user_input:
             return jsonify({"error": "user_input boş olamaz"}), 400
 
+        # Yapısal tarot açılımı (opsiyonel): {"spread", "seed"} veya {"spread", "cards"}
+        tarot = None
+        if data.get("tarot") is not None:
+            try:
+                tarot = resolve_draw(data["tarot"])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            reading_type = "tarot"
+
         # Dil tespiti
-        try:
-            lang = detect(user_input)
-        except Exception:
-            lang = "en"
+        lang = data.get("language")
+        if lang not in ("tr", "en"):
+            try:
+                lang = detect(user_input)
+            except Exception:
+                lang = "en"
         if lang not in ("tr", "en"):
             lang = "en"
 
-        system_prompt = build_system_prompt("general", lang)
-
-        # --- Stil ipucu: kategoriye göre hafif yönlendirme (opsiyonel) ---
-        style_hint = ""
+        # Sabit talimatlar (okuma türüne göre) system önekinde; burada sadece kullanıcı verisi
+        question = clip_text(user_input, MAX_USER_TEXT_TOKENS)
         if lang == "tr":
-            if reading_type == "coffee":
-                style_hint = (
-                    "Bu bir KAHVE FALI yorumudur. Fincan sembollerinden bahsedebilirsin; "
-                    "örneğin 'fincanında şunu görüyorum' gibi, ama abartmadan doğal kullan."
-                )
-            elif reading_type == "tarot":
-                style_hint = (
-                    "Bu bir TAROT yorumudur. Kartlar, kupalar, kılıçlar, değnekler ve büyük arkana dilini kullan."
-                )
-            elif reading_type == "palm":
-                style_hint = (
-                    "Bu bir EL FALI yorumudur. Avuç içi çizgileri, yaşam çizgisi, kalp çizgisi gibi sembolleri kullan."
-                )
-            elif reading_type in ("energy", "dream"):
-                style_hint = (
-                    "Bu bir ENERJİ / RÜYA yorumudur. Fincandan söz ETME; daha çok ruh hali, semboller ve bilinçaltı üzerinden konuş."
-                )
-            elif reading_type == "soul":
-                style_hint = (
-                    "Bu bir RUH BAĞLANTISI yorumudur. İki ruh arasındaki enerji, bağlantı, çekim ve karmik bağlardan bahset."
-                )
-            else:
-                style_hint = (
-                    "Kategori belirtilmedi, genel mistik bir fal ve enerji yorumu yap. "
-                    "Kahve, tarot gibi spesifik kelimeleri çok vurgulama, daha nötr sembolik bir dil kullan."
-                )
-
-            user_prompt = f"""
-Kullanıcının sorusu / niyeti:
-
-\"\"\"{user_input}\"\"\"
-
-{style_hint}
-
-Yukarıdaki soruya ve enerjiye göre tek parça, akıcı bir fal ve enerji yorumu yaz.
-Kahve falı, tarot, el falı, enerji ya da rüya yorumu yapıyor olabilirsin; semboller üzerinden konuşup
-kişinin ruh halini, iç dünyasını ve yakın geleceğini yorumla.
-
-Lütfen şuna dikkat et:
-- Etkileyici ve mistik bir giriş yap; enerjisini ve şu anki halini anlat.
-- Ortada, yaşadığı sürecin duygusal ve psikolojik tarafını sıcak ve anlayışlı bir dille anlat.
-- Aşk, ilişkiler, kariyer, para ve kişisel dönüşüm alanlarında görebildiğin fırsatları ve olasılıkları paylaş.
-- Yakın gelecek (önümüzdeki haftalar/aylar) için net ama korkutmayan, umut veren cümlelerle olası gelişmeleri anlat.
-- Sonda, kalbine dokunan, destekleyici bir kapanış paragrafı yaz; kişinin değerini ve iç gücünü hatırlat.
-
-Cevabı SORU-CEVAP biçiminde değil, tek bir uzun fal metni olarak yaz.
-"""
+            fields = [("Kullanıcının sorusu / niyeti", f'"""{question}"""')]
         else:
-            if reading_type == "coffee":
-                style_hint = (
-                    "This is a COFFEE READING. You may gently mention symbols in the cup, "
-                    "like “in your cup I see…”, but keep it natural, not exaggerated."
-                )
-            elif reading_type == "tarot":
-                style_hint = (
-                    "This is a TAROT reading. Use the language of tarot: suits, major arcana, spreads."
-                )
-            elif reading_type == "palm":
-                style_hint = (
-                    "This is a PALM reading. Talk about palm lines, life line, heart line, and general hand symbolism."
-                )
-            elif reading_type in ("energy", "dream"):
-                style_hint = (
-                    "This is an ENERGY / DREAM reading. Do NOT mention coffee cups; focus on feelings, symbols and the subconscious."
-                )
-            elif reading_type == "soul":
-                style_hint = (
-                    "This is a SOUL CONNECTION reading. Talk about the energetic bond, attraction, lessons and growth between two souls."
-                )
-            else:
-                style_hint = (
-                    "No specific category is given. Give a general mystical fortune & energy reading "
-                    "without overusing coffee or tarot specific words."
-                )
-
-            user_prompt = f"""
-User's question / intention:
-
-\"\"\"{user_input}\"\"\"
-
-{style_hint}
-
-Based on the question and energy above, write ONE complete, flowing fortune & energy reading.
-It may feel like a coffee, tarot, palm, energy or dream reading; use symbols and intuition
-to describe the person's emotional state, inner world and near future.
-
-Please:
-- Start with a mystical, impactful introduction describing the current energy.
-- Then explore their emotional and psychological process in a warm, understanding tone.
-- Touch on love, relationships, career, money and personal growth, sharing possible opportunities and lessons.
-- For the near future (next weeks/months), describe likely developments in a hopeful but realistic way.
-- End with a heartfelt closing paragraph that reminds them of their worth and inner strength.
-
-Do NOT answer in Q&A format; write a single, coherent fortune-style text.
-"""
+            fields = [("User's question / intention", f'"""{question}"""')]
+        blocks = [("", build_tarot_context(tarot, lang), False)] if tarot else []
+        prompt = assemble(
+            "predict", "general", lang, fields, blocks,
+            variant=reading_type if reading_type in READING_TYPES else "",
+        )
 
-        completion = client.chat.completions.create(
+        completion = llm.chat_completion(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            max_tokens=1600,
+            messages=prompt.messages,
+            max_tokens=prompt.max_tokens,
         )
+        record_usage(prompt, completion)
 
         text = completion.choices[0].message.content.strip()
 
@@ -477,21 +774,139 @@ Do NOT answer in Q&A format; write a single, coherent fortune-style text.
         audio_url = None
 
         try:
-            # OpenAI TTS – daha doğal, insan benzeri ses
-            with client.audio.speech.with_streaming_response.create(
+            # OpenAI TTS – daha doğal, insan benzeri ses (retry + circuit breaker)
+            llm.speech_to_file(
+                audio_path,
                 model="gpt-4o-mini-tts",
                 voice="alloy",  # istersen sonra voice'i değiştirebiliriz
                 input=text,
-            ) as response:
-                response.stream_to_file(audio_path)
+            )
             audio_url = f"/audio/{audio_id}"
+        except UpstreamError as e:
+            # TTS kapalı/yavaşsa fallback: sadece metin döneriz
+            print(f"TTS atlandı: {e}", file=sys.stderr)
+            audio_url = None
         except Exception as e:
             traceback.print_exc()
-            # Ses hata verirse fallback: sadece metin döneriz
             audio_url = None
 
-        return jsonify({"text": text, "audio": audio_url})
+        result = {"text": text, "audio": audio_url}
+        if tarot:
+            result["tarot"] = tarot
+            result["spread_image"] = _tarot_spread_url(tarot)
+        return jsonify(result)
 
+    except UpstreamError as e:
+        return _upstream_error(e)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  TAROT (LLM'siz çekim + kart görselleri)
+# =====================================================
+def _tarot_asset_url(name: str) -> str:
+    return f"/tarot/assets/{name}"
+
+
+def _tarot_spread_url(tarot: dict, fmt: str = "webp") -> str:
+    return f"/tarot/spread/{tarot['spread']}/{spread_token(tarot)}.{fmt}"
+
+
+def _preload_tarot():
+    try:
+        preload_card_bitmaps()
+    except Exception:
+        traceback.print_exc()
+
+
+# Kart bitmap'leri (ve gerekirse WebP varyantları) istek yolunu bekletmeden hazırlanır
+if not in_worker():
+    threading.Thread(target=_preload_tarot, name="tarot-preload", daemon=True).start()
+
+
+@app.route("/tarot/draw", methods=["POST"])
+def tarot_draw_route():
+    """
+    {"spread": "three_card" | "single" | "celtic_cross", "seed": 123, "reversals": false,
+     "variant": "web"}
+    Seed'li çekim; her kart için görsel URL'i (varsayılan "web" varyantı) ve
+    ızgara yerleşimi döner. Aynı seed /predict'e "tarot" olarak verilebilir.
+    """
+    try:
+        data = request.json or {}
+        try:
+            result = tarot_draw(data.get("spread") or "three_card", data.get("seed"), bool(data.get("reversals")))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        manifest = get_manifest()
+        variant = data.get("variant") or "web"
+        if variant not in manifest["variants"]:
+            return jsonify({"error": f"Bilinmeyen varyant: {variant}"}), 400
+
+        layout = SPREADS[result["spread"]]["layout"]
+        for card, (col, row, rotation) in zip(result["cards"], layout):
+            card["image"] = _tarot_asset_url(manifest["files"][card["key"]][variant])
+            card["layout"] = {"col": col, "row": row, "rotation": rotation}
+        result["back"] = _tarot_asset_url(manifest["files"]["back"][variant])
+        result["spread_image"] = _tarot_spread_url(result)
+        return jsonify(result)
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/tarot/manifest")
+def tarot_manifest():
+    """Kart görsel manifest'i (URL'lerle) + açılım tanımları. Kısa süreli cache."""
+    try:
+        manifest = get_manifest()
+        files = {key: {v: _tarot_asset_url(n) for v, n in variants.items()}
+                 for key, variants in manifest["files"].items()}
+        sprite = dict(manifest["sprite"], url=_tarot_asset_url(manifest["sprite"]["file"]))
+        spreads = {name: {"positions": [p[0] for p in spec["positions"]], "layout": spec["layout"]}
+                   for name, spec in SPREADS.items()}
+        resp = jsonify({"variants": manifest["variants"], "files": files, "sprite": sprite, "spreads": spreads})
+        resp.headers["Cache-Control"] = "public, max-age=300"
+        return resp
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/tarot/assets/<name>")
+def tarot_asset(name):
+    path = asset_path(name)
+    if not path:
+        return jsonify({"error": "Asset not found"}), 404
+    # Dosya adı içerik hash'i taşır: içerik değişirse ad da değişir
+    resp = send_file(path, mimetype="image/webp", max_age=31536000)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+@app.route("/tarot/spread/<spread>/<token>.<fmt>")
+def tarot_spread_image(spread, token, fmt):
+    """
+    Açılım kompoziti. token: kart indeksleri '-' ile, ters kartlar 'r' ekli
+    (ör. 0-13r-22). Aynı URL her zaman aynı görseli verir.
+    """
+    try:
+        if fmt not in COMPOSITE_FORMATS:
+            return jsonify({"error": f"Desteklenmeyen format: {fmt}"}), 400
+        try:
+            tarot = draw_from_token(spread, token)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        path, mimetype = render_spread(tarot, fmt)
+        resp = send_file(path, mimetype=mimetype, max_age=31536000)
+        resp.cache_control.public = True
+        resp.cache_control.immutable = True
+        return resp
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -516,9 +931,17 @@ def astrology_premium():
         focus = data.get("focus_areas", [])
         question = data.get("question", "")
         lang = data.get("language")
+        house_system = data.get("house_system") or DEFAULT_HOUSE_SYSTEM
 
-        if not birth_date or not birth_time or not birth_place:
+        if not birth_date or not birth_place:
             return jsonify({"error": "Eksik bilgi"}), 400
+        # /chart-data ile aynı 400; aksi halde hata aşağıda yutulur ve rapor haritasız gider
+        if house_system not in HOUSE_SYSTEMS:
+            return jsonify({"error": f"Bilinmeyen ev sistemi: {house_system}"}), 400
+
+        time_unknown = _birth_time_unknown(birth_time)
+        if time_unknown:
+            birth_time = None
 
         if not lang:
             try:
@@ -528,7 +951,6 @@ def astrology_premium():
         if lang not in ("tr", "en"):
             lang = "en"
 
-        system_prompt = build_system_prompt("astrology", lang)
         focus_str = ", ".join(focus) if focus else ("Genel" if lang == "tr" else "General")
 
         # ---- NATAL HARİTASI (GERÇEK HESAP) ----
@@ -536,81 +958,68 @@ def astrology_premium():
         chart_id = None
         chart_public_path = None
         chart_meta = None
+        profile = None
+        chart_summary = ""
 
+        timezone_str = get_timezone_from_latlon(lat, lon)
         try:
-            timezone_str = get_timezone_from_latlon(lat, lon)
-            chart_id, chart_file_path, chart_meta = generate_natal_chart(
+            # Özet için gereken kayıt çizimden önce (ve ondan bağımsız) hesaplanır
+            chart_meta = get_chart_record(
+                birth_date, birth_time or NOON, lat, lon, timezone_str, house_system
+            ).to_dict()
+            if time_unknown:
+                noon_record, profile = day_profile(birth_date, lat, lon, timezone_str, house_system)
+                chart_summary = build_unknown_time_summary(noon_record, profile, lang)
+        except Exception as e:
+            print("Natal chart compute error:", e)
+
+        try:
+            chart_id, chart_file_path, _ = generate_natal_chart(
                 birth_date=birth_date,
-                birth_time=birth_time,
+                birth_time=birth_time or NOON,
                 latitude=lat,
                 longitude=lon,
                 out_dir="/tmp",
                 timezone_str=timezone_str,
+                house_system=house_system,
             )
             chart_public_path = f"/chart/{chart_id}"
+        except RenderError as e:
+            # Render havuzu dolu / zaman aşımı: ücretli rapor haritasız gitmesin
+            return _render_error(e)
         except Exception as e:
             print("Natal chart generation error:", e)
 
-        chart_summary = build_chart_summary(chart_meta, lang)
+        if not time_unknown:
+            chart_summary = build_chart_summary(chart_meta, lang)
+        shown_time = birth_time or ("bilinmiyor" if lang == "tr" else "unknown")
 
         if lang == "tr":
-            user_prompt = (
-                f"Premium NATAL astroloji raporu oluştur.\n"
-                f"Doğum tarihi: {birth_date}\n"
-                f"Doğum saati: {birth_time}\n"
-                f"Doğum yeri: {birth_place}\n"
-                f"Danışan ismi: {name}\n"
-                f"Odak alanları: {focus_str}\n"
-                f"Özel soru veya niyet: {question}\n\n"
-                "Aşağıda Swiss Ephemeris ile hesaplanmış gerçek doğum haritası yerleşimleri verilmiştir. "
-                "Lütfen yorumlarını bu yerleşimlere sadık kalarak yap:\n\n"
-                f"{chart_summary}\n\n"
-                "Lütfen raporu şu başlıklarla ve detaylı şekilde yaz:\n"
-                "1) Giriş ve genel enerji\n"
-                "2) Kişilik, ego ve ruhsal yapı (Güneş, Ay, ASC)\n"
-                "3) Zihinsel yapı ve iletişim (Merkür)\n"
-                "4) Aşk, ilişkiler ve çekim alanı (Venüs, 5. ve 7. evler)\n"
-                "5) Enerji, motivasyon ve mücadele (Mars)\n"
-                "6) Kariyer, para ve yaşam amacı (MC, 10. ev, Jüpiter, Satürn)\n"
-                "7) Dışsal gezegenler ve karmik dersler (Uranüs, Neptün, Plüton)\n"
-                "8) 12 ev üzerinden kısa ama anlamlı bir geçiş (her ev için 1-2 cümle)\n"
-                "9) Önümüzdeki 3-6 aya dair genel temalar ve öneriler\n\n"
-                "Dili sıcak, anlaşılır, profesyonel ve motive edici kullan. "
-                "Danışanın kendini suçlu hissetmesine değil, bilinçlenmesine yardımcı ol."
-            )
+            fields = [
+                ("Doğum tarihi", birth_date),
+                ("Doğum saati", shown_time),
+                ("Doğum yeri", birth_place),
+                ("Danışan ismi", name),
+                ("Odak alanları", focus_str),
+                ("Özel soru veya niyet", clip_text(question, MAX_USER_TEXT_TOKENS)),
+            ]
         else:
-            user_prompt = (
-                f"Create a premium NATAL astrology report.\n"
-                f"Birth date: {birth_date}\n"
-                f"Birth time: {birth_time}\n"
-                f"Birth place: {birth_place}\n"
-                f"Client name: {name}\n"
-                f"Focus areas: {focus_str}\n"
-                f"Specific question or intention: {question}\n\n"
-                "Below are the actual natal chart placements calculated with Swiss Ephemeris. "
-                "Please base your interpretation strictly on these placements:\n\n"
-                f"{chart_summary}\n\n"
-                "Please structure the report with clear headings:\n"
-                "1) Introduction and overall energy\n"
-                "2) Personality, ego and soul structure (Sun, Moon, ASC)\n"
-                "3) Mind and communication (Mercury)\n"
-                "4) Love, relationships and attraction (Venus, 5th and 7th houses)\n"
-                "5) Drive, desire and action (Mars)\n"
-                "6) Career, money and life direction (MC, 10th house, Jupiter, Saturn)\n"
-                "7) Outer planets and karmic lessons (Uranus, Neptune, Pluto)\n"
-                "8) Short but meaningful overview of the 12 houses (1–2 sentences each)\n"
-                "9) General themes and advice for the next 3–6 months\n\n"
-                "Use a warm, clear and empowering tone. Focus on awareness and growth rather than fear."
-            )
-
-        completion = client.chat.completions.create(
+            fields = [
+                ("Birth date", birth_date),
+                ("Birth time", shown_time),
+                ("Birth place", birth_place),
+                ("Client name", name),
+                ("Focus areas", focus_str),
+                ("Specific question or intention", clip_text(question, MAX_USER_TEXT_TOKENS)),
+            ]
+        prompt = assemble("astrology", "astrology", lang, fields, [("", chart_summary, True)])
+
+        completion = llm.chat_completion(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            max_tokens=2300,
+            messages=prompt.messages,
+            max_tokens=prompt.max_tokens,
         )
+        record_usage(prompt, completion)
         text = completion.choices[0].message.content.strip()
 
         return jsonify(
@@ -619,11 +1028,15 @@ def astrology_premium():
                 "chart": chart_public_path,
                 "chart_id": chart_id,
                 "chart_data": chart_meta,
+                "birth_time_unknown": time_unknown,
+                "day_profile": _compact_floats(profile) if profile else None,
                 "language": lang,
                 "mode": "natal",
             }
         )
 
+    except UpstreamError as e:
+        return _upstream_error(e)
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -636,7 +1049,9 @@ def astrology_premium():
 def solar_return():
     """
     Solar return raporu + harita.
-    Not: Solar return tarihi, doğum günü + aynı saat üzerinden yaklaşık alınır.
+    Harita, Güneş'in natal boylamına döndüğü tam an için çizilir
+    (returns.solar_return_jd); bu hesap başarısız olursa doğum günü +
+    aynı saat yaklaşımına düşülür.
     """
     try:
         data = request.json or {}
@@ -651,7 +1066,7 @@ def solar_return():
             return jsonify({"error": "Eksik bilgi"}), 400
 
         if not year:
-            year = datetime.utcnow().year
+            year = datetime.now(timezone.utc).year
         year = int(year)
 
         y0, m0, d0 = map(int, birth_date.split("-"))
@@ -668,63 +1083,50 @@ def solar_return():
         lat, lon = geocode_place(birth_place)
         chart_id = None
         chart_public_path = None
+        sr_time = birth_time
         try:
             timezone_str = get_timezone_from_latlon(lat, lon)
+            try:
+                natal = get_chart_record(birth_date, birth_time, lat, lon, timezone_str)
+                sr_date, sr_time = jd_to_local(solar_return_jd(natal, year), timezone_str)
+            except Exception as e:
+                print("Solar return time error:", e)
             chart_id, chart_file_path, _ = generate_natal_chart(
                 birth_date=sr_date,
-                birth_time=birth_time,
+                birth_time=sr_time,
                 latitude=lat,
                 longitude=lon,
                 out_dir="/tmp",
                 timezone_str=timezone_str,
             )
             chart_public_path = f"/chart/{chart_id}"
+        except RenderError as e:
+            return _render_error(e)
         except Exception as e:
             print("Solar return chart error:", e)
 
-        system_prompt = build_system_prompt("solar_return", lang)
-
         if lang == "tr":
-            user_prompt = (
-                f"Solar return (güneş dönüşü) astroloji raporu oluştur.\n"
-                f"Doğum tarihi: {birth_date}\n"
-                f"Doğum saati: {birth_time}\n"
-                f"Doğum yeri: {birth_place}\n"
-                f"Solar return yılı: {year}\n\n"
-                "Raporda şu başlıkları kullan:\n"
-                "1) Bu yılın genel atmosferi ve ana dersleri\n"
-                "2) Aşk, ilişkiler ve sosyal çevre\n"
-                "3) Kariyer, para, iş ve fırsatlar\n"
-                "4) Ruhsal gelişim, şifa ve içsel dönüşüm\n"
-                "5) Bu yıl dikkat edilmesi gereken gölgeler / uyarılar\n"
-                "6) Danışan için bilinçli seçimler ve öneriler\n"
-                "Dili sıcak, gerçekçi ve umut verici kullan."
-            )
+            fields = [
+                ("Doğum tarihi", birth_date),
+                ("Doğum saati", birth_time),
+                ("Doğum yeri", birth_place),
+                ("Solar return yılı", year),
+            ]
         else:
-            user_prompt = (
-                f"Create a SOLAR RETURN astrology report.\n"
-                f"Birth date: {birth_date}\n"
-                f"Birth time: {birth_time}\n"
-                f"Birth place: {birth_place}\n"
-                f"Solar return year: {year}\n\n"
-                "Please structure the report with headings:\n"
-                "1) Overall atmosphere and main lessons of the year\n"
-                "2) Love, relationships and social life\n"
-                "3) Career, money, work and opportunities\n"
-                "4) Spiritual growth, healing and inner transformation\n"
-                "5) Potential challenges and what to be mindful about\n"
-                "6) Practical advice and conscious choices for the year\n"
-                "Keep the tone warm, realistic and encouraging."
-            )
-
-        completion = client.chat.completions.create(
+            fields = [
+                ("Birth date", birth_date),
+                ("Birth time", birth_time),
+                ("Birth place", birth_place),
+                ("Solar return year", year),
+            ]
+        prompt = assemble("solar_return", "solar_return", lang, fields)
+
+        completion = llm.chat_completion(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            max_tokens=1600,
+            messages=prompt.messages,
+            max_tokens=prompt.max_tokens,
         )
+        record_usage(prompt, completion)
         text = completion.choices[0].message.content.strip()
 
         return jsonify(
@@ -735,9 +1137,12 @@ def solar_return():
                 "language": lang,
                 "mode": "solar",
                 "solar_year": year,
+                "solar_return_at": f"{sr_date} {sr_time}",
             }
         )
 
+    except UpstreamError as e:
+        return _upstream_error(e)
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -772,95 +1177,543 @@ def transits():
         if lang not in ("tr", "en"):
             lang = "en"
 
-        today = datetime.utcnow().strftime("%Y-%m-%d")
-        system_prompt = build_system_prompt("transit", lang)
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        try:
+            upcoming = build_calendar_summary(date_to_jd(today), TRANSIT_CALENDAR_DAYS, lang)
+        except Exception:
+            traceback.print_exc()
+            upcoming = ""
 
         if lang == "tr":
-            user_prompt = (
-                f"Transit odaklı astroloji raporu oluştur.\n"
-                f"Doğum tarihi: {birth_date}\n"
-                f"Doğum saati: {birth_time}\n"
-                f"Doğum yeri: {birth_place}\n"
-                f"Danışan ismi: {name}\n"
-                f"Bugün: {today}\n\n"
-                "Lütfen raporu şu başlıklarla yaz:\n"
-                "1) Son dönem ve şu anki genel enerji\n"
-                "2) Önümüzdeki 1-3 ay için ana temalar\n"
-                "3) Aşk ve ilişkiler üzerindeki transit etkileri\n"
-                "4) Kariyer, para ve iş alanındaki transit etkileri\n"
-                "5) Ruhsal gelişim, şifa ve içsel süreçler\n"
-                "6) Özellikle Satürn, Uranüs, Neptün, Plüton transitleri ve ana dersler\n"
-                "7) Danışana özel tavsiyeler ve odaklanması gereken noktalar\n"
-                "Korkutucu değil, bilinçlendirici ve motive edici bir dil kullan."
-            )
+            fields = [
+                ("Doğum tarihi", birth_date),
+                ("Doğum saati", birth_time),
+                ("Doğum yeri", birth_place),
+                ("Danışan ismi", name),
+                ("Bugün", today),
+            ]
+            heading = f"Önümüzdeki {TRANSIT_CALENDAR_DAYS} günün gök olayları (UTC):"
         else:
-            user_prompt = (
-                f"Create a TRANSIT-focused astrology report.\n"
-                f"Birth date: {birth_date}\n"
-                f"Birth time: {birth_time}\n"
-                f"Birth place: {birth_place}\n"
-                f"Client name: {name}\n"
-                f"Today: {today}\n\n"
-                "Please structure the report with headings:\n"
-                "1) Recent past and current overall energy\n"
-                "2) Main themes for the next 1–3 months\n"
-                "3) Transits affecting love and relationships\n"
-                "4) Transits affecting career, money and work\n"
-                "5) Spiritual growth, healing and inner processes\n"
-                "6) Key long-term transits (Saturn, Uranus, Neptune, Pluto) and their lessons\n"
-                "7) Practical advice and focus points for the client\n"
-                "Keep the tone empowering and supportive, not fear-based."
-            )
-
-        completion = client.chat.completions.create(
+            fields = [
+                ("Birth date", birth_date),
+                ("Birth time", birth_time),
+                ("Birth place", birth_place),
+                ("Client name", name),
+                ("Today", today),
+            ]
+            heading = f"Sky events in the next {TRANSIT_CALENDAR_DAYS} days (UTC):"
+        prompt = assemble("transit", "transit", lang, fields, [(heading, upcoming, True)])
+
+        completion = llm.chat_completion(
             model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            max_tokens=1600,
+            messages=prompt.messages,
+            max_tokens=prompt.max_tokens,
         )
+        record_usage(prompt, completion)
         text = completion.choices[0].message.content.strip()
 
         return jsonify({"text": text, "language": lang, "mode": "transits"})
 
+    except UpstreamError as e:
+        return _upstream_error(e)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  GÜNLÜK BURÇ YORUMU (önceden üretilmiş)
+# =====================================================
+@app.route("/daily-horoscope")
+def daily_horoscope():
+    """
+    ?sign=Koç|Aries|0..11 &lang=tr|en &date=YYYY-MM-DD (varsayılan: bugün, UTC)
+    sign verilmezse günün tüm burçları. Metinler cache'ten döner; LLM çağrılmaz.
+    Bugün/yarın henüz üretilmemişse arka planda üretim başlatılır ve 503 döner;
+    saklama penceresi (DAILY_KEEP_DAYS) dışındaki veya üretilmemiş geçmiş
+    günler 404 döner.
+    """
+    try:
+        args = request.args
+        lang = args.get("lang") or "tr"
+        if lang not in ("tr", "en"):
+            return jsonify({"error": "lang 'tr' veya 'en' olmalı"}), 400
+        day = args.get("date") or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        try:
+            day = datetime.strptime(day, "%Y-%m-%d").strftime("%Y-%m-%d")
+            signs = [parse_sign(args["sign"])] if args.get("sign") else list(range(12))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        today, tomorrow = generation_days()
+        if not daily_store.oldest(today) <= day <= tomorrow:
+            return jsonify({"error": "Bu tarih için günlük yorum yok", "date": day}), 404
+
+        entries = [daily_store.get(day, s, lang) for s in signs]
+        if any(e is None for e in entries):
+            cache_miss("daily_horoscope")
+            if day not in (today, tomorrow):
+                return jsonify({"error": "Bu tarih için günlük yorum yok", "date": day}), 404
+            daily_scheduler.ensure(day)
+            resp = jsonify({"error": "Günlük yorumlar hazırlanıyor", "date": day})
+            resp.status_code = 503
+            resp.headers["Retry-After"] = "60"
+            return resp
+
+        cache_hit("daily_horoscope")
+        resp = jsonify(entries[0] if args.get("sign") else {"date": day, "language": lang, "horoscopes": entries})
+        resp.headers["Cache-Control"] = "public, max-age=3600"
+        return resp
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  CHART DATA (LLM'siz, JSON)
+# =====================================================
+MAX_CHART_BATCH = 200
+# Toplu istekte birth_place ile (koordinatsız) gelebilecek kayıt sayısı;
+# her biri Nominatim'e sıralı bir çağrıdır (10 sn'ye kadar)
+MAX_BATCH_GEOCODE = 5
+
+
+def _compact_floats(obj, ndigits=4):
+    """JSON yükünü küçültmek için float'ları yuvarlar (iç içe yapılarda)."""
+    if isinstance(obj, float):
+        return round(obj, ndigits)
+    if isinstance(obj, dict):
+        return {k: _compact_floats(v, ndigits) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_compact_floats(v, ndigits) for v in obj]
+    return obj
+
+
+def _chart_record_for(rec: dict):
+    """
+    Tek doğum kaydı → (ChartRecord, lat, lon, timezone), chart cache üzerinden.
+    rec: birth_date, birth_time + (latitude, longitude [, timezone]) veya birth_place
+         [, house_system]
+    """
+    birth_date = rec.get("birth_date")
+    birth_time = rec.get("birth_time")
+    if not birth_date or not birth_time:
+        raise ValueError("birth_date ve birth_time zorunlu")
+
+    lat = rec.get("latitude")
+    lon = rec.get("longitude")
+    if lat is None or lon is None:
+        birth_place = rec.get("birth_place")
+        if not birth_place:
+            raise ValueError("latitude/longitude veya birth_place gerekli")
+        lat, lon = geocode_place(birth_place)
+    lat, lon = float(lat), float(lon)
+
+    timezone_str = resolve_timezone(rec.get("timezone"), lat, lon)
+    house_system = rec.get("house_system") or DEFAULT_HOUSE_SYSTEM
+
+    record = get_chart_record(birth_date, birth_time, lat, lon, timezone_str, house_system)
+    return record, lat, lon, timezone_str
+
+
+def _chart_data_for_record(rec: dict) -> dict:
+    """
+    Tek doğum kaydı → describe_chart çıktısı (kompakt JSON için).
+    birth_time yok / "unknown" / "bilinmiyor" ise öğlen haritası + "unknown_time"
+    gün profili (/astrology-premium ile aynı kural).
+    """
+    time_unknown = _birth_time_unknown(rec.get("birth_time"))
+    if time_unknown:
+        rec = dict(rec, birth_time=NOON)
+    record, lat, lon, timezone_str = _chart_record_for(rec)
+    data = describe_chart(record.to_dict())
+    if time_unknown:
+        _, data["unknown_time"] = day_profile(rec["birth_date"], lat, lon, timezone_str, record.house_system)
+
+    # Opsiyonel ekler: sadece istenirse hesaplanır (asteroid dosyaları da ancak o zaman açılır)
+    stars = rec.get("fixed_stars")
+    if stars:
+        opts = stars if isinstance(stars, dict) else {}
+        data["fixed_stars"] = star_contacts(
+            record.lons,
+            record.julian_day,
+            orb=float(opts.get("orb") or FIXED_STAR_ORB),
+            max_mag=float(opts.get("max_mag") or FIXED_STAR_MAX_MAG),
+        )
+    wanted = rec.get("asteroids")
+    if wanted:
+        names = wanted if isinstance(wanted, list) else ASTEROID_NAMES
+        data["asteroids"] = asteroid_positions(record.julian_day, names, cusps=record.cusps)
+    data["latitude"] = lat
+    data["longitude"] = lon
+    data["timezone"] = timezone_str
+    return _compact_floats(data)
+
+
+@app.route("/chart-data", methods=["POST"])
+def chart_data():
+    """
+    OpenAI çağrısı yapmadan harita verisini döner (chart cache üzerinden).
+    Tekil: {birth_date, birth_time, birth_place | latitude+longitude[, timezone]}
+    Opsiyonel: "fixed_stars": true | {"orb", "max_mag"}, "asteroids": true | ["Chiron", ...]
+    Toplu: {"records": [ {...}, {...} ]}  → her kayıt için chart veya error
+           (en fazla MAX_BATCH_GEOCODE kayıt koordinatsız, birth_place ile)
+    """
+    try:
+        data = request.json or {}
+        records = data.get("records")
+
+        if records is None:
+            try:
+                chart = _chart_data_for_record(data)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({"chart": chart, "signs": SIGN_META})
+
+        if not isinstance(records, list) or not records:
+            return jsonify({"error": "records boş olmayan bir liste olmalı"}), 400
+        if len(records) > MAX_CHART_BATCH:
+            return jsonify({"error": f"En fazla {MAX_CHART_BATCH} kayıt gönderilebilir"}), 400
+        geocoded = sum(
+            1 for rec in records
+            if isinstance(rec, dict) and (rec.get("latitude") is None or rec.get("longitude") is None)
+        )
+        if geocoded > MAX_BATCH_GEOCODE:
+            return jsonify({
+                "error": f"Toplu istekte en fazla {MAX_BATCH_GEOCODE} kayıt birth_place ile "
+                         f"gönderilebilir; diğerleri için latitude/longitude verin"
+            }), 400
+
+        results = []
+        for rec in records:
+            try:
+                results.append({"chart": _chart_data_for_record(rec or {})})
+            except Exception as e:
+                results.append({"error": str(e)})
+
+        return jsonify({"charts": results, "signs": SIGN_META})
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  SİNASTRİ (LLM'siz, JSON)
+# =====================================================
+MAX_SYNASTRY_PEOPLE = 8
+
+
+@app.route("/synastry", methods=["POST"])
+def synastry():
+    """
+    {"people": [kayıt, kayıt, ...]} — kayıt biçimi /chart-data ile aynı.
+    Her kişi için harita + her ikili için açı ızgarası, ev overlay'leri,
+    uyum skoru ve kompozit harita döner.
+    """
+    try:
+        data = request.json or {}
+        people = data.get("people")
+
+        if not isinstance(people, list) or len(people) < 2:
+            return jsonify({"error": "En az iki kişi gerekli"}), 400
+        if len(people) > MAX_SYNASTRY_PEOPLE:
+            return jsonify({"error": f"En fazla {MAX_SYNASTRY_PEOPLE} kişi gönderilebilir"}), 400
+
+        records = []
+        charts = []
+        try:
+            for rec in people:
+                record, lat, lon, timezone_str = _chart_record_for(rec or {})
+                records.append(record)
+                chart = describe_chart(record.to_dict())
+                chart.update({"latitude": lat, "longitude": lon, "timezone": timezone_str})
+                charts.append(chart)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        pairs = compute_synastry(records)
+        return jsonify(_compact_floats({"charts": charts, "pairs": pairs}))
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  RELOCATION / ASTROKARTOGRAFİ (LLM'siz, JSON)
+# =====================================================
+@app.route("/relocation", methods=["POST"])
+def relocation():
+    """
+    Doğum kaydı (/chart-data biçimi) + opsiyonel hedef:
+        "target": {"latitude", "longitude"} veya "target_place": "Lisbon"
+    Döner: gezegen ASC/DSC/MC/IC çizgileri (polyline segmentleri) ve hedef
+    verilmişse aynı doğum anı için relocated harita + açısal gezegenler.
+    """
+    try:
+        data = request.json or {}
+        try:
+            record, _, _, _ = _chart_record_for(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        lat_step = float(data.get("lat_step") or 1.0)
+        if not 0.25 <= lat_step <= 10.0:
+            return jsonify({"error": "lat_step 0.25 ile 10 arasında olmalı"}), 400
+
+        state = instant_state(record.julian_day)
+        result = {"lines": _compact_floats(planet_lines(state, lat_step=lat_step), 2)}
+
+        target = data.get("target") or {}
+        t_lat, t_lon = target.get("latitude"), target.get("longitude")
+        if (t_lat is None or t_lon is None) and data.get("target_place"):
+            t_lat, t_lon = geocode_place(data["target_place"])
+
+        if t_lat is not None and t_lon is not None:
+            moved = relocated_chart(record.julian_day, float(t_lat), float(t_lon), record.house_system)
+            relocated = describe_chart(moved.to_dict())
+            relocated.update({"latitude": float(t_lat), "longitude": float(t_lon)})
+            result["relocated"] = _compact_floats(relocated)
+            result["angular_planets"] = _compact_floats(angular_planets(moved))
+
+        return jsonify(result)
+
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
 # =====================================================
-#  PDF SINIFI (UNICODE + LOGO + KAPAK)
+#  LUNAR RETURN (LLM'siz, JSON)
 # =====================================================
-class MystPDF(FPDF):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if os.path.exists(FONT_PATH_TTF):
-            self.add_font("DejaVu", "", FONT_PATH_TTF, uni=True)
-            self.add_font("DejaVu", "B", FONT_PATH_TTF, uni=True)
+MAX_LUNAR_RETURNS = 13
+
+
+@app.route("/lunar-return", methods=["POST"])
+def lunar_return():
+    """
+    Doğum kaydı (/chart-data biçimi) +
+        start_date : 'YYYY-MM-DD' (varsayılan: bugün)
+        count      : kaç dönüş (varsayılan 1, en fazla 13 ≈ bir yıl)
+        location   : {"latitude", "longitude"} veya "current_place" —
+                     dönüş haritası için güncel yer (varsayılan: doğum yeri)
+    Ay'ın natal boylamına döndüğü tam anlar ve her an için harita döner.
+    Natal ve dönüş haritaları chart cache üzerinden gelir.
+    """
+    try:
+        data = request.json or {}
+        try:
+            record, lat, lon, timezone_str = _chart_record_for(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        count = int(data.get("count") or 1)
+        if not 1 <= count <= MAX_LUNAR_RETURNS:
+            return jsonify({"error": f"count 1 ile {MAX_LUNAR_RETURNS} arasında olmalı"}), 400
+
+        start_date = data.get("start_date") or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        try:
+            start_jd = date_to_jd(start_date)
+        except ValueError:
+            return jsonify({"error": "start_date 'YYYY-MM-DD' biçiminde olmalı"}), 400
+
+        location = data.get("location") or {}
+        r_lat, r_lon = location.get("latitude"), location.get("longitude")
+        if (r_lat is None or r_lon is None) and data.get("current_place"):
+            r_lat, r_lon = geocode_place(data["current_place"])
+        if r_lat is None or r_lon is None:
+            r_lat, r_lon, r_tz = lat, lon, timezone_str
+        else:
+            r_lat, r_lon = float(r_lat), float(r_lon)
+            r_tz = get_timezone_from_latlon(r_lat, r_lon)
+
+        moon_lon = float(record.lons[1])
+        jds = next_returns("Moon", moon_lon, start_jd, count)
+
+        returns = []
+        for jd, moved in zip(jds.tolist(), return_charts(record, jds, r_lat, r_lon)):
+            local_date, local_time = jd_to_local(jd, r_tz)
+            returns.append({
+                "local_date": local_date,
+                "local_time": local_time,
+                "chart": describe_chart(moved.to_dict()),
+            })
+
+        return jsonify(_compact_floats({
+            "natal_moon": moon_lon,
+            "location": {"latitude": r_lat, "longitude": r_lon, "timezone": r_tz},
+            "returns": returns,
+        }))
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  DOĞUM SAATİ REKTİFİKASYONU (LLM'siz, JSON)
+# =====================================================
+@app.route("/rectification", methods=["POST"])
+def rectification():
+    """
+    {
+      "birth_date": "YYYY-MM-DD",
+      "birth_place" | "latitude"+"longitude" [, "timezone"], [ "house_system" ],
+      "events": [{"date": "YYYY-MM-DD", "type": "marriage", "weight": 1}, ...],
+      "start_time": "00:00", "end_time": "23:59", "step_minutes": 1, "top": 5
+    }
+    Olay türleri: rectification.EVENT_TYPES. En yüksek skorlu aday saatler,
+    ASC/MC ve skora katkı veren temaslarla döner.
+    """
+    try:
+        data = request.json or {}
+        birth_date = data.get("birth_date")
+        events = data.get("events")
+        if not birth_date:
+            return jsonify({"error": "birth_date zorunlu"}), 400
+        if not isinstance(events, list) or not events:
+            return jsonify({"error": "events boş olmayan bir liste olmalı"}), 400
+
+        lat, lon = data.get("latitude"), data.get("longitude")
+        if lat is None or lon is None:
+            if not data.get("birth_place"):
+                return jsonify({"error": "latitude/longitude veya birth_place gerekli"}), 400
+            lat, lon = geocode_place(data["birth_place"])
+        lat, lon = float(lat), float(lon)
+        try:
+            timezone_str = resolve_timezone(data.get("timezone"), lat, lon)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        top = int(data.get("top") or 5)
+        if not 1 <= top <= 20:
+            return jsonify({"error": "top 1 ile 20 arasında olmalı"}), 400
+
+        try:
+            result = rectify(
+                birth_date,
+                lat,
+                lon,
+                timezone_str,
+                events,
+                house_system=data.get("house_system") or DEFAULT_HOUSE_SYSTEM,
+                start_time=data.get("start_time") or "00:00",
+                end_time=data.get("end_time") or "23:59",
+                step_minutes=int(data.get("step_minutes") or 1),
+                top=top,
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        result.update({"latitude": lat, "longitude": lon, "timezone": timezone_str})
+        return jsonify(_compact_floats(result))
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+# =====================================================
+#  GEZEGEN TAKVİMİ (LLM'siz, JSON)
+# =====================================================
+MAX_CALENDAR_DAYS = 732
+
+
+@app.route("/calendar")
+def planet_calendar():
+    """
+    ?start=YYYY-MM-DD (varsayılan bugün) &end=YYYY-MM-DD (varsayılan +30 gün)
+    &kinds=ingress,new_moon,... (planet_calendar.EVENT_KINDS) &bodies=Sun,Mars,...
+    Önceden hesaplanmış takvimden [start, end) aralığındaki olaylar.
+    """
+    try:
+        args = request.args
+        try:
+            start_jd = date_to_jd(args.get("start") or datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+            end_jd = date_to_jd(args["end"]) if args.get("end") else start_jd + 30
+        except ValueError:
+            return jsonify({"error": "start/end 'YYYY-MM-DD' biçiminde olmalı"}), 400
+        if not 0 < end_jd - start_jd <= MAX_CALENDAR_DAYS:
+            return jsonify({"error": f"Aralık 1 ile {MAX_CALENDAR_DAYS} gün arasında olmalı"}), 400
+
+        kinds = [k for k in (args.get("kinds") or "").split(",") if k]
+        bodies = [b for b in (args.get("bodies") or "").split(",") if b]
+        unknown = [k for k in kinds if k not in EVENT_KINDS]
+        if unknown:
+            return jsonify({"error": f"Bilinmeyen olay türü: {', '.join(unknown)}"}), 400
+        unknown = [b for b in bodies if b not in PLANET_NAMES]
+        if unknown:
+            return jsonify({"error": f"Bilinmeyen gezegen: {', '.join(unknown)}"}), 400
+
+        try:
+            calendar = get_calendar()
+        except CalendarNotReady as e:
+            return _retry_later(str(e), 503, 5)
+        if start_jd < calendar.start_jd or end_jd > calendar.end_jd + 1:
+            return jsonify({"error": "Aralık takvim kapsamı dışında"}), 400
+
+        events = calendar.query(start_jd, end_jd, kinds, bodies)
+        return jsonify(_compact_floats({"events": events, "count": len(events), "signs": SIGN_META}))
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
 
-    def header(self):
-        if LOGO_PATH and os.path.exists(LOGO_PATH):
-            self.image(LOGO_PATH, 10, 7, 16)
 
-        self.set_xy(28, 8)
-        self.set_font("DejaVu", "B", 11)
-        self.set_text_color(25, 30, 55)
-        self.cell(0, 5, "MystAI Astrology", ln=1)
+# =====================================================
+#  PROGRESYONLAR / SOLAR ARC (NDJSON akışı)
+# =====================================================
+@app.route("/progressions", methods=["POST"])
+def progressions():
+    """
+    Doğum kaydı (/chart-data biçimi) +
+        start_date, end_date : 'YYYY-MM-DD' (varsayılan: bugün → +10 yıl)
+        mode                 : "events" (tam açı tarihleri) | "positions"
+        step_days            : positions modu için adım (varsayılan 30)
+    Satır başına bir JSON nesnesi akıtılır; uzun aralıklar belleğe yığılmaz.
+    """
+    try:
+        data = request.json or {}
+        try:
+            record, _, _, _ = _chart_record_for(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        today = datetime.now(timezone.utc)
+        start_date = data.get("start_date") or today.strftime("%Y-%m-%d")
+        end_date = data.get("end_date") or f"{today.year + 10:04d}-{today.month:02d}-{today.day:02d}"
+        mode = data.get("mode") or "events"
+        step_days = int(data.get("step_days") or 30)
+
+        if mode == "events":
+            rows = aspect_events(record, start_date, end_date)
+        elif mode == "positions":
+            if step_days < 1:
+                return jsonify({"error": "step_days en az 1 olmalı"}), 400
+            rows = progressed_positions(record, start_date, end_date, step_days)
+        else:
+            return jsonify({"error": "mode 'events' veya 'positions' olmalı"}), 400
 
-        self.set_xy(28, 14)
-        self.set_font("DejaVu", "", 8)
-        self.set_text_color(110, 115, 150)
-        self.cell(0, 4, "mystai.ai  •  AI-powered divination & astrology", ln=1)
+        # İlk satırı önceden üret: aralık hataları akış başlamadan 400 olarak dönsün
+        try:
+            first = next(rows, None)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        self.ln(4)
-        self.set_text_color(25, 25, 40)
+        def generate():
+            if first is None:
+                return
+            yield json.dumps(_compact_floats(first), ensure_ascii=False) + "\n"
+            for row in rows:
+                yield json.dumps(_compact_floats(row), ensure_ascii=False) + "\n"
 
-    def footer(self):
-        self.set_y(-13)
-        self.set_font("DejaVu", "", 8)
-        self.set_text_color(130, 130, 160)
-        self.cell(0, 8, f"MystAI.ai • Page {self.page_no()}", align="C")
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
 
 
 # =====================================================
@@ -870,7 +1723,10 @@ class MystPDF(FPDF):
 def generate_pdf():
     """
     Frontend, text + chart_id + language + (opsiyonel) report_type + meta ile çağırır.
-    report_type: 'natal' | 'solar' | 'transits'
+    report_type: 'natal' | 'solar' | 'transits' | 'tarot'
+    chart_format: 'png' (varsayılan, raster) | 'svg' (vektörel harita)
+    tarot: report_type='tarot' için açılım ({"spread", "seed"} veya {"spread", "cards"});
+           kompozit görsel harita gibi sayfaya yerleştirilir
     """
     try:
         data = request.json or {}
@@ -884,132 +1740,38 @@ def generate_pdf():
         birth_place = data.get("birth_place")
         name = data.get("name")
         solar_year = data.get("solar_year")
+        chart_format = (data.get("chart_format") or "png").lower()
 
         if not text:
             return jsonify({"error": "Metin yok"}), 400
 
-        pdf_id = uuid.uuid4().hex
-        pdf_path = f"/tmp/{pdf_id}.pdf"
-
-        pdf = MystPDF()
-        pdf.set_auto_page_break(auto=True, margin=18)
-        pdf.alias_nb_pages()
-        pdf.add_page()
-
-        if lang == "tr":
-            if report_type == "solar":
-                title = "MystAI Güneş Dönüşü (Solar Return) Astroloji Raporu"
-                sub = (
-                    "Bu rapor, doğum haritan ile güneş dönüşü haritanı bir araya getirerek "
-                    "önümüzdeki yaklaşık bir yılın ana temalarını yorumlar."
-                )
-            elif report_type == "transits":
-                title = "MystAI Transit Astroloji Raporu"
-                sub = (
-                    "Bu rapor, güncel gökyüzü hareketlerini (transitleri) doğum haritanla ilişkilendirerek "
-                    "yakın gelecekte öne çıkan enerjileri açıklar."
-                )
-            else:
-                title = "MystAI Natal Doğum Haritası Raporu"
-                sub = (
-                    "Bu rapor, doğum haritanın sembollerini yorumlayarak kişilik, yaşam amacı, "
-                    "ilişkiler ve kader potansiyelin hakkında derinlemesine içgörüler sunar."
-                )
-            intro_heading = "Detaylı astroloji raporun aşağıdadır:"
-        else:
-            if report_type == "solar":
-                title = "MystAI Solar Return Astrology Report"
-                sub = (
-                    "This report combines your natal chart with your solar return chart "
-                    "to describe the main themes of the year ahead."
-                )
-            elif report_type == "transits":
-                title = "MystAI Transit Astrology Report"
-                sub = (
-                    "This report relates current planetary transits to your natal chart, "
-                    "highlighting the key energies around you now and in the near future."
-                )
-            else:
-                title = "MystAI Natal Astrology Report"
-                sub = (
-                    "This report interprets the symbols of your natal chart to explore your "
-                    "personality, life purpose, relationships and destiny potential."
-                )
-            intro_heading = "Your detailed astrology report is below:"
-
-        pdf.set_font("DejaVu", "B", 17)
-        pdf.set_text_color(30, 32, 60)
-        pdf.multi_cell(0, 8, title)
-        pdf.ln(2)
-
-        pdf.set_font("DejaVu", "", 11)
-        pdf.set_text_color(85, 90, 125)
-        pdf.multi_cell(0, 6, sub)
-        pdf.ln(6)
-
-        meta_lines = []
-        if birth_date and birth_time and birth_place:
-            if lang == "tr":
-                meta_lines.append(f"Doğum: {birth_date} • {birth_time} • {birth_place}")
-            else:
-                meta_lines.append(f"Birth: {birth_date} • {birth_time} • {birth_place}")
-        if solar_year and report_type == "solar":
-            if lang == "tr":
-                meta_lines.append(f"Güneş dönüşü yılı: {solar_year}")
-            else:
-                meta_lines.append(f"Solar return year: {solar_year}")
-        if name:
-            if lang == "tr":
-                meta_lines.append(f"Danışan: {name}")
-            else:
-                meta_lines.append(f"Client: {name}")
-
-        if meta_lines:
-            pdf.set_font("DejaVu", "", 9)
-            pdf.set_text_color(105, 110, 140)
-            pdf.multi_cell(0, 4.5, "  •  ".join(meta_lines))
-            pdf.ln(5)
-
-        has_chart_page = False
-        if chart_id and report_type in ("natal", "solar"):
-            chart_file = f"/tmp/{chart_id}.png"
-            if os.path.exists(chart_file):
-                try:
-                    img = Image.open(chart_file).convert("RGB")
-                    rgb_fixed = f"/tmp/{chart_id}_rgb.jpg"
-                    img.save(rgb_fixed, "JPEG", quality=95)
-
-                    img_width = 140
-                    x = (210 - img_width) / 2
-                    y = pdf.get_y() + 2
-
-                    pdf.image(rgb_fixed, x=x, y=y, w=img_width)
-                    has_chart_page = True
-                except Exception as e:
-                    print("PDF image error:", e)
-
-        if has_chart_page:
-            pdf.add_page()
-
-        pdf.set_text_color(35, 35, 55)
-        pdf.set_font("DejaVu", "B", 13)
-        pdf.multi_cell(0, 7, intro_heading)
-        pdf.ln(3)
-
-        pdf.set_font("DejaVu", "", 11)
-        pdf.set_text_color(25, 25, 40)
-
-        for raw_line in text.split("\n"):
-            line = raw_line.strip()
-            if not line:
-                pdf.ln(2)
-                continue
-            pdf.multi_cell(0, 5.5, line)
-            pdf.ln(0.5)
-
-        pdf.output(pdf_path)
+        tarot = None
+        if report_type == "tarot":
+            try:
+                tarot = resolve_draw(data.get("tarot") or {})
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+        # Dizgi render havuzunda (ayrı süreç); bu thread sadece bekler
+        with span("pdf_render"):
+            pdf_path = render_pool.run(
+                generate_pdf_file,
+                text,
+                lang=lang,
+                report_type=report_type,
+                chart_id=chart_id,
+                birth_date=birth_date,
+                birth_time=birth_time,
+                birth_place=birth_place,
+                name=name,
+                chart_format=chart_format,
+                solar_year=solar_year,
+                tarot=tarot,
+            )
         return send_file(pdf_path, as_attachment=True, download_name="mystai-report.pdf")
 
+    except RenderError as e:
+        return _render_error(e)
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
@@ -1026,12 +1788,50 @@ def serve_audio(id):
     return send_file(path, mimetype="audio/mpeg")
 
 
+def _negotiate_chart_format() -> str:
+    """format=auto için tarayıcının Accept başlığına göre en hafif formatı seçer."""
+    accept = request.headers.get("Accept", "")
+    available = supported_chart_formats()
+    for fmt in ("avif", "webp"):
+        if f"image/{fmt}" in accept and fmt in available:
+            return fmt
+    return "png"
+
+
+@app.route("/chart/<id>.svg")
+def serve_chart_svg(id):
+    path = f"/tmp/{id}.svg"
+    if not os.path.exists(path):
+        return jsonify({"error": "Chart not found"}), 404
+    return send_file(path, mimetype="image/svg+xml", max_age=86400)
+
+
 @app.route("/chart/<id>")
 def serve_chart(id):
-    path = f"/tmp/{id}.png"
-    if not os.path.exists(path):
+    """
+    Parametresiz çağrı eskisi gibi master PNG'yi döner.
+    ?size=thumb|web|print, ?format=png|webp|avif|jpg|auto ve ?w=<px> ile
+    master'dan türetilmiş (ve diskte cache'lenmiş) varyant servis edilir.
+    """
+    size = request.args.get("size", "print")
+    fmt = (request.args.get("format") or "png").lower()
+    width = request.args.get("w", type=int)
+
+    if fmt == "auto":
+        fmt = _negotiate_chart_format()
+
+    try:
+        path, mimetype = get_chart_variant(id, size=size, fmt=fmt, width=width)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not path:
         return jsonify({"error": "Chart not found"}), 404
-    return send_file(path, mimetype="image/png")
+
+    resp = send_file(path, mimetype=mimetype, max_age=86400)
+    if request.args.get("format") == "auto":
+        resp.headers["Vary"] = "Accept"
+    return resp
 
 
 # =====================================================
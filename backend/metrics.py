@@ -0,0 +1,239 @@
+# metrics.py
+# ===================
+# MystAI - Hafif ölçüm katmanı (Prometheus metin formatı)
+#
+# - span("geocode")          : aşama süresi → mystai_stage_seconds{endpoint, stage}
+#   (with bloğuna sığmayan yerlerde observe_stage)
+# - observe / inc / gauge_add: histogram, sayaç, gauge
+# - cache_hit / cache_miss   : mystai_cache_{hits,misses}_total{cache}
+# - register_collector(fn)   : scrape anında başka modüllerin sayaçlarını okur
+#                              (chart cache, lru_cache'ler, upstream, admission, token)
+# - render()                 : /metrics çıktısı
+#
+# Endpoint etiketi istek başında bind_endpoint ile bağlama yazılır; arka plan
+# işlerinde "background"dır. METRICS=0 iken span paylaşılan boş bir context
+# manager döner, diğer fonksiyonlar ilk satırda çıkar (ölçüm maliyeti ~0).
+# capture_stages() bloğundaki aşama süreleri kaydedilmez, listeye toplanır:
+# render worker'ı bunları sonuçla birlikte ana sürece döner.
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+METRICS_ENABLED = os.environ.get("METRICS", "1").lower() not in ("0", "false", "no")
+
+# Saniye; LLM çağrıları için üst uç geniş tutuldu
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    "mystai_request_seconds": ("histogram", "İstek süresi (uç nokta başına)"),
+    "mystai_stage_seconds": ("histogram", "İstek aşaması süresi (uç nokta + aşama)"),
+    "mystai_requests_total": ("counter", "Tamamlanan istekler (uç nokta + durum kodu)"),
+    "mystai_requests_in_flight": ("gauge", "Şu an işlenen istekler"),
+    "mystai_cache_hits_total": ("counter", "Cache isabetleri"),
+    "mystai_cache_misses_total": ("counter", "Cache kaçırmaları"),
+}
+
+_NOOP = nullcontext()
+_endpoint = ContextVar("metrics_endpoint", default="background")
+_captured = ContextVar("metrics_captured", default=None)
+_lock = threading.Lock()
+_counters = {}  # (ad, etiketler) → değer
+_gauges = {}
+_histograms = {}  # (ad, etiketler) → [kova sayıları..., +Inf], toplam
+_collectors = []
+
+
+def bind_endpoint(name):
+    """Geçerli bağlamın endpoint etiketi; reset için token döner."""
+    return _endpoint.set(name or "unmatched")
+
+
+def unbind_endpoint(token):
+    _endpoint.reset(token)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def gauge_add(name, delta, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0) + delta
+
+
+def observe(name, seconds, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    i = bisect_left(BUCKETS, seconds)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+        hist[0][i] += 1
+        hist[1] += seconds
+
+
+def cache_hit(cache):
+    inc("mystai_cache_hits_total", cache=cache)
+
+
+def cache_miss(cache):
+    inc("mystai_cache_misses_total", cache=cache)
+
+
+def observe_stage(stage, seconds):
+    """Aşama süresini geçerli endpoint etiketiyle kaydeder (span'in elle hali)."""
+    captured = _captured.get()
+    if captured is not None:
+        captured.append((stage, seconds))
+        return
+    observe("mystai_stage_seconds", seconds, endpoint=_endpoint.get(), stage=stage)
+
+
+@contextmanager
+def capture_stages():
+    """`with capture_stages() as stages:` — bloktaki aşama süreleri (stage, saniye) listesine gider."""
+    stages = []
+    token = _captured.set(stages)
+    try:
+        yield stages
+    finally:
+        _captured.reset(token)
+
+
+class _Span:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe_stage(self.stage, time.perf_counter() - self.t0)
+        return False
+
+
+def span(stage):
+    """`with span("llm"):` — aşama süresini geçerli endpoint etiketiyle kaydeder."""
+    return _Span(stage) if METRICS_ENABLED else _NOOP
+
+
+def timed(stage):
+    """Fonksiyonun tamamını span ile saran dekoratör."""
+
+    def wrap(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with _Span(stage):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+def register_collector(fn):
+    """
+    fn() → [(ad, tür, yardım, {etiketler}, değer), ...]; her scrape'te çağrılır.
+    Modüller kendi sayaçlarını kopyalamadan böyle dışa açar.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def lru_collector(cache_name, cached_fn):
+    """functools.lru_cache istatistiklerini hit/miss sayaçlarına çevirir."""
+
+    def collect():
+        info = cached_fn.cache_info()
+        return [
+            ("mystai_cache_hits_total", "counter", None, {"cache": cache_name}, info.hits),
+            ("mystai_cache_misses_total", "counter", None, {"cache": cache_name}, info.misses),
+        ]
+
+    return register_collector(collect)
+
+
+# -----------------------------
+# Prometheus metin formatı
+# -----------------------------
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_value(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def render() -> str:
+    series = {}  # ad → (tür, yardım, [satırlar])
+
+    def add(name, kind, help_text, line):
+        kind_help = HELP.get(name, (kind, help_text))
+        series.setdefault(name, (kind_help[0], kind_help[1], []))[2].append(line)
+
+    with _lock:
+        counters = list(_counters.items())
+        gauges = list(_gauges.items())
+        histograms = [(k, (list(h[0]), h[1])) for k, h in _histograms.items()]
+
+    for (name, labels), value in counters:
+        add(name, "counter", "", f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+    for (name, labels), value in gauges:
+        add(name, "gauge", "", f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+    for (name, labels), (counts, total) in histograms:
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += n
+            add(name, "histogram", "", f"{name}_bucket{_fmt_labels(labels + (('le', str(bound)),))} {cumulative}")
+        add(name, "histogram", "", f"{name}_sum{_fmt_labels(labels)} {total!r}")
+        add(name, "histogram", "", f"{name}_count{_fmt_labels(labels)} {cumulative}")
+
+    # Toplayıcı sayaçları kendi sayaçlarımızla aynı seriye eklenir
+    # (ör. chart cache isabetleri mystai_cache_hits_total{cache="chart"})
+    for collect in _collectors:
+        try:
+            rows = collect()
+        except Exception as e:
+            rows = [("mystai_collector_errors_total", "counter", "Okunamayan toplayıcılar",
+                     {"collector": getattr(collect, "__name__", "?"), "error": type(e).__name__}, 1)]
+        for name, kind, help_text, labels, value in rows:
+            add(name, kind, help_text or "", f"{name}{_fmt_labels(_labels(labels))} {_fmt_value(value)}")
+
+    out = []
+    for name in sorted(series):
+        kind, help_text, lines = series[name]
+        if help_text:
+            out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
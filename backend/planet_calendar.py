@@ -0,0 +1,385 @@
+# planet_calendar.py
+# ===================
+# MystAI - Gezegen takvimi (herkes için ortak olaylar)
+#
+# Transit ve günlük içerik özellikleri aynı global olaylara ihtiyaç duyar:
+#   - burç geçişleri (ingress)          : returns.find_returns_batch, 12 burç sınırı tek geçişte
+#   - duruşlar (retro / direkt)         : günlük hız örneklemesi + secant kökü
+#   - yeni ay / dolunay                 : günlük Ay−Güneş uzanımı + secant kökü
+#   - tutulmalar                        : düğüme yakın lunasyonlar swe ile doğrulanır
+#
+# Olaylar jd'ye göre sıralı, kayıt başına 16 byte'lık bir numpy yapısal
+# dizisi olarak .npy dosyasına yazılır ve mmap ile açılır. Aralık sorguları
+# jd sütununda np.searchsorted ile O(log n) yapılır; her kullanıcı isteği
+# aynı ortak hesabı kullanır.
+#
+# Dosya istek yolunda üretilmez: uygulama açılışta arka plan yenileyicisini
+# başlatır (start_refresher). Yenileyici dosya yoksa ya da kapsamı
+# "şimdi + ahead_days"i karşılamıyorsa takvimi (geçen yıldan itibaren
+# CALENDAR_YEARS yıl, ~1 sn) yeniden hesaplar ve günde bir kontrol eder.
+# Birden çok süreç aynı dosyayı kilitle paylaşır; hesap bir kez yapılır.
+# Yenileyiciyi çalıştırmayan süreçler (gunicorn --preload ile fork edilen
+# worker'lar) dosyanın değiştiğini get_calendar'da en fazla
+# CALENDAR_CHECK_SECONDS'ta bir os.stat ile görür ve yeni takvimi açar.
+#
+# Önceden hesaplama (backend/ içinden):
+#     python planet_calendar.py [başlangıç_yılı] [yıl_sayısı]
+
+import fcntl
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import PLANET_IDS, PLANET_NAMES, SIGNS
+from returns import _wrap180, find_returns_batch, refine_roots
+
+CALENDAR_PATH = os.environ.get(
+    "CALENDAR_PATH", os.path.join(os.path.dirname(__file__), "data", "planet_calendar.npy")
+)
+# Verilmezse başlangıç her yeniden hesapta "geçen yıl" olur
+CALENDAR_START_YEAR = int(os.environ["CALENDAR_START_YEAR"]) if os.environ.get("CALENDAR_START_YEAR") else None
+CALENDAR_YEARS = int(os.environ.get("CALENDAR_YEARS", "6"))
+# Yenileyicinin kontrol aralığı (sn)
+CALENDAR_REFRESH_SECONDS = 86400
+# get_calendar'ın dosya değişikliği kontrol aralığı (sn)
+CALENDAR_CHECK_SECONDS = float(os.environ.get("CALENDAR_CHECK_SECONDS", "60"))
+
+EVENT_KINDS = (
+    "ingress",
+    "station_retrograde",
+    "station_direct",
+    "new_moon",
+    "full_moon",
+    "solar_eclipse",
+    "lunar_eclipse",
+)
+_KIND = {name: i for i, name in enumerate(EVENT_KINDS)}
+
+ECLIPSE_TYPES = ("partial", "total", "annular", "hybrid", "penumbral")
+
+CALENDAR_DTYPE = np.dtype([
+    ("jd", "f8"),
+    ("kind", "u1"),
+    ("body", "i1"),    # PLANET_NAMES indeksi (lunasyon/tutulmada Ay)
+    ("sign", "i1"),    # yeni burç (ingress) ya da olayın burcu
+    ("detail", "u1"),  # ingress: 1 = retro geçiş; tutulma: ECLIPSE_TYPES indeksi
+    ("lon", "f4"),
+])
+
+# Duruş ve lunasyon taraması için örnekleme adımı (gün)
+SCAN_STEP = 1.0
+# Tutulma adayı için lunasyonda Ay'ın azami ekliptik enlemi (derece)
+SOLAR_ECLIPSE_LAT = 1.6
+LUNAR_ECLIPSE_LAT = 1.1
+
+STATION_BODIES = ("Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto")
+
+
+def _speeds(pid, jds):
+    return np.array([swe.calc_ut(jd, pid, swe.FLG_SWIEPH | swe.FLG_SPEED)[0][3] for jd in jds.tolist()])
+
+
+def _elongation(jds):
+    moon = np.array([swe.calc_ut(jd, swe.MOON)[0][0] for jd in jds.tolist()])
+    sun = np.array([swe.calc_ut(jd, swe.SUN)[0][0] for jd in jds.tolist()])
+    return (moon - sun) % 360.0
+
+
+def _rows(jd, kind, body, sign, detail, lon):
+    arr = np.zeros(len(jd), dtype=CALENDAR_DTYPE)
+    arr["jd"], arr["kind"], arr["body"] = jd, kind, body
+    arr["sign"], arr["detail"], arr["lon"] = sign, detail, lon
+    return arr
+
+
+def _ingresses(start, end):
+    boundaries = np.arange(12) * 30.0
+    parts = []
+    for p, name in enumerate(PLANET_NAMES):
+        pid = PLANET_IDS[name]
+        for b, roots in enumerate(find_returns_batch(name, boundaries, start, end)):
+            if not len(roots):
+                continue
+            speed = _speeds(pid, roots)
+            retro = speed < 0
+            # İleri harekette yeni burç sınırın burcu, geri harekette bir öncekidir
+            sign = np.where(retro, (b - 1) % 12, b)
+            parts.append(_rows(roots, _KIND["ingress"], p, sign, retro.astype(np.uint8), boundaries[b]))
+    return parts
+
+
+def _stations(start, end):
+    grid = np.arange(start, end + SCAN_STEP, SCAN_STEP)
+    parts = []
+    for name in STATION_BODIES:
+        pid = PLANET_IDS[name]
+        v = _speeds(pid, grid)
+        t = np.nonzero(np.sign(v[:-1]) != np.sign(v[1:]))[0]
+        if not len(t):
+            continue
+        roots = refine_roots(lambda x, idx: _speeds(pid, x), grid[t], grid[t + 1], v[t], v[t + 1],
+                             tol=1e-9)
+        lons = np.array([swe.calc_ut(jd, pid)[0][0] for jd in roots.tolist()])
+        kind = np.where(v[t] > 0, _KIND["station_retrograde"], _KIND["station_direct"])
+        parts.append(_rows(roots, kind, PLANET_NAMES.index(name), (lons // 30).astype(int), 0, lons))
+    return parts
+
+
+def _lunations(start, end):
+    grid = np.arange(start, end + SCAN_STEP, SCAN_STEP)
+    elong = _elongation(grid)
+    parts = []
+    moon = PLANET_NAMES.index("Moon")
+    for target, kind, lat_limit, finder, ecl_kind in (
+        (0.0, "new_moon", SOLAR_ECLIPSE_LAT, swe.sol_eclipse_when_glob, "solar_eclipse"),
+        (180.0, "full_moon", LUNAR_ECLIPSE_LAT, swe.lun_eclipse_when, "lunar_eclipse"),
+    ):
+        f = _wrap180(elong - target)
+        fa, fb = f[:-1], f[1:]
+        t = np.nonzero(((fa < 0) & (fb >= 0)) & (np.abs(fb - fa) < 90.0))[0]
+        if not len(t):
+            continue
+        roots = refine_roots(lambda x, idx: _wrap180(_elongation(x) - target),
+                             grid[t], grid[t + 1], fa[t], fb[t])
+        roots = roots[(roots >= start) & (roots <= end)]
+        moon_pos = [swe.calc_ut(jd, swe.MOON)[0] for jd in roots.tolist()]
+        lons = np.array([xx[0] for xx in moon_pos])
+        parts.append(_rows(roots, _KIND[kind], moon, (lons // 30).astype(int), 0, lons))
+
+        # Düğüme yakın lunasyonlar: tutulma türünü ve tam anını swe belirler
+        ecl_jd, ecl_type, ecl_lon = [], [], []
+        for jd, xx in zip(roots.tolist(), moon_pos):
+            if abs(xx[1]) > lat_limit:
+                continue
+            flags, tret = finder(jd - 1.0, swe.FLG_SWIEPH, 0, False)
+            if abs(tret[0] - jd) > 1.0:
+                continue
+            ecl_jd.append(tret[0])
+            ecl_type.append(_eclipse_type(flags))
+            ecl_lon.append(xx[0])
+        if ecl_jd:
+            ecl_lon = np.array(ecl_lon)
+            parts.append(_rows(np.array(ecl_jd), _KIND[ecl_kind], moon, (ecl_lon // 30).astype(int),
+                               ecl_type, ecl_lon))
+    return parts
+
+
+def _eclipse_type(flags):
+    if flags & swe.ECL_ANNULAR_TOTAL:
+        return ECLIPSE_TYPES.index("hybrid")
+    if flags & swe.ECL_TOTAL:
+        return ECLIPSE_TYPES.index("total")
+    if flags & swe.ECL_ANNULAR:
+        return ECLIPSE_TYPES.index("annular")
+    if flags & swe.ECL_PENUMBRAL:
+        return ECLIPSE_TYPES.index("penumbral")
+    return ECLIPSE_TYPES.index("partial")
+
+
+def compute_calendar(start_jd: float, end_jd: float):
+    """[start_jd, end_jd] aralığındaki tüm olaylar → jd'ye göre sıralı CALENDAR_DTYPE dizisi."""
+    parts = _ingresses(start_jd, end_jd) + _stations(start_jd, end_jd) + _lunations(start_jd, end_jd)
+    arr = np.concatenate(parts) if parts else np.zeros(0, dtype=CALENDAR_DTYPE)
+    arr = arr[(arr["jd"] >= start_jd) & (arr["jd"] <= end_jd)]
+    return arr[np.argsort(arr["jd"], kind="stable")]
+
+
+def save_calendar(arr, path=CALENDAR_PATH):
+    """Atomik yazım: yarım dosya hiçbir zaman okunmaz."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _event_dict(row):
+    kind = EVENT_KINDS[int(row["kind"])]
+    y, m, d, hours = swe.revjul(float(row["jd"]), swe.GREG_CAL)
+    minutes = int(round(hours * 60.0))
+    if minutes == 1440:
+        y, m, d, _ = swe.revjul(float(row["jd"]) + 0.5 / 1440.0, swe.GREG_CAL)
+        minutes = 0
+    event = {
+        "jd": float(row["jd"]),
+        "utc": f"{y:04d}-{m:02d}-{d:02d}T{minutes // 60:02d}:{minutes % 60:02d}Z",
+        "kind": kind,
+        "body": PLANET_NAMES[int(row["body"])],
+        "sign": SIGNS[int(row["sign"])],
+        "sign_index": int(row["sign"]),
+        "lon": float(row["lon"]),
+    }
+    if kind == "ingress":
+        event["retrograde"] = bool(row["detail"])
+    elif kind.endswith("eclipse"):
+        event["eclipse_type"] = ECLIPSE_TYPES[int(row["detail"])]
+    return event
+
+
+class PlanetCalendar:
+    """mmap'li olay dizisi üzerinde O(log n) aralık sorguları."""
+
+    __slots__ = ("events",)
+
+    def __init__(self, events):
+        self.events = events
+
+    @classmethod
+    def load(cls, path=CALENDAR_PATH):
+        return cls(np.load(path, mmap_mode="r"))
+
+    @property
+    def start_jd(self):
+        return float(self.events["jd"][0]) if len(self.events) else None
+
+    @property
+    def end_jd(self):
+        return float(self.events["jd"][-1]) if len(self.events) else None
+
+    def __len__(self):
+        return len(self.events)
+
+    def query(self, start_jd, end_jd, kinds=None, bodies=None):
+        """[start_jd, end_jd) içindeki olaylar (opsiyonel tür / gezegen filtresi)."""
+        jd = self.events["jd"]
+        i0 = int(np.searchsorted(jd, start_jd, side="left"))
+        i1 = int(np.searchsorted(jd, end_jd, side="left"))
+        rows = np.asarray(self.events[i0:i1])
+        if kinds:
+            rows = rows[np.isin(rows["kind"], [_KIND[k] for k in kinds])]
+        if bodies:
+            rows = rows[np.isin(rows["body"], [PLANET_NAMES.index(b) for b in bodies])]
+        return [_event_dict(r) for r in rows]
+
+
+class CalendarNotReady(RuntimeError):
+    """Takvim dosyası arka planda henüz hazırlanıyor."""
+
+
+_calendar = None
+_calendar_stamp = None  # açılan dosyanın (inode, mtime_ns) değeri
+_calendar_checked = 0.0
+_calendar_lock = threading.Lock()
+_refresher = None
+
+
+def _file_stamp():
+    # save_calendar os.replace ile yazar: yeni dosya = yeni inode
+    try:
+        st = os.stat(CALENDAR_PATH)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def _now_jd():
+    now = datetime.now(timezone.utc)
+    return swe.julday(now.year, now.month, now.day, now.hour + now.minute / 60.0, swe.GREG_CAL)
+
+
+def _default_span(ahead_days=0):
+    """Geçen yıldan (ya da CALENDAR_START_YEAR'dan) CALENDAR_YEARS yıl; en az şimdi + ahead_days."""
+    year = datetime.now(timezone.utc).year
+    start_year = CALENDAR_START_YEAR if CALENDAR_START_YEAR is not None else year - 1
+    end_year = max(start_year + CALENDAR_YEARS, swe.revjul(_now_jd() + ahead_days, swe.GREG_CAL)[0] + 1)
+    start = swe.julday(start_year, 1, 1, 0.0, swe.GREG_CAL)
+    end = swe.julday(end_year, 1, 1, 0.0, swe.GREG_CAL)
+    return start, end
+
+
+def _covers(calendar, ahead_days):
+    # Son olay kapsam sonundan en fazla ~15 gün (bir lunasyon) öncedir
+    now = _now_jd()
+    return len(calendar) > 0 and calendar.start_jd <= now and calendar.end_jd >= now + ahead_days
+
+
+def _load_if_covers(ahead_days):
+    if not os.path.exists(CALENDAR_PATH):
+        return None
+    calendar = PlanetCalendar.load()
+    return calendar if _covers(calendar, ahead_days) else None
+
+
+def refresh_calendar(ahead_days=0) -> PlanetCalendar:
+    """
+    Dosya yoksa ya da şimdi + ahead_days'i kapsamıyorsa takvimi yeniden
+    hesaplayıp yazar ve süreçteki takvimi değiştirir. Süreçler arası dosya
+    kilidi: hesabı bir süreç yapar, diğerleri bitmesini bekleyip dosyayı açar.
+    Eski takvimi kullanan sorgular mmap'leri sayesinde etkilenmez.
+    """
+    global _calendar, _calendar_stamp
+    calendar = _load_if_covers(ahead_days)
+    if calendar is None:
+        os.makedirs(os.path.dirname(CALENDAR_PATH), exist_ok=True)
+        with open(f"{CALENDAR_PATH}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                calendar = _load_if_covers(ahead_days)
+                if calendar is None:
+                    save_calendar(compute_calendar(*_default_span(ahead_days)))
+                    calendar = PlanetCalendar.load()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    with _calendar_lock:
+        _calendar, _calendar_stamp = calendar, _file_stamp()
+    return calendar
+
+
+def _refresh_loop(ahead_days):
+    while True:
+        try:
+            refresh_calendar(ahead_days)
+        except Exception:
+            traceback.print_exc()
+        time.sleep(CALENDAR_REFRESH_SECONDS)
+
+
+def start_refresher(ahead_days=0):
+    """Arka plan yenileyicisini başlatır (süreç başına bir kez)."""
+    global _refresher
+    if _refresher is None:
+        _refresher = threading.Thread(target=_refresh_loop, args=(ahead_days,),
+                                      name="planet-calendar", daemon=True)
+        _refresher.start()
+    return _refresher
+
+
+def get_calendar() -> PlanetCalendar:
+    """
+    Süreç başına tek takvim. Dosya varsa mmap ile açılır; başka bir süreç
+    dosyayı yeniden yazdıysa (en geç CALENDAR_CHECK_SECONDS içinde) yenisi
+    açılır. Dosya yoksa: yenileyici çalışıyorsa CalendarNotReady (istek
+    yolunda hesap yapılmaz), aksi halde (betikler, benchmark'lar) takvim
+    burada hesaplanıp yazılır.
+    """
+    global _calendar, _calendar_stamp, _calendar_checked
+    if _calendar is None or time.monotonic() - _calendar_checked >= CALENDAR_CHECK_SECONDS:
+        with _calendar_lock:
+            now = time.monotonic()
+            if _calendar is None or now - _calendar_checked >= CALENDAR_CHECK_SECONDS:
+                _calendar_checked = now
+                stamp = _file_stamp()
+                if stamp is not None and stamp != _calendar_stamp:
+                    _calendar, _calendar_stamp = PlanetCalendar.load(), stamp
+        if _calendar is None:
+            if _refresher is not None:
+                raise CalendarNotReady("Gezegen takvimi hazırlanıyor")
+            return refresh_calendar()
+    return _calendar
+
+
+if __name__ == "__main__":
+    start, end = _default_span()
+    if len(sys.argv) > 1:
+        year = int(sys.argv[1])
+        years = int(sys.argv[2]) if len(sys.argv) > 2 else CALENDAR_YEARS
+        start = swe.julday(year, 1, 1, 0.0, swe.GREG_CAL)
+        end = swe.julday(year + years, 1, 1, 0.0, swe.GREG_CAL)
+    events = compute_calendar(start, end)
+    save_calendar(events)
+    print(f"{len(events)} olay, {os.path.getsize(CALENDAR_PATH)} byte → {CALENDAR_PATH}")
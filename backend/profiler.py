@@ -0,0 +1,320 @@
+# profiler.py
+# ===================
+# MystAI - İsteğe bağlı istek profilleme (canlı worker'da CPU nereye gidiyor?)
+#
+# Bir istek şu durumlarda profillenir:
+# - PROFILE_SAMPLE_RATE > 0 ise bu oranda rastgele seçilen istekler
+# - "X-Profile: <PROFILE_ADMIN_TOKEN>" başlığı taşıyan istekler
+#
+# Modlar (PROFILE_MODE):
+# - "sample"  : tek bir örnekleyici iş parçacığı, profillenen isteklerin
+#               thread'lerinin yığınını PROFILE_INTERVAL'de bir okur
+#               (sys._current_frames). Maliyet istek thread'ine yansımaz.
+# - "cprofile": istek thread'inde cProfile; fonksiyon bazlı kesin süreler
+#               (.pstats), ama istek ~%30-100 yavaşlar.
+#
+# Çıktı (PROFILE_DIR):
+# - {endpoint}.collapsed : endpoint başına birikmiş yığınlar, "a;b;c sayı"
+#                          satırları (flamegraph.pl, speedscope, inferno)
+# - req/{id}.collapsed | req/{id}.pstats : tek istek; en fazla PROFILE_KEEP dosya
+# Render havuzuna giden işler (render_pool.run) worker'da aynı modda
+# profillenir ve sonuçla geri döner: yığınlar çağıran satırın altına
+# "[render worker]" düğümüyle eklenir (bekleme örnekleri de ayrıca kalır),
+# cProfile istatistikleri .pstats dosyasına eklenir.
+# Sınırlar: aynı anda en fazla PROFILE_MAX_ACTIVE istek, endpoint başına en
+# fazla PROFILE_MAX_STACKS farklı yığın (fazlası "[diğer]" satırında toplanır).
+
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN", "")
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "sample")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "/tmp/mystai-profiles")
+PROFILE_MAX_ACTIVE = int(os.environ.get("PROFILE_MAX_ACTIVE", "2"))
+PROFILE_MAX_STACKS = int(os.environ.get("PROFILE_MAX_STACKS", "5000"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "200"))
+
+PROFILE_MODES = ("sample", "cprofile")
+OVERFLOW_STACK = "[diğer]"
+WORKER_FRAME = "[render worker]"
+# Yığın bu derinlikten sonra kesilir (özyinelemeli çağrılar için)
+MAX_DEPTH = 128
+
+_THIS_FILE = os.path.abspath(__file__)
+_current = ContextVar("profile_session", default=None)
+
+
+def _collapse(frame):
+    """Frame zinciri → "dosya.py:fonksiyon;..." (kökten yaprağa)."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        if code.co_filename != _THIS_FILE:
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _atomic_write(path, text):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _collapsed_text(counter):
+    return "".join(f"{stack} {n}\n" for stack, n in counter.most_common())
+
+
+class _PstatsData:
+    """pstats.Stats.add için: worker'dan gelen stats sözlüğünü Profile gibi sunar."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def current_session():
+    """Bu istekte (thread/context) etkin profil oturumu veya None."""
+    return _current.get()
+
+
+def profile_call(mode, fn, *args, **kwargs):
+    """
+    Worker tarafı: fn'i verilen modda profilleyerek çalıştırır, (sonuç, veri)
+    döner. Veri "sample" için {yığın: sayı} (bu çağrının altındaki kısım),
+    "cprofile" için pstats sözlüğüdür; Profiler.attach ile oturuma eklenir.
+    """
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            prof.disable()
+        prof.create_stats()
+        return result, prof.stats
+    base = _collapse(sys._getframe())
+    ident = threading.get_ident()
+    profiler.sampler.add(ident)
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        samples = profiler.sampler.remove(ident)
+    cut = len(base) + 1
+    return result, {stack[cut:]: n for stack, n in samples.items() if stack.startswith(base + ";")}
+
+
+class StackSampler:
+    """Kayıtlı thread'lerin yığınlarını aralıklarla örnekleyen tek arka plan thread'i."""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._targets = {}  # thread ident → Counter
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, ident):
+        counter = Counter()
+        with self._lock:
+            self._targets[ident] = counter
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return counter
+
+    def remove(self, ident):
+        """Thread'i çıkarır ve sayacını döner; döndükten sonra sayaç bir daha değişmez."""
+        with self._lock:
+            return self._targets.pop(ident, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idents = list(self._targets)
+            if not idents:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            # Yığınlar kilit dışında çıkarılır; sayaçlar kilit altında ve yalnızca
+            # hâlâ kayıtlı thread'ler için artırılır (remove sonrası yazım olmaz)
+            stacks = [(ident, _collapse(frames[ident])) for ident in idents if ident in frames]
+            del frames
+            with self._lock:
+                for ident, stack in stacks:
+                    counter = self._targets.get(ident)
+                    if counter is not None:
+                        counter[stack] += 1
+            time.sleep(self.interval)
+
+
+class Session:
+    __slots__ = ("id", "endpoint", "mode", "ident", "started", "samples", "profile", "worker")
+
+    def __init__(self, endpoint, mode):
+        self.id = uuid.uuid4().hex[:16]
+        self.endpoint = endpoint
+        self.mode = mode
+        self.ident = threading.get_ident()
+        self.started = time.perf_counter()
+        self.samples = None
+        self.profile = None
+        self.worker = []  # (çağıran yığın, profile_call verisi)
+
+
+class Profiler:
+    def __init__(self, sample_rate=PROFILE_SAMPLE_RATE, admin_token=PROFILE_ADMIN_TOKEN,
+                 mode=PROFILE_MODE, out_dir=PROFILE_DIR, max_active=PROFILE_MAX_ACTIVE,
+                 max_stacks=PROFILE_MAX_STACKS, keep=PROFILE_KEEP, interval=PROFILE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"PROFILE_MODE {PROFILE_MODES} içinden olmalı")
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+        self.mode = mode
+        self.out_dir = out_dir
+        self.max_active = max_active
+        self.max_stacks = max_stacks
+        self.keep = keep
+        self.sampler = StackSampler(interval)
+        self.aggregates = {}  # endpoint → Counter
+        self.profiled = 0
+        self.skipped = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or bool(self.admin_token)
+
+    def is_admin(self, header_value):
+        return bool(self.admin_token and header_value
+                    and hmac.compare_digest(header_value.encode(), self.admin_token.encode()))
+
+    def start(self, endpoint, header_value=None):
+        """Bu istek profillenecekse Session, aksi halde None döner."""
+        forced = self.is_admin(header_value)
+        if not forced and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+        with self._lock:
+            if self._active >= self.max_active:
+                self.skipped += 1
+                return None
+            self._active += 1
+        session = Session(endpoint or "unmatched", self.mode)
+        if session.mode == "cprofile":
+            session.profile = cProfile.Profile()
+            try:
+                session.profile.enable()
+            except ValueError:
+                # Başka bir profiler etkin (3.12+ sys.monitoring) → örneklemeye düş
+                session.profile = None
+                session.mode = "sample"
+        if session.mode == "sample":
+            session.samples = self.sampler.add(session.ident)
+        _current.set(session)
+        return session
+
+    def attach(self, session, data):
+        """Worker'da profile_call ile toplanan veriyi oturuma ekler (çağıran thread'de)."""
+        session.worker.append((_collapse(sys._getframe(1)), data))
+
+    def stop(self, session):
+        """Profili bitirir, dosyaları yazar; tek istek dosyasının yolunu döner."""
+        # Önce örneklemeyi durdur; dosya yazımı hata verse de thread takılı kalmaz
+        _current.set(None)
+        if session.mode == "cprofile":
+            session.profile.disable()
+        else:
+            self.sampler.remove(session.ident)
+            for caller, samples in session.worker:
+                for stack, n in samples.items():
+                    session.samples[f"{caller};{WORKER_FRAME};{stack}"] += n
+        seconds = time.perf_counter() - session.started
+        try:
+            req_dir = os.path.join(self.out_dir, "req")
+            os.makedirs(req_dir, exist_ok=True)
+            if session.mode == "cprofile":
+                path = os.path.join(req_dir, f"{session.id}.pstats")
+                stats = pstats.Stats(session.profile)
+                for _, data in session.worker:
+                    stats.add(_PstatsData(data))
+                stats.dump_stats(path)
+            else:
+                path = os.path.join(req_dir, f"{session.id}.collapsed")
+                _atomic_write(path, _collapsed_text(session.samples))
+                self._merge(session.endpoint, session.samples)
+            with self._lock:
+                self.profiled += 1
+            self._prune(req_dir)
+            print(f"profile {session.id} {session.endpoint} {seconds * 1000:.0f} ms → {path}", file=sys.stderr)
+            return path
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _merge(self, endpoint, samples):
+        with self._lock:
+            total = self.aggregates.setdefault(endpoint, Counter())
+            for stack, n in samples.items():
+                if stack in total or len(total) < self.max_stacks:
+                    total[stack] += n
+                else:
+                    total[OVERFLOW_STACK] += n
+            text = _collapsed_text(total)
+        _atomic_write(os.path.join(self.out_dir, f"{endpoint}.collapsed"), text)
+
+    def _prune(self, req_dir):
+        names = os.listdir(req_dir)
+        if len(names) <= self.keep:
+            return
+        paths = sorted((os.path.join(req_dir, n) for n in names), key=os.path.getmtime)
+        for path in paths[: len(paths) - self.keep]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def request_file(self, profile_id):
+        """Tek istek profil dosyası (id yalnızca hex olabilir) veya None."""
+        if not profile_id.isalnum():
+            return None
+        for ext in ("collapsed", "pstats"):
+            path = os.path.join(self.out_dir, "req", f"{profile_id}.{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def summary(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "sample_rate": self.sample_rate,
+                "profiled": self.profiled,
+                "skipped": self.skipped,
+                "active": self._active,
+                "endpoints": {ep: sum(c.values()) for ep, c in self.aggregates.items()},
+            }
+
+    def aggregate_text(self, endpoint):
+        with self._lock:
+            counter = self.aggregates.get(endpoint)
+            return None if counter is None else _collapsed_text(counter)
+
+
+profiler = Profiler()
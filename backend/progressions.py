@@ -0,0 +1,216 @@
+# progressions.py
+# ===================
+# MystAI - İkincil progresyonlar + Solar Arc direksiyonları
+#
+# "Bir gün = bir yıl": doğumdan t yıl sonraki progresyon, doğumdan t gün
+# sonraki gökyüzüdür. 90 yıllık bir zaman çizelgesi sadece ~90 günlük
+# efemeris gerektirir. Bu dilim kullanıcı başına BİR kez, 6 saatlik adımlarla
+# hesaplanır (ProgressionSlice) ve sonraki tüm sorgular numpy enterpolasyonu
+# ile bu dilimden okunur.
+#
+# - progressed_positions : tarih aralığında konumları akış (generator) olarak verir
+# - aspect_events        : progresyon/solar arc → natal açıların tam tarihlerini
+#                          pencere pencere (generator) verir
+
+from functools import lru_cache
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import ASPECT_TYPES, PLANET_IDS, PLANET_NAMES, ChartRecord
+
+# Tropikal yıl (gün) — "bir gün = bir yıl" ölçeği
+YEAR_DAYS = 365.24219
+
+# Dilim örnekleme adımı (efemeris günü). 0.25 gün ≈ gerçek hayatta 3 ay;
+# Ay için doğrusal enterpolasyon hatası ~0.005°.
+SAMPLE_STEP = 0.25
+
+# Bir dilimin kapsadığı azami yaş
+MAX_YEARS = 120
+
+# aspect_events pencere boyutu (örnek sayısı) — uzun aralıklar parça parça akar
+EVENT_WINDOW = 64
+
+NATAL_POINTS = PLANET_NAMES + ("ASC", "MC")
+
+# İşaretli hedef açılar: 0, ±60, ±90, ±120, 180
+_TARGETS = []
+for _name, _angle, _ in ASPECT_TYPES:
+    _TARGETS.append((_name, float(_angle)))
+    if 0 < _angle < 180:
+        _TARGETS.append((_name, -float(_angle)))
+_TARGET_NAMES = [name for name, _ in _TARGETS]
+_TARGET_ANGLES = np.array([angle for _, angle in _TARGETS])
+
+
+def _wrap180(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def date_to_jd(date_str: str) -> float:
+    """'YYYY-MM-DD' → 0h UT Julian Day."""
+    y, m, d = map(int, date_str.split("-"))
+    return swe.julday(y, m, d, 0.0, swe.GREG_CAL)
+
+
+def jd_to_date(jd: float) -> str:
+    y, m, d, _ = swe.revjul(jd, swe.GREG_CAL)
+    return f"{y:04d}-{m:02d}-{d:02d}"
+
+
+class ProgressionSlice:
+    """
+    Natal andan başlayan, unwrap edilmiş gezegen boylamlarından oluşan
+    (T, P) efemeris dilimi. Gerçek tarih → progresyon anı dönüşümü ve
+    enterpolasyon burada yapılır.
+    """
+
+    __slots__ = ("natal_jd", "prog_jd", "lons")
+
+    def __init__(self, natal_jd: float, years: int = MAX_YEARS, step: float = SAMPLE_STEP):
+        self.natal_jd = natal_jd
+        self.prog_jd = natal_jd + np.arange(0.0, years + step, step)
+
+        lons = np.empty((len(self.prog_jd), len(PLANET_IDS)))
+        for t, jd in enumerate(self.prog_jd):
+            for p, pid in enumerate(PLANET_IDS.values()):
+                lons[t, p] = swe.calc_ut(jd, pid)[0][0]
+        # 360→0 sıçramalarını kaldır; enterpolasyon ve kök arama sürekli olsun
+        self.lons = np.unwrap(lons, period=360.0, axis=0)
+
+    def progressed_jd(self, real_jd):
+        return self.natal_jd + (np.asarray(real_jd, dtype=float) - self.natal_jd) / YEAR_DAYS
+
+    def real_jd(self, prog_jd):
+        return self.natal_jd + (np.asarray(prog_jd, dtype=float) - self.natal_jd) * YEAR_DAYS
+
+    def at(self, real_jd):
+        """Gerçek tarih(ler) → (…, P) progresyon boylamları (0–360)."""
+        pj = np.atleast_1d(self.progressed_jd(real_jd))
+        if pj.min() < self.prog_jd[0] or pj.max() > self.prog_jd[-1]:
+            raise ValueError("Tarih progresyon diliminin dışında")
+        pos = np.searchsorted(self.prog_jd, pj, side="right") - 1
+        pos = np.clip(pos, 0, len(self.prog_jd) - 2)
+        frac = (pj - self.prog_jd[pos]) / (self.prog_jd[pos + 1] - self.prog_jd[pos])
+        out = self.lons[pos] + (self.lons[pos + 1] - self.lons[pos]) * frac[:, None]
+        return out % 360.0
+
+
+@lru_cache(maxsize=256)
+def progression_slice(natal_jd: float, years: int = MAX_YEARS) -> ProgressionSlice:
+    """Kullanıcı başına tek dilim (natal JD ile cache'lenir)."""
+    return ProgressionSlice(natal_jd, years)
+
+
+def _natal_points(record: ChartRecord):
+    return np.concatenate([record.lons, [record.asc, record.mc]])
+
+
+def progressed_positions(record: ChartRecord, start_date: str, end_date: str, step_days: int = 30):
+    """
+    [start_date, end_date] aralığında step_days aralıklarla progresyon ve
+    solar arc konumlarını akış olarak üretir:
+        {"date", "secondary": {gezegen: boylam}, "solar_arc": {nokta: boylam}, "arc"}
+    """
+    sl = progression_slice(record.julian_day)
+    natal = _natal_points(record)
+    natal_sun = record.lons[0]
+
+    start = max(date_to_jd(start_date), record.julian_day)
+    end = date_to_jd(end_date)
+    # Akış başlamadan (ilk next()'te) doğrulanır; parça ortasında hata olmasın
+    if sl.progressed_jd(end) > sl.prog_jd[-1]:
+        raise ValueError("Tarih progresyon diliminin dışında")
+
+    chunk = 512
+    jds = np.arange(start, end + 1e-9, step_days)
+    for k in range(0, len(jds), chunk):
+        block = jds[k:k + chunk]
+        prog = sl.at(block)
+        arc = (prog[:, 0] - natal_sun) % 360.0
+        directed = (natal[None, :] + arc[:, None]) % 360.0
+        for jd, p_row, d_row, a in zip(block.tolist(), prog.tolist(), directed.tolist(), arc.tolist()):
+            yield {
+                "date": jd_to_date(jd),
+                "secondary": dict(zip(PLANET_NAMES, p_row)),
+                "solar_arc": dict(zip(NATAL_POINTS, d_row)),
+                "arc": a,
+            }
+
+
+def _crossings(f):
+    """
+    f: (T, ...) hedefe uzaklık (wrap180). İşaret değişimi olan ve sarma
+    sıçraması olmayan aralıkları ve doğrusal kök kesrini döndürür.
+    """
+    a, b = f[:-1], f[1:]
+    hit = ((a <= 0) & (b > 0) | (a >= 0) & (b < 0)) & (np.abs(b - a) < 90.0)
+    idx = np.nonzero(hit)
+    fa, fb = a[idx], b[idx]
+    frac = np.where(fb != fa, fa / (fa - fb), 0.0)
+    return idx, frac
+
+
+def aspect_events(record: ChartRecord, start_date: str, end_date: str,
+                  techniques=("secondary", "solar_arc")):
+    """
+    Progresyon / solar arc noktalarının natal noktalara (gezegenler + ASC + MC)
+    majör açı yaptığı tam tarihleri kronolojik sırayla akış olarak üretir:
+        {"date", "jd", "technique", "body", "aspect", "natal"}
+    Hesap EVENT_WINDOW örneklik pencerelerle ilerler; bellek aralık
+    uzunluğundan bağımsızdır.
+    """
+    sl = progression_slice(record.julian_day)
+    natal = _natal_points(record)
+    natal_sun = sl.lons[0, 0]
+
+    start = max(date_to_jd(start_date), record.julian_day)
+    end = date_to_jd(end_date)
+    p_start, p_end = sl.progressed_jd(start), sl.progressed_jd(end)
+    if p_end > sl.prog_jd[-1]:
+        raise ValueError("Tarih progresyon diliminin dışında")
+
+    i0 = max(int(np.searchsorted(sl.prog_jd, p_start, side="right")) - 1, 0)
+    i1 = min(int(np.searchsorted(sl.prog_jd, p_end, side="left")), len(sl.prog_jd) - 1)
+
+    # (1, N, K) hedef: natal nokta + açı (gezegen ekseninde broadcast)
+    targets = natal[None, :, None] + _TARGET_ANGLES[None, None, :]
+
+    for w0 in range(i0, i1, EVENT_WINDOW):
+        w1 = min(w0 + EVENT_WINDOW, i1) + 1
+        prog_jd = sl.prog_jd[w0:w1]
+        lons = sl.lons[w0:w1]
+
+        events = []
+        for technique in techniques:
+            if technique == "secondary":
+                moving = lons[:, :, None, None]
+            elif technique == "solar_arc":
+                arc = lons[:, 0] - natal_sun
+                moving = natal[None, :, None, None] + arc[:, None, None, None]
+            else:
+                raise ValueError(f"Bilinmeyen teknik: {technique}")
+
+            f = _wrap180(moving - targets[None])
+            (t, p, n, k), frac = _crossings(f)
+            jd_prog = prog_jd[t] + frac * (prog_jd[t + 1] - prog_jd[t])
+            jd_real = sl.real_jd(jd_prog)
+
+            names = PLANET_NAMES if technique == "secondary" else NATAL_POINTS
+            for jd, pi, ni, ki in zip(jd_real.tolist(), p.tolist(), n.tolist(), k.tolist()):
+                if technique == "solar_arc" and pi == ni:
+                    continue  # bir noktanın kendi natal konumuna arc'ı anlamsız
+                if not start <= jd <= end or jd <= record.julian_day + 1e-6:
+                    continue  # aralık dışı ya da doğumda zaten tam olan açı
+                events.append({
+                    "date": jd_to_date(jd),
+                    "jd": jd,
+                    "technique": technique,
+                    "body": names[pi],
+                    "aspect": _TARGET_NAMES[ki],
+                    "natal": NATAL_POINTS[ni],
+                })
+
+        events.sort(key=lambda e: e["jd"])
+        yield from events
@@ -0,0 +1,319 @@
+# rectification.py
+# ===================
+# MystAI - Doğum saati rektifikasyonu
+#
+# Doğum saati bilinmeyen kullanıcı için gün (veya saat penceresi) içindeki
+# aday dakikalar, kullanıcının verdiği hayat olaylarına göre puanlanır.
+#
+# Gün içinde gezegenler neredeyse hareketsizdir; hızlı değişen ASC/MC ve
+# evlerdir. Bu yüzden:
+#   - natal gezegenler pencerenin iki ucunda BİR kez hesaplanır, adaylar
+#     için doğrusal enterpolasyonla okunur
+#   - olay tarihlerindeki transit gezegenler ve solar arc değerleri olay
+#     başına BİR kez hesaplanır
+#   - aday başına yalnızca evler (compute_houses_batch) hesaplanır
+# RECTIFY_WORKERS > 1 ise adaylar parçalara bölünüp süreç havuzuna
+# (ProcessPoolExecutor) dağıtılır.
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import (
+    DEFAULT_HOUSE_SYSTEM,
+    PLANET_IDS,
+    PLANET_NAMES,
+    assign_houses,
+    compute_houses_batch,
+    degree_to_sign,
+)
+from progressions import YEAR_DAYS, date_to_jd
+
+ANGLES = ("ASC", "MC", "DSC", "IC")
+
+# Karşıt açılar aynı geometriyi paylaştığından skor eksen bazında hesaplanır
+AXES = ("ASC/DSC", "MC/IC")
+_AXIS_OF = {"ASC": 0, "DSC": 0, "MC": 1, "IC": 1}
+
+# Olay türü → (ilgili açılar, ilgili ev)
+EVENT_TYPES = {
+    "marriage": (("DSC", "ASC"), 7),
+    "divorce": (("DSC", "ASC"), 7),
+    "relationship": (("DSC",), 7),
+    "child": (("ASC", "IC"), 5),
+    "career": (("MC",), 10),
+    "job_loss": (("MC", "IC"), 10),
+    "education": (("MC",), 9),
+    "relocation": (("IC", "ASC"), 4),
+    "death": (("IC", "ASC"), 8),
+    "illness": (("ASC",), 6),
+    "accident": (("ASC",), 1),
+    "other": (ANGLES, 0),
+}
+
+# Transit olarak değerlendirilen yavaş gezegenler ve ağırlıkları
+TRANSIT_WEIGHTS = {
+    "Mars": 0.5,
+    "Jupiter": 1.0,
+    "Saturn": 1.0,
+    "Uranus": 1.2,
+    "Neptune": 0.8,
+    "Pluto": 1.2,
+}
+_TRANSIT_IDX = np.array([PLANET_NAMES.index(n) for n in TRANSIT_WEIGHTS])
+_TRANSIT_W = np.array(list(TRANSIT_WEIGHTS.values()))
+
+# Açı → ağırlık (sert açılar olaylarla daha güçlü ilişkilendirilir)
+_ASPECT_ANGLES = np.array([0.0, 60.0, 90.0, 120.0, 180.0])
+_ASPECT_NAMES = ("conjunction", "sextile", "square", "trine", "opposition")
+_ASPECT_W = np.array([1.0, 0.3, 0.7, 0.4, 0.9])
+
+TRANSIT_ORB = 2.0
+ARC_ORB = 1.0
+ARC_WEIGHT = 1.5
+HOUSE_WEIGHT = 0.3
+
+MAX_EVENTS = 20
+DEFAULT_STEP_MINUTES = 1
+
+# Süreç havuzu (varsayılan kapalı): tam gün × 20 olay tek çekirdekte
+# ~0.2 sn sürer; havuz yalnızca çok çekirdekli makinede ve bu kadar
+# adaydan fazlası için kullanılır. Gunicorn'da her worker kendi havuzunu açar.
+RECTIFY_WORKERS = int(os.environ.get("RECTIFY_WORKERS", "1"))
+PARALLEL_MIN_CANDIDATES = 240
+
+_pool = None
+_pool_pid = None
+
+
+def _get_pool():
+    # Havuz thread'li sunucu içinde tembel açılır: fork kilitli durumları
+    # kopyalayabileceği için "spawn" (render_pool.py ile aynı). Fork edilmiş
+    # bir süreçte (gunicorn --preload) ebeveynin havuzu kullanılamaz.
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ProcessPoolExecutor(
+            max_workers=RECTIFY_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def _wrap180(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def _linear_score(orb, max_orb):
+    return np.clip(1.0 - orb / max_orb, 0.0, None)
+
+
+def candidate_times(date_str, tz_name, start_time="00:00", end_time="23:59",
+                    step_minutes=DEFAULT_STEP_MINUTES):
+    """
+    Yerel gün içindeki aday saatler → (['HH:MM', ...], (N,) JD UT).
+    Yaz saati geçişleri her aday için ayrı ayrı çözülür.
+    """
+    if step_minutes < 1:
+        raise ValueError("step_minutes en az 1 olmalı")
+    y, m, d = map(int, date_str.split("-"))
+    h0, m0 = map(int, start_time.split(":"))
+    h1, m1 = map(int, end_time.split(":"))
+    first, last = h0 * 60 + m0, h1 * 60 + m1
+    if last < first:
+        raise ValueError("end_time, start_time'dan önce olamaz")
+
+    tz = ZoneInfo(tz_name)
+    base = datetime(y, m, d)
+    labels, jds = [], []
+    for minute in range(first, last + 1, step_minutes):
+        local = (base + timedelta(minutes=minute)).replace(tzinfo=tz)
+        utc = local.astimezone(timezone.utc)
+        labels.append(f"{minute // 60:02d}:{minute % 60:02d}")
+        jds.append(swe.julday(utc.year, utc.month, utc.day,
+                              utc.hour + utc.minute / 60.0, swe.GREG_CAL))
+    return labels, np.array(jds)
+
+
+def _planets_at(jd):
+    return np.array([swe.calc_ut(jd, pid)[0][0] for pid in PLANET_IDS.values()])
+
+
+def build_context(jds, events):
+    """
+    Adaylardan bağımsız her şey (gezegen enterpolasyonu, olay transitleri,
+    solar arc'lar, olay maskeleri). Süreçlere gönderilen küçük numpy paketi.
+    """
+    if not events:
+        raise ValueError("En az bir olay gerekli")
+    if len(events) > MAX_EVENTS:
+        raise ValueError(f"En fazla {MAX_EVENTS} olay gönderilebilir")
+
+    jd0, jd1 = float(jds[0]), float(jds[-1])
+    lons0 = _planets_at(jd0)
+    rate = np.zeros_like(lons0)
+    if jd1 > jd0:
+        rate = _wrap180(_planets_at(jd1) - lons0) / (jd1 - jd0)
+
+    sun0 = lons0[0]
+    transit, arcs, masks, houses, weights = [], [], [], [], []
+    for ev in events:
+        if not ev.get("date"):
+            raise ValueError("Her olay için date zorunlu")
+        kind = ev.get("type") or "other"
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"Bilinmeyen olay türü: {kind}")
+        ev_jd = date_to_jd(ev["date"]) + 0.5
+        if ev_jd <= jd0:
+            raise ValueError(f"Olay tarihi doğumdan önce: {ev['date']}")
+
+        angles, house = EVENT_TYPES[kind]
+        transit.append(_planets_at(ev_jd)[_TRANSIT_IDX])
+        prog_sun = swe.calc_ut(jd0 + (ev_jd - jd0) / YEAR_DAYS, swe.SUN)[0][0]
+        arcs.append((prog_sun - sun0) % 360.0)
+        mask = [0.0] * len(AXES)
+        for a in angles:
+            mask[_AXIS_OF[a]] = 1.0
+        masks.append(mask)
+        houses.append(house)
+        # weight=0 geçerli: olay skora katılmaz (yalnızca eksik/None → 1.0)
+        w = ev.get("weight")
+        weights.append(1.0 if w is None else float(w))
+
+    return {
+        "jd0": jd0,
+        "lons0": lons0,
+        "rate": rate,
+        "transit": np.array(transit),              # (E, T)
+        "arcs": np.array(arcs),                    # (E,)
+        "axis_mask": np.array(masks),              # (E, 2)
+        "houses": np.array(houses),                # (E,)
+        "weights": np.array(weights),              # (E,)
+    }
+
+
+def _contacts(jds, lat, lon, house_system, ctx):
+    """
+    Adaylar için katkı dizileri:
+        transit (N, E, T, 2, K), arc_angles (N, E, 2, P), arc_planets (N, E, P, 2),
+        house (N, E, T), ve eksenler (N, 2) = ASC, MC
+    """
+    n = len(jds)
+    natal = (ctx["lons0"][None, :] + ctx["rate"][None, :] * (jds - ctx["jd0"])[:, None]) % 360.0
+
+    h = compute_houses_batch(jds, np.full(n, lat), np.full(n, lon), house_system)
+    asc, mc = h["ascmc"][:, 0], h["ascmc"][:, 1]
+    angles = np.stack([asc, mc], axis=1)
+
+    ev_w = ctx["weights"][None, :, None] * ctx["axis_mask"][None, :, :]  # (1, E, 2)
+
+    # Transit gezegen → aday eksenler (ASC/MC'ye göre tüm majör açılar)
+    sep = np.abs(_wrap180(ctx["transit"][None, :, :, None] - angles[:, None, None, :]))
+    orb = np.abs(sep[..., None] - _ASPECT_ANGLES)
+    transit = (_linear_score(orb, TRANSIT_ORB) * _ASPECT_W
+               * _TRANSIT_W[None, None, :, None, None] * ev_w[:, :, None, :, None])
+
+    # Solar arc eksenler → natal gezegenler (kavuşum/karşıt)
+    directed = angles[:, None, :] + ctx["arcs"][None, :, None]
+    sep = np.abs(_wrap180(directed[..., None] - natal[:, None, None, :]))
+    orb = np.minimum(sep, 180.0 - sep)
+    arc_angles = _linear_score(orb, ARC_ORB) * ARC_WEIGHT * ev_w[..., None]
+
+    # Solar arc gezegenler → aday eksenler
+    directed = natal[:, None, :] + ctx["arcs"][None, :, None]
+    sep = np.abs(_wrap180(directed[..., None] - angles[:, None, None, :]))
+    orb = np.minimum(sep, 180.0 - sep)
+    arc_planets = _linear_score(orb, ARC_ORB) * ARC_WEIGHT * ev_w[:, :, None, :]
+
+    # Transit gezegenin olayla ilgili evde olması
+    e, t = ctx["transit"].shape
+    in_house = assign_houses(np.broadcast_to(ctx["transit"].ravel(), (n, e * t)), h["cusps"])
+    in_house = in_house.reshape(n, e, t) == ctx["houses"][None, :, None]
+    house = in_house * HOUSE_WEIGHT * _TRANSIT_W[None, None, :] * ctx["weights"][None, :, None]
+
+    return transit, arc_angles, arc_planets, house, angles
+
+
+def _score_chunk(jds, lat, lon, house_system, ctx):
+    """Süreç havuzu işi: aday parçası → (toplam skor, ASC, MC)."""
+    transit, arc_angles, arc_planets, house, angles = _contacts(jds, lat, lon, house_system, ctx)
+    n = len(jds)
+    score = (transit.reshape(n, -1).sum(axis=1) + arc_angles.reshape(n, -1).sum(axis=1)
+             + arc_planets.reshape(n, -1).sum(axis=1) + house.reshape(n, -1).sum(axis=1))
+    return score, angles[:, 0], angles[:, 1]
+
+
+def score_candidates(jds, lat, lon, house_system, ctx, workers=None):
+    """Tüm adayları puanlar; aday sayısı yeterince büyükse süreç havuzuna dağıtır."""
+    jds = np.asarray(jds, dtype=float)
+    workers = RECTIFY_WORKERS if workers is None else workers
+    if workers <= 1 or len(jds) < PARALLEL_MIN_CANDIDATES:
+        return _score_chunk(jds, lat, lon, house_system, ctx)
+
+    size = math.ceil(len(jds) / workers)
+    chunks = [jds[i:i + size] for i in range(0, len(jds), size)]
+    pool = _get_pool()
+    futures = [pool.submit(_score_chunk, c, lat, lon, house_system, ctx) for c in chunks]
+    parts = [f.result() for f in futures]
+    return tuple(np.concatenate(x) for x in zip(*parts))
+
+
+def explain_candidate(jd, lat, lon, house_system, ctx, events):
+    """Tek aday için skora katkı veren temasları listeler (güçlüden zayıfa)."""
+    transit, arc_angles, arc_planets, house, _ = _contacts(
+        np.array([jd]), lat, lon, house_system, ctx)
+    transit_names = list(TRANSIT_WEIGHTS)
+    hits = []
+    for e, t, a, k in zip(*np.nonzero(transit[0])):
+        hits.append((transit[0, e, t, a, k], e, "transit", transit_names[t], _ASPECT_NAMES[k], ANGLES[a]))
+    for e, a, p in zip(*np.nonzero(arc_angles[0])):
+        hits.append((arc_angles[0, e, a, p], e, "solar_arc", AXES[a], "contact", PLANET_NAMES[p]))
+    for e, p, a in zip(*np.nonzero(arc_planets[0])):
+        hits.append((arc_planets[0, e, p, a], e, "solar_arc", PLANET_NAMES[p], "contact", AXES[a]))
+    for e, t in zip(*np.nonzero(house[0])):
+        hits.append((house[0, e, t], e, "house", transit_names[t], "in_house", int(ctx["houses"][e])))
+
+    hits.sort(key=lambda h: -h[0])
+    return [
+        {
+            "event": events[e].get("date"),
+            "type": events[e].get("type") or "other",
+            "technique": technique,
+            "body": body,
+            "aspect": aspect,
+            "target": target,
+            "score": float(score),
+        }
+        for score, e, technique, body, aspect, target in hits
+    ]
+
+
+def rectify(date_str, lat, lon, tz_name, events, house_system=DEFAULT_HOUSE_SYSTEM,
+            start_time="00:00", end_time="23:59", step_minutes=DEFAULT_STEP_MINUTES,
+            top=5, workers=None):
+    """
+    Aday doğum saatlerini olaylara göre sıralar.
+    Döner: {"candidates": N, "best": [{"time", "score", "asc", "mc", "hits"}, ...]}
+    """
+    labels, jds = candidate_times(date_str, tz_name, start_time, end_time, step_minutes)
+    ctx = build_context(jds, events)
+    scores, asc, mc = score_candidates(jds, lat, lon, house_system, ctx, workers)
+
+    best = []
+    for i in np.argsort(-scores, kind="stable")[:top].tolist():
+        asc_sign, asc_deg = degree_to_sign(asc[i])
+        mc_sign, mc_deg = degree_to_sign(mc[i])
+        best.append({
+            "time": labels[i],
+            "score": float(scores[i]),
+            "asc": {"lon": float(asc[i]), "sign": asc_sign, "degree_in_sign": asc_deg},
+            "mc": {"lon": float(mc[i]), "sign": mc_sign, "degree_in_sign": mc_deg},
+            "hits": explain_candidate(jds[i], lat, lon, house_system, ctx, events)[:10],
+        })
+    return {"candidates": len(jds), "best": best}
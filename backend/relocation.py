@@ -0,0 +1,156 @@
+# relocation.py
+# ===================
+# MystAI - Astrokartografi / Relocation motoru
+#
+# Doğum anı sabit olduğundan gezegenlerin ekvatoral koordinatları (RA, Dec)
+# bir kez hesaplanır; dünya üzerindeki her nokta için değişen tek şey yerel
+# yıldız zamanı (RAMC = GAST + boylam) ve enlemdir. Bu yüzden:
+#   - MC / IC çizgileri : RA − GAST kapalı formülü (enlemden bağımsız)
+#   - ASC / DSC çizgileri: ufuk saat açısı cos H0 = −tan φ · tan δ,
+#                          tüm enlem ızgarası için tek seferde çözülür
+#   - angles_grid        : swe.houses ile aynı ASC/MC değerleri, enlem×boylam
+#                          ızgarası üzerinde numpy ile
+# Swiss Ephemeris çağrısı sayısı ızgara boyutundan bağımsızdır (~12 çağrı).
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import (
+    DEFAULT_HOUSE_SYSTEM,
+    PLANET_IDS,
+    PLANET_NAMES,
+    ChartRecord,
+    compute_chart_records_batch,
+)
+
+# Kutuplara yakın enlemlerde çizgiler anlamsızlaşır (sirkumpolar gezegenler)
+LINE_LAT_LIMIT = 75.0
+LINE_LAT_STEP = 1.0
+
+# Relocated haritada "açısal" sayılacak gezegenler için orb (derece)
+ANGULAR_ORB = 5.0
+
+ANGLE_NAMES = ("ASC", "DSC", "MC", "IC")
+
+
+def _wrap180(deg):
+    return (np.asarray(deg) + 180.0) % 360.0 - 180.0
+
+
+def instant_state(jd_ut: float) -> dict:
+    """
+    Doğum anına ait, konumdan bağımsız tüm veriler:
+    Greenwich görünür yıldız zamanı, gerçek eğiklik, gezegen RA/Dec.
+    """
+    gast = swe.sidtime(jd_ut) * 15.0
+    eps = swe.calc_ut(jd_ut, swe.ECL_NUT)[0][0]
+
+    ra = np.empty(len(PLANET_IDS))
+    dec = np.empty(len(PLANET_IDS))
+    for i, pid in enumerate(PLANET_IDS.values()):
+        xx, _ = swe.calc_ut(jd_ut, pid, swe.FLG_SWIEPH | swe.FLG_EQUATORIAL)
+        ra[i], dec[i] = xx[0], xx[1]
+
+    return {"jd_ut": jd_ut, "gast": gast, "eps": eps, "ra": ra, "dec": dec}
+
+
+def angles_grid(state: dict, lats, lons):
+    """
+    Enlem/boylam ızgarası üzerinde ASC ve MC ekliptik boylamları.
+    swe.houses(...)[1][0:2] ile aynı sonuç; lats ve lons broadcast edilir.
+    """
+    eps = np.radians(state["eps"])
+    ramc = np.radians(state["gast"] + np.asarray(lons, dtype=float))
+    phi = np.radians(np.asarray(lats, dtype=float))
+
+    mc = np.degrees(np.arctan2(np.sin(ramc), np.cos(ramc) * np.cos(eps))) % 360.0
+    asc = np.degrees(
+        np.arctan2(
+            np.cos(ramc),
+            -(np.sin(ramc) * np.cos(eps) + np.tan(phi) * np.sin(eps)),
+        )
+    ) % 360.0
+    return asc, np.broadcast_to(mc, asc.shape)
+
+
+def _split_segments(lats, lons):
+    """Geçersiz (nan) noktalarda ve ±180° boylam sıçramalarında polylini böler."""
+    segments = []
+    current = []
+    prev_lon = None
+    for lat, lon in zip(lats.tolist(), lons.tolist()):
+        if lon != lon:  # nan
+            if len(current) > 1:
+                segments.append(current)
+            current, prev_lon = [], None
+            continue
+        if prev_lon is not None and abs(lon - prev_lon) > 180.0:
+            if len(current) > 1:
+                segments.append(current)
+            current = []
+        current.append([lat, lon])
+        prev_lon = lon
+    if len(current) > 1:
+        segments.append(current)
+    return segments
+
+
+def planet_lines(state: dict, lat_step=LINE_LAT_STEP, lat_limit=LINE_LAT_LIMIT):
+    """
+    Her gezegen için ASC/DSC/MC/IC çizgileri.
+    Döner: [{"planet", "angle", "segments": [[[lat, lon], ...], ...]}, ...]
+    """
+    lats = np.arange(-lat_limit, lat_limit + 1e-9, lat_step)
+    phi = np.radians(lats)[None, :]
+
+    ra = state["ra"][:, None]
+    dec = np.radians(state["dec"])[:, None]
+
+    # MC: yerel yıldız zamanı = RA; IC bunun tam karşısı
+    mc_lon = _wrap180(state["ra"] - state["gast"])
+    ic_lon = _wrap180(mc_lon + 180.0)
+
+    # Ufuk: cos H0 = −tan φ tan δ  → (gezegen × enlem) tek seferde
+    cos_h0 = -np.tan(phi) * np.tan(dec)
+    valid = np.abs(cos_h0) <= 1.0
+    h0 = np.degrees(np.arccos(np.clip(cos_h0, -1.0, 1.0)))
+    asc_lon = np.where(valid, _wrap180(ra - h0 - state["gast"]), np.nan)
+    dsc_lon = np.where(valid, _wrap180(ra + h0 - state["gast"]), np.nan)
+
+    lines = []
+    for i, name in enumerate(PLANET_NAMES):
+        # MC/IC meridyen çizgisidir; iki uç nokta yeterli
+        for angle, lon in (("MC", float(mc_lon[i])), ("IC", float(ic_lon[i]))):
+            lines.append({
+                "planet": name,
+                "angle": angle,
+                "segments": [[[-lat_limit, lon], [lat_limit, lon]]],
+            })
+        for angle, lon_arr in (("ASC", asc_lon[i]), ("DSC", dsc_lon[i])):
+            lines.append({
+                "planet": name,
+                "angle": angle,
+                "segments": _split_segments(lats, lon_arr),
+            })
+    return lines
+
+
+def relocated_chart(jd_ut: float, lat: float, lon: float, house_system=DEFAULT_HOUSE_SYSTEM):
+    """Aynı doğum anı, yeni konum → ChartRecord (gezegenler aynı, evler/açılar yeni)."""
+    arr = compute_chart_records_batch([jd_ut], [lat], [lon], house_system)
+    return ChartRecord(arr[0])
+
+
+def angular_planets(record: ChartRecord, orb=ANGULAR_ORB):
+    """Relocated haritada ASC/DSC/MC/IC'ye orb içinde yakın gezegenler."""
+    angles = np.array([record.asc, record.asc + 180.0, record.mc, record.mc + 180.0]) % 360.0
+    dist = np.abs(_wrap180(record.lons[:, None] - angles[None, :]))
+
+    out = []
+    for i, k in zip(*np.nonzero(dist <= orb)):
+        out.append({
+            "planet": PLANET_NAMES[i],
+            "angle": ANGLE_NAMES[k],
+            "orb": float(dist[i, k]),
+        })
+    return out
@@ -0,0 +1,306 @@
+# render_pool.py
+# ===================
+# MystAI - Harita çizimi ve PDF dizgisi için önceden ısıtılmış süreç havuzu
+#
+# _draw_chart (matplotlib) ve PDF dizgisi (fpdf2) saf CPU işidir ve GIL'i
+# tutar: thread'li gunicorn worker'ında bir render sürerken aynı süreçteki
+# diğer istekler de bekler. Bu işler ayrı süreçlerde koşar:
+# - RENDER_WORKERS süreç (0 → havuz kapalı, iş çağıran thread'de çalışır)
+# - her süreç açılırken matplotlib, fpdf2/fontTools ve Swiss Ephemeris'i
+#   yükler, bir harita + PDF çizerek font/glyph cache'lerini ısıtır
+# - süreç RENDER_MAX_JOBS işten sonra yenisiyle değiştirilir (bellek büyümesi sınırı)
+# - kuyruk sınırlı: çalışan + bekleyen iş RENDER_WORKERS + RENDER_QUEUE'yu
+#   aşarsa RenderBusy (503 + Retry-After); iş RENDER_TIMEOUT'u (veya istek
+#   deadline'ını) aşarsa RenderTimeout (504)
+# - submit(fn, ...) → Future (asenkron), run(fn, ...) → sonuç (senkron)
+#
+# İşler modül seviyesinde fonksiyonlardır (pickle ile gider); argüman ve
+# sonuçlar küçük tutulur — görsel baytları değil dosya yolları gidip gelir,
+# dosyalar /tmp üzerinden paylaşılır. Worker'ların metrics sayaçları
+# /metrics'e yansımaz; run() ile giden işin içindeki aşama süreleri
+# (pdf_layout, pdf_output) ve istek profilleniyorsa worker'daki profil
+# sonuçla birlikte döner, ana süreçte isteğin endpoint'ine/oturumuna yazılır.
+#
+# Not: süreçler "spawn" ile açılır (thread'li süreçte fork güvenli değil).
+# `python main.py` ile çalışırken spawn edilen süreçler main.py'yi bir kez
+# içe aktarır; havuz ve arka plan işleri worker'larda başlatılmaz.
+
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import capture_stages, observe_stage
+from profiler import current_session, profile_call, profiler
+
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "2"))
+RENDER_QUEUE = int(os.environ.get("RENDER_QUEUE", "16"))
+RENDER_MAX_JOBS = int(os.environ.get("RENDER_MAX_JOBS", "100"))
+RENDER_TIMEOUT = float(os.environ.get("RENDER_TIMEOUT", "60"))
+
+
+class RenderError(Exception):
+    """Render işi havuzda tamamlanamadı (worker çöktü vb.)."""
+
+    status = 500
+    retry_after = None
+
+
+class RenderBusy(RenderError):
+    """Havuz + kuyruk dolu; istemci biraz sonra tekrar denemeli."""
+
+    status = 503
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RenderTimeout(RenderError):
+    status = 504
+
+
+def in_worker() -> bool:
+    """
+    Bu süreç bir multiprocessing çocuğu mu (render worker'ı)? Spawn sırasında
+    main.py içe aktarılırken parent_process() henüz atanmamıştır; süreç adı ise
+    bu aşamadan önce verilir. Gunicorn worker'ları (fork) "MainProcess" kalır.
+    """
+    return multiprocessing.parent_process() is not None or multiprocessing.current_process().name != "MainProcess"
+
+
+# -----------------------------
+# Worker tarafı
+# -----------------------------
+def _ping():
+    return os.getpid()
+
+
+def _run_job(fn, args, kwargs, profile_mode):
+    """run() işini çalıştırır; aşama süreleri ve (istenirse) profil verisi sonuçla döner."""
+    with capture_stages() as stages:
+        if profile_mode:
+            result, profile = profile_call(profile_mode, fn, *args, **kwargs)
+        else:
+            result, profile = fn(*args, **kwargs), None
+    return result, stages, profile
+
+
+def _warm_up():
+    """Örnek bir harita ve PDF üretir: import'lar, font ve glyph cache'leri ısınır."""
+    from chart_cache import get_chart_record
+    from chart_generator import _draw_chart, _planets_for_plot
+    from generate_pdf import generate_pdf_file
+
+    tmp = tempfile.mkdtemp(prefix="mystai-render-warm-")
+    try:
+        record = get_chart_record("2000-01-01", "12:00", 41.0, 29.0, "Europe/Istanbul")
+        _draw_chart(_planets_for_plot(record.placements()), record.cusps,
+                    os.path.join(tmp, "warm.png"), "Astrology Chart", "2000-01-01  •  12:00")
+        generate_pdf_file("MystAI\n\nWarm-up / Isınma: ğüşiöç", chart_id="warm",
+                          out_dir=tmp, chart_dir=tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _exit_with_parent(parent):
+    parent.join()
+    os._exit(0)
+
+
+def _init_worker():
+    # Ctrl-C ana süreçte ele alınır; worker'lar traceback basmasın
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Ana süreç temiz kapanmadan ölürse (SIGTERM/SIGKILL) worker'lar sahipsiz kalmasın
+    threading.Thread(target=_exit_with_parent, args=(multiprocessing.parent_process(),),
+                     name="render-parent-watch", daemon=True).start()
+    try:
+        _warm_up()
+    except Exception:
+        # Isınma başarısızsa worker yine de iş alır (ilk iş yavaş olur)
+        traceback.print_exc()
+
+
+# -----------------------------
+# Ana süreç tarafı
+# -----------------------------
+class RenderPool:
+    def __init__(self, workers=RENDER_WORKERS, queue=RENDER_QUEUE,
+                 max_jobs=RENDER_MAX_JOBS, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.queue = queue
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        # Ortalama iş süresi (EWMA, kuyruk dahil) → Retry-After tahmini
+        self.service_time = 1.0
+        self._in_flight = 0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.workers > 0 and not in_worker()
+
+    def start(self):
+        """Worker'ları açar ve ısıtır (arka planda); tekrar çağrı no-op."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._ensure_executor()
+
+    def _ensure_executor(self):
+        # _lock altında çağrılır. Fork sonrası (gunicorn --preload) eski havuz
+        # bu süreçte kullanılamaz; yenisi açılır.
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            max_tasks_per_child=self.max_jobs,
+        )
+        self._pid = os.getpid()
+        # Her worker'ı şimdi açtır: ilk gerçek iş ısınma beklemesin
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+        return self._executor
+
+    def _reset(self, broken):
+        """Çöken havuzu (worker OOM/segfault) yenisiyle değiştirir."""
+        with self._lock:
+            if self._executor is broken:
+                self.restarts += 1
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._ensure_executor()
+
+    def retry_after(self):
+        with self._lock:
+            return max(self.service_time * (self._in_flight + 1) / max(self.workers, 1), 1.0)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        İşi kuyruğa koyar ve Future döner. Havuz kapalıysa iş bu thread'de
+        hemen çalışır (tamamlanmış Future). Kuyruk doluysa RenderBusy.
+        """
+        if not self.enabled:
+            future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue:
+                self.rejected += 1
+                busy = True
+            else:
+                busy = False
+                self._in_flight += 1
+                self.submitted += 1
+                executor = self._ensure_executor()
+        if busy:
+            raise RenderBusy("Render kuyruğu dolu; lütfen biraz sonra tekrar deneyin", self.retry_after())
+
+        started = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError):
+            self._reset(executor)
+            with self._lock:
+                executor = self._ensure_executor()
+            try:
+                future = executor.submit(fn, *args, **kwargs)
+            except BaseException:
+                self._done(started, ok=False)
+                raise
+        future.add_done_callback(lambda f: self._done(started, ok=not f.cancelled() and f.exception() is None))
+        future.executor = executor
+        return future
+
+    def _done(self, started, ok):
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            if ok:
+                self.completed += 1
+                self.service_time += 0.2 * (seconds - self.service_time)
+            else:
+                self.failed += 1
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """
+        submit + sonucu bekler. timeout verilmezse RENDER_TIMEOUT ile istek
+        deadline'ından (upstream.remaining) kısa olanı kullanılır. Worker
+        çökmesinde iş bir kez yeniden denenir (render işleri idempotent).
+        """
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        if timeout is None:
+            # Worker'lar bu modülü içe aktarır; OpenAI istemcisini onlara yüklememek için burada
+            from upstream import remaining
+
+            left = remaining()
+            timeout = self.timeout if left is None else min(self.timeout, left)
+        session = current_session()
+        deadline = time.monotonic() + timeout
+        for attempt in (1, 2):
+            future = self.submit(_run_job, fn, args, kwargs, session.mode if session else None)
+            try:
+                result, stages, profile = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeout:
+                # Başlamamışsa kuyruktan düşer; çalışıyorsa bitince slot boşalır
+                future.cancel()
+                with self._lock:
+                    self.timeouts += 1
+                raise RenderTimeout(f"Render {timeout:g} sn içinde tamamlanamadı")
+            except BrokenProcessPool as e:
+                self._reset(getattr(future, "executor", None))
+                if attempt == 2:
+                    raise RenderError(f"Render worker'ı çöktü: {e}") from e
+                print(f"render worker çöktü, iş yeniden deneniyor: {e}", file=sys.stderr)
+                continue
+            for stage, seconds in stages:
+                observe_stage(stage, seconds)
+            if profile is not None:
+                profiler.attach(session, profile)
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers if self.enabled else 0,
+                "capacity": self.workers + self.queue,
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+                "service_time": round(self.service_time, 3),
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+render_pool = RenderPool()
@@ -0,0 +1,179 @@
+# returns.py
+# ===================
+# MystAI - Gezegen dönüşleri (solar, lunar ve diğerleri)
+#
+# Dönüş: transit gezegenin natal boylamına tam olarak geri geldiği an.
+# find_returns, PLANET_IDS içindeki herhangi bir gezegen için bir zaman
+# penceresindeki TÜM dönüşleri tek geçişte bulur:
+#   1) Gezegenin ortalama hızından örnekleme adımı seçilir (bir turda ~8
+#      örnek; retrograd yapabilen gezegenlerde adım ayrıca sınırlanır).
+#   2) Ortak zaman ızgarasında boylam BİR kez hesaplanır; N kullanıcının
+#      natal hedefleri broadcast ile aynı ızgaraya karşı taranır.
+#   3) İşaret değişen aralıklar, braket korumalı secant ile rafine edilir
+#      (tüm aralıklar aynı iterasyonda, vektörel).
+#
+# Dönüş haritaları chart cache üzerinden (JD anahtarıyla) hesaplanır.
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import PLANET_IDS, PLANET_NAMES, ChartRecord
+from chart_cache import get_chart_record_at
+
+# Ortalama geosentrik hız (derece/gün)
+MEAN_SPEED = {
+    "Sun": 0.98565,
+    "Moon": 13.17640,
+    "Mercury": 0.98565,
+    "Venus": 0.98565,
+    "Mars": 0.52403,
+    "Jupiter": 0.08309,
+    "Saturn": 0.03346,
+    "Uranus": 0.01173,
+    "Neptune": 0.00598,
+    "Pluto": 0.00397,
+}
+
+# Retrograd yapmayan gövdeler: adım sadece ortalama hıza göre
+NON_RETROGRADE = {"Sun", "Moon"}
+
+# Bir tur başına örnek sayısı ve retrograd gövdeler için azami adım (gün)
+SAMPLES_PER_CYCLE = 8
+RETRO_MAX_STEP = 5.0
+
+# Secant rafinesi: hedef hassasiyet (derece) ve azami iterasyon
+SECANT_TOL = 1e-7
+SECANT_MAX_ITER = 12
+
+
+def _wrap180(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def _body_lons(pid, jds):
+    return np.array([swe.calc_ut(jd, pid)[0][0] for jd in np.asarray(jds).ravel()]).reshape(np.shape(jds))
+
+
+def scan_step(body: str) -> float:
+    """Ortalama hızdan türetilen örnekleme adımı (gün)."""
+    step = 360.0 / MEAN_SPEED[body] / SAMPLES_PER_CYCLE
+    if body not in NON_RETROGRADE:
+        step = min(step, RETRO_MAX_STEP)
+    return step
+
+
+def refine_roots(f, a, b, fa, fb, tol=SECANT_TOL, max_iter=SECANT_MAX_ITER):
+    """
+    Braketli aralıklarda (f(a), f(b) zıt işaretli) secant ile kök bulur.
+    f(x, idx): x noktalarındaki değerler; idx, x'in hangi aralıklara ait
+    olduğunu verir (aralık başına farklı hedefler için).
+    Secant tahmini braket dışına çıkarsa ikiye bölmeye düşer. Tüm aralıklar
+    aynı anda iterasyona girer; yakınsayanlar tekrar hesaplanmaz.
+    """
+    a, b, fa, fb = (np.array(x, dtype=float) for x in (a, b, fa, fb))
+    x = b - fb * (b - a) / np.where(fb != fa, fb - fa, 1.0)
+    active = np.arange(len(x))
+    for _ in range(max_iter):
+        xa = x[active]
+        fx = f(xa, active)
+        pending = np.abs(fx) >= tol
+        active, xa, fx = active[pending], xa[pending], fx[pending]
+        if not len(active):
+            break
+
+        left = np.sign(fx) == np.sign(fa[active])
+        a[active] = np.where(left, xa, a[active])
+        fa[active] = np.where(left, fx, fa[active])
+        b[active] = np.where(left, b[active], xa)
+        fb[active] = np.where(left, fb[active], fx)
+
+        # Secant adımı braketin iki ucu üzerinden; dışarı taşarsa ikiye böl
+        aa, bb, ffa, ffb = a[active], b[active], fa[active], fb[active]
+        x_new = bb - ffb * (bb - aa) / np.where(ffb != ffa, ffb - ffa, 1.0)
+        outside = (x_new <= np.minimum(aa, bb)) | (x_new >= np.maximum(aa, bb))
+        x[active] = np.where(outside, 0.5 * (aa + bb), x_new)
+    return x
+
+
+def find_returns_batch(body: str, natal_lons, start_jds, end_jds):
+    """
+    N kullanıcı için [start, end] pencerelerindeki tüm dönüş anları.
+
+    natal_lons, start_jds, end_jds : (N,) diziler (veya skaler → broadcast)
+    Döner: N elemanlı liste, her biri sıralı JD (UT) dizisi.
+    """
+    if body not in PLANET_IDS:
+        raise ValueError(f"Bilinmeyen gezegen: {body}")
+    pid = PLANET_IDS[body]
+
+    natal_lons, start_jds, end_jds = np.broadcast_arrays(
+        np.asarray(natal_lons, dtype=float),
+        np.asarray(start_jds, dtype=float),
+        np.asarray(end_jds, dtype=float),
+    )
+    natal_lons, start_jds, end_jds = (np.atleast_1d(x) for x in (natal_lons, start_jds, end_jds))
+
+    # Ortak ızgara: tüm pencereleri kapsar, boylam bir kez hesaplanır
+    step = scan_step(body)
+    grid = np.arange(start_jds.min(), end_jds.max() + step, step)
+    lons = _body_lons(pid, grid)
+
+    # (U, T) hedefe uzaklık; işaret değişimi + sarma sıçraması filtresi
+    f = _wrap180(lons[None, :] - natal_lons[:, None])
+    fa, fb = f[:, :-1], f[:, 1:]
+    hit = ((fa < 0) & (fb >= 0) | (fa > 0) & (fb <= 0)) & (np.abs(fb - fa) < 90.0)
+    user, t = np.nonzero(hit)
+
+    roots = np.empty(0)
+    if len(t):
+        targets = natal_lons[user]
+        roots = refine_roots(
+            lambda x, idx: _wrap180(_body_lons(pid, x) - targets[idx]),
+            grid[t], grid[t + 1], fa[user, t], fb[user, t],
+        )
+
+    out = []
+    for u in range(len(natal_lons)):
+        r = np.sort(roots[user == u])
+        out.append(r[(r >= start_jds[u]) & (r <= end_jds[u])])
+    return out
+
+
+def find_returns(body: str, natal_lon: float, start_jd: float, end_jd: float):
+    """Tek kullanıcı için find_returns_batch kısayolu."""
+    return find_returns_batch(body, [natal_lon], [start_jd], [end_jd])[0]
+
+
+def next_returns(body: str, natal_lon: float, start_jd: float, count: int = 1):
+    """start_jd'den sonraki ilk `count` dönüş (pencere ortalama hızdan seçilir)."""
+    period = 360.0 / MEAN_SPEED[body]
+    window = count * period * 1.1 + 2 * scan_step(body)
+    return find_returns(body, natal_lon, start_jd, start_jd + window)[:count]
+
+
+def return_charts(record: ChartRecord, jds, lat: float, lon: float):
+    """Dönüş anları → ChartRecord listesi (konum: doğum yeri veya güncel yer)."""
+    return [get_chart_record_at(jd, lat, lon, record.house_system) for jd in np.asarray(jds).tolist()]
+
+
+def solar_return_jd(record: ChartRecord, year: int) -> float:
+    """Verilen yıldaki tam solar return anı (doğum günü civarında aranır)."""
+    _, m, d, _ = swe.revjul(record.julian_day, swe.GREG_CAL)
+    if m == 2 and d == 29:
+        d = 28
+    center = swe.julday(year, m, d, 12.0, swe.GREG_CAL)
+    found = find_returns("Sun", record.lons[PLANET_NAMES.index("Sun")], center - 3.0, center + 3.0)
+    if not len(found):
+        raise ValueError(f"{year} için solar return bulunamadı")
+    return float(found[0])
+
+
+def jd_to_local(jd_ut: float, tz_name: str):
+    """JD (UT) → ('YYYY-MM-DD', 'HH:MM') yerel saat (dakikaya yuvarlanmış)."""
+    y, m, d, hours = swe.revjul(jd_ut, swe.GREG_CAL)
+    utc_dt = datetime(y, m, d, tzinfo=timezone.utc) + timedelta(minutes=round(hours * 60.0))
+    local = utc_dt.astimezone(ZoneInfo(tz_name))
+    return local.strftime("%Y-%m-%d"), local.strftime("%H:%M")
@@ -0,0 +1,408 @@
+# tarot.py
+# ===================
+# MystAI - Tarot motoru (sunucu tarafı)
+#
+# - DECK / SPREADS   : 78 kartlık deste (tarot.html ile aynı anahtarlar) ve
+#                      açılım düzenleri (pozisyon adları + ızgara yerleşimi)
+# - draw             : seed'li çekim; aynı (spread, seed, reversals) her zaman
+#                      aynı kartları verir, böylece bir açılım yeniden üretilebilir
+# - resolve_draw     : /predict'e gelen tarot verisini (seed ya da kart listesi)
+#                      doğrulanmış bir çekime çevirir
+# - build_tarot_context : kartların yapısal özeti (LLM prompt'u için)
+# - build_card_assets   : assets/cards/*.png → boyutlandırılmış WebP varyantları
+#                      + kart sırtı ve küçük resimlerden tek bir sprite sayfası.
+#                      Dosya adları içerik hash'i taşır (immutable cache);
+#                      manifest.json hangi dosyanın hangi kart olduğunu söyler.
+#
+# Varyant üretimi (backend/ içinden):
+#     python tarot.py [--force]
+
+import hashlib
+import io
+import json
+import os
+import random
+import secrets
+import sys
+import threading
+
+from PIL import Image, ImageOps
+
+BACKEND_DIR = os.path.dirname(__file__)
+CARDS_DIR = os.path.abspath(os.path.join(BACKEND_DIR, "..", "assets", "cards"))
+TAROT_BUILD_DIR = os.environ.get("TAROT_BUILD_DIR", os.path.join(BACKEND_DIR, "data", "tarot"))
+
+BACK_KEY = "back"
+
+# Kart oranı (yükseklik / genişlik); kaynak dosyalar 1024×1536
+CARD_RATIO = 1.5
+# Varyant → genişlik (px)
+CARD_VARIANTS = {
+    "thumb": 120,
+    "web": 360,
+    "large": 720,
+}
+WEBP_PARAMS = {"quality": 80, "method": 4}
+# Sprite: kart sırtı + 78 küçük resim, SPRITE_COLUMNS sütunlu ızgara
+SPRITE_VARIANT = "thumb"
+SPRITE_COLUMNS = 10
+
+# ters kart olasılığı (reversals=True iken)
+REVERSAL_RATE = 0.5
+
+# (anahtar, İngilizce ad, Türkçe ad, anlam EN, anlam TR) — sıra: Büyük Arkana,
+# Kupalar, Tılsımlar, Kılıçlar, Değnekler
+_DECK_ROWS = (
+    ("the-fool",             "The Fool",             "Deli",               "new beginnings, leap of faith",   "yeni başlangıçlar, saf sıçrayış"),
+    ("the-magician",         "The Magician",         "Büyücü",             "manifestation, focus",            "yaratım gücü, odak"),
+    ("the-high-priestess",   "The High Priestess",   "Başrahibe",          "intuition, mystery",              "sezgi, gizem"),
+    ("the-empress",          "The Empress",          "İmparatoriçe",       "abundance, nurture",              "bolluk, şefkat"),
+    ("the-emperor",          "The Emperor",          "İmparator",          "structure, authority",            "düzen, otorite"),
+    ("the-hierophant",       "The Hierophant",       "Başrahip",           "tradition, guidance",             "gelenek, rehberlik"),
+    ("the-lovers",           "The Lovers",           "Aşıklar",            "union, choice",                   "bağlantı, seçim"),
+    ("the-chariot",          "The Chariot",          "Savaş Arabası",      "willpower, movement",             "irade, ilerleyiş"),
+    ("strength",             "Strength",             "Güç",                "inner strength, courage",         "içsel güç, cesaret"),
+    ("the-hermit",           "The Hermit",           "Ermiş",              "wisdom, retreat",                 "bilgelik, içe dönüş"),
+    ("wheel-of-fortune",     "Wheel of Fortune",     "Kader Çarkı",        "cycles, destiny",                 "döngüler, kader"),
+    ("justice",              "Justice",              "Adalet",             "truth, balance",                  "gerçek, denge"),
+    ("the-hanged-man",       "The Hanged Man",       "Asılan Adam",        "surrender, new view",             "teslimiyet, yeni bakış"),
+    ("death",                "Death",                "Ölüm",               "transformation, rebirth",         "dönüşüm, yeniden doğuş"),
+    ("temperance",           "Temperance",           "Denge",              "alchemic balance",                "denge, uyum"),
+    ("the-devil",            "The Devil",            "Şeytan",             "attachments, shadow",             "bağımlılıklar, gölge"),
+    ("the-tower",            "The Tower",            "Kule",               "sudden change, awakening",        "ani değişim, uyanış"),
+    ("the-star",             "The Star",             "Yıldız",             "hope, inspiration",               "umut, ilham"),
+    ("the-moon",             "The Moon",             "Ay",                 "subconscious, illusions",         "bilinçaltı, yanılsamalar"),
+    ("the-sun",              "The Sun",              "Güneş",              "vitality, joy",                   "yaşam enerjisi, neşe"),
+    ("judgement",            "Judgement",            "Yargı",              "awakening, calling",              "uyanış, çağrı"),
+    ("the-world",            "The World",            "Dünya",              "completion, wholeness",           "tamamlanma, bütünlük"),
+    ("ace-of-cups",          "Ace of Cups",          "As Kupalar",         "emotions, new feelings",          "duygular, yeni hisler"),
+    ("two-of-cups",          "Two of Cups",          "İki Kupalar",        "union, attraction",               "birlik, çekim"),
+    ("three-of-cups",        "Three of Cups",        "Üç Kupalar",         "celebration, friendship",         "kutlama, arkadaşlık"),
+    ("four-of-cups",         "Four of Cups",         "Dört Kupalar",       "apathy, contemplation",           "umursamazlık, içe dönüş"),
+    ("five-of-cups",         "Five of Cups",         "Beş Kupalar",        "loss, regret",                    "kayıp, pişmanlık"),
+    ("six-of-cups",          "Six of Cups",          "Altı Kupalar",       "nostalgia, kindness",             "geçmiş, nezaket"),
+    ("seven-of-cups",        "Seven of Cups",        "Yedi Kupalar",       "choices, illusions",              "seçimler, hayaller"),
+    ("eight-of-cups",        "Eight of Cups",        "Sekiz Kupalar",      "walking away, search",            "çekilme, arayış"),
+    ("nine-of-cups",         "Nine of Cups",         "Dokuz Kupalar",      "wish fulfillment, satisfaction",  "dileklerin gerçekleşmesi"),
+    ("ten-of-cups",          "Ten of Cups",          "On Kupalar",         "harmony, emotional bliss",        "uyum, duygusal mutluluk"),
+    ("page-of-cups",         "Page of Cups",         "Prens Kupalar",      "creative messages, sensitivity",  "yaratıcı mesajlar, hassasiyet"),
+    ("knight-of-cups",       "Knight of Cups",       "Şövalye Kupalar",    "romance, idealism",               "romantizm, idealizm"),
+    ("queen-of-cups",        "Queen of Cups",        "Kraliçe Kupalar",    "emotional depth, empathy",        "duygusal derinlik, empati"),
+    ("king-of-cups",         "King of Cups",         "Kral Kupalar",       "emotional balance, wisdom",       "duygusal denge, bilgelik"),
+    ("ace-of-pentacles",     "Ace of Pentacles",     "As Tılsımlar",       "material opportunity",            "maddi fırsat"),
+    ("two-of-pentacles",     "Two of Pentacles",     "İki Tılsımlar",      "juggling, balance",               "denge, çoklu uğraş"),
+    ("three-of-pentacles",   "Three of Pentacles",   "Üç Tılsımlar",       "teamwork, skill",                 "takım çalışması, ustalık"),
+    ("four-of-pentacles",    "Four of Pentacles",    "Dört Tılsımlar",     "control, security",               "kontrol, güvenlik"),
+    ("five-of-pentacles",    "Five of Pentacles",    "Beş Tılsımlar",      "hardship, worry",                 "zorluk, endişe"),
+    ("six-of-pentacles",     "Six of Pentacles",     "Altı Tılsımlar",     "giving, receiving",               "vermek, almak"),
+    ("seven-of-pentacles",   "Seven of Pentacles",   "Yedi Tılsımlar",     "patience, investment",            "sabır, yatırım"),
+    ("eight-of-pentacles",   "Eight of Pentacles",   "Sekiz Tılsımlar",    "practice, mastery",               "pratik, ustalaşma"),
+    ("nine-of-pentacles",    "Nine of Pentacles",    "Dokuz Tılsımlar",    "independence, luxury",            "bağımsızlık, konfor"),
+    ("ten-of-pentacles",     "Ten of Pentacles",     "On Tılsımlar",       "legacy, long-term stability",     "miras, uzun vadeli istikrar"),
+    ("page-of-pentacles",    "Page of Pentacles",    "Prens Tılsımlar",    "study, opportunity",              "öğrenme, fırsat"),
+    ("knight-of-pentacles",  "Knight of Pentacles",  "Şövalye Tılsımlar",  "responsibility, routine",         "sorumluluk, rutin"),
+    ("queen-of-pentacles",   "Queen of Pentacles",   "Kraliçe Tılsımlar",  "nurturing, practicality",         "şefkat, pratiklik"),
+    ("king-of-pentacles",    "King of Pentacles",    "Kral Tılsımlar",     "wealth, discipline",              "zenginlik, disiplin"),
+    ("ace-of-swords",        "Ace of Swords",        "As Kılıçlar",        "mental clarity, breakthrough",    "zihinsel netlik, atılım"),
+    ("two-of-swords",        "Two of Swords",        "İki Kılıçlar",       "stalemate, decision",             "kararsızlık, ikilem"),
+    ("three-of-swords",      "Three of Swords",      "Üç Kılıçlar",        "heartbreak, truth",               "kalp kırıklığı, gerçek"),
+    ("four-of-swords",       "Four of Swords",       "Dört Kılıçlar",      "rest, recovery",                  "dinlenme, toparlanma"),
+    ("five-of-swords",       "Five of Swords",       "Beş Kılıçlar",       "conflict, tension",               "çatışma, gerginlik"),
+    ("six-of-swords",        "Six of Swords",        "Altı Kılıçlar",      "transition, moving on",           "geçiş, yola devam"),
+    ("seven-of-swords",      "Seven of Swords",      "Yedi Kılıçlar",      "strategy, secrecy",               "strateji, gizlilik"),
+    ("eight-of-swords",      "Eight of Swords",      "Sekiz Kılıçlar",     "restriction, fear",               "kısıtlama, korku"),
+    ("nine-of-swords",       "Nine of Swords",       "Dokuz Kılıçlar",     "anxiety, worry",                  "anksiyete, kaygı"),
+    ("ten-of-swords",        "Ten of Swords",        "On Kılıçlar",        "endings, rock bottom",            "bitiriş, dip nokta"),
+    ("page-of-swords",       "Page of Swords",       "Prens Kılıçlar",     "curiosity, ideas",                "merak, fikirler"),
+    ("knight-of-swords",     "Knight of Swords",     "Şövalye Kılıçlar",   "fast action, drive",              "hızlı hareket, kararlılık"),
+    ("queen-of-swords",      "Queen of Swords",      "Kraliçe Kılıçlar",   "clarity, boundaries",             "netlik, sınırlar"),
+    ("king-of-swords",       "King of Swords",       "Kral Kılıçlar",      "logic, truth",                    "mantık, gerçek"),
+    ("ace-of-wands",         "Ace of Wands",         "As Değnekler",       "spark, inspiration",              "kıvılcım, ilham"),
+    ("two-of-wands",         "Two of Wands",         "İki Değnekler",      "planning, foresight",             "planlama, öngörü"),
+    ("three-of-wands",       "Three of Wands",       "Üç Değnekler",       "expansion, progress",             "genişleme, ilerleme"),
+    ("four-of-wands",        "Four of Wands",        "Dört Değnekler",     "celebration, home",               "kutlama, yuva"),
+    ("five-of-wands",        "Five of Wands",        "Beş Değnekler",      "competition, tension",            "rekabet, gerilim"),
+    ("six-of-wands",         "Six of Wands",         "Altı Değnekler",     "victory, recognition",            "zafer, takdir"),
+    ("seven-of-wands",       "Seven of Wands",       "Yedi Değnekler",     "defense, standing ground",        "savunma, direnç"),
+    ("eight-of-wands",       "Eight of Wands",       "Sekiz Değnekler",    "speed, movement",                 "hız, akış"),
+    ("nine-of-wands",        "Nine of Wands",        "Dokuz Değnekler",    "resilience, persistence",         "direnç, dayanıklılık"),
+    ("ten-of-wands",         "Ten of Wands",         "On Değnekler",       "burden, responsibility",          "yük, sorumluluk"),
+    ("page-of-wands",        "Page of Wands",        "Prens Değnekler",    "exploration, enthusiasm",         "keşif, heves"),
+    ("knight-of-wands",      "Knight of Wands",      "Şövalye Değnekler",  "impulse, adventure",              "dürtü, macera"),
+    ("queen-of-wands",       "Queen of Wands",       "Kraliçe Değnekler",  "magnetism, confidence",           "çekicilik, özgüven"),
+    ("king-of-wands",        "King of Wands",        "Kral Değnekler",     "vision, leadership",              "vizyon, liderlik"),
+)
+
+MAJOR_ARCANA = 22
+SUITS = ("cups", "pentacles", "swords", "wands")
+
+DECK = []
+for _i, (_key, _en, _tr, _vibe_en, _vibe_tr) in enumerate(_DECK_ROWS):
+    DECK.append({
+        "key": _key,
+        "index": _i,
+        "en": _en,
+        "tr": _tr,
+        "vibe_en": _vibe_en,
+        "vibe_tr": _vibe_tr,
+        "arcana": "major" if _i < MAJOR_ARCANA else "minor",
+        "suit": None if _i < MAJOR_ARCANA else _key.rsplit("-of-", 1)[1],
+    })
+CARD_INDEX = {card["key"]: card["index"] for card in DECK}
+
+# Açılımlar: pozisyonlar (anahtar, TR, EN) ve ızgara yerleşimi (sütun, satır, dönüş°).
+# Izgara birimi bir kart genişliği/yüksekliğidir (+ boşluk); (sütun, satır) kartın
+# merkezidir. Kompozit görsel (tarot_render) bunu kullanır.
+SPREADS = {
+    "single": {
+        "positions": [("focus", "Odak", "Focus")],
+        "layout": [(0, 0, 0)],
+    },
+    "three_card": {
+        "positions": [
+            ("past", "Geçmiş", "Past"),
+            ("present", "Şimdi", "Present"),
+            ("future", "Gelecek", "Future"),
+        ],
+        "layout": [(0, 0, 0), (1, 0, 0), (2, 0, 0)],
+    },
+    "celtic_cross": {
+        "positions": [
+            ("present", "Şu anki durum", "Present situation"),
+            ("challenge", "Engel", "Challenge"),
+            ("foundation", "Temel", "Foundation"),
+            ("past", "Yakın geçmiş", "Recent past"),
+            ("crown", "Hedef", "Crown"),
+            ("future", "Yakın gelecek", "Near future"),
+            ("self", "Kendin", "Self"),
+            ("environment", "Çevre", "Environment"),
+            ("hopes_fears", "Umutlar ve korkular", "Hopes and fears"),
+            ("outcome", "Sonuç", "Outcome"),
+        ],
+        "layout": [
+            (1, 1, 0), (1, 1, 90), (1, 2, 0), (0, 1, 0), (1, 0, 0), (2, 1, 0),
+            (3.6, 2.5, 0), (3.6, 1.5, 0), (3.6, 0.5, 0), (3.6, -0.5, 0),
+        ],
+    },
+}
+
+
+# -----------------------------
+# Çekim
+# -----------------------------
+def _spread(spread):
+    if spread not in SPREADS:
+        raise ValueError(f"Bilinmeyen açılım: {spread}")
+    return SPREADS[spread]
+
+
+def _draw_cards(spread, indices, reversed_flags):
+    positions = _spread(spread)["positions"]
+    cards = []
+    for (pos_key, pos_tr, pos_en), idx, rev in zip(positions, indices, reversed_flags):
+        cards.append({
+            "position": pos_key,
+            "position_tr": pos_tr,
+            "position_en": pos_en,
+            **DECK[idx],
+            "reversed": bool(rev),
+        })
+    return cards
+
+
+def draw(spread="three_card", seed=None, reversals=False) -> dict:
+    """
+    Seed'li çekim. seed verilmezse rastgele üretilir ve sonuçla döner;
+    aynı seed ile çağrı aynı açılımı verir.
+    """
+    n = len(_spread(spread)["positions"])
+    if seed is None:
+        seed = secrets.randbits(32)
+    try:
+        seed = int(seed)
+    except (TypeError, ValueError):
+        raise ValueError("seed bir tam sayı olmalı")
+    rng = random.Random(seed)
+    indices = rng.sample(range(len(DECK)), n)
+    flags = [reversals and rng.random() < REVERSAL_RATE for _ in range(n)]
+    return {
+        "spread": spread,
+        "seed": seed,
+        "reversals": bool(reversals),
+        "cards": _draw_cards(spread, indices, flags),
+    }
+
+
+def resolve_draw(payload: dict) -> dict:
+    """
+    /predict tarot verisi:
+      {"spread": "three_card", "seed": 123, "reversals": false}          → yeniden çekim
+      {"spread": "three_card", "cards": [{"key": "the-fool", "reversed": false}, ...]}
+                                                                         → istemcinin seçtiği kartlar
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("tarot bir nesne olmalı")
+    spread = payload.get("spread") or "three_card"
+    cards = payload.get("cards")
+    if cards is None:
+        return draw(spread, payload.get("seed"), bool(payload.get("reversals")))
+
+    n = len(_spread(spread)["positions"])
+    if not isinstance(cards, list) or len(cards) != n:
+        raise ValueError(f"{spread} açılımı {n} kart gerektirir")
+    keys = [c.get("key") if isinstance(c, dict) else c for c in cards]
+    unknown = [k for k in keys if k not in CARD_INDEX]
+    if unknown:
+        raise ValueError(f"Bilinmeyen kart: {', '.join(map(str, unknown))}")
+    if len(set(keys)) != n:
+        raise ValueError("Aynı kart birden fazla seçilemez")
+    flags = [bool(c.get("reversed")) if isinstance(c, dict) else False for c in cards]
+    return {
+        "spread": spread,
+        "seed": None,
+        "reversals": any(flags),
+        "cards": _draw_cards(spread, [CARD_INDEX[k] for k in keys], flags),
+    }
+
+
+def build_tarot_context(tarot_draw: dict, lang: str) -> str:
+    """
+    Kartların pozisyon pozisyon yapısal özeti (LLM'e giden kullanıcı mesajına
+    eklenir). Yorumlama talimatı prompts'taki sabit önektedir.
+    """
+    lines = []
+    if lang == "tr":
+        lines.append(f"Tarot açılımı ({len(tarot_draw['cards'])} kart):")
+        for i, c in enumerate(tarot_draw["cards"], 1):
+            arcana = "Büyük Arkana" if c["arcana"] == "major" else "Küçük Arkana"
+            state = "ters" if c["reversed"] else "düz"
+            lines.append(f"{i}) {c['position_tr']}: {c['tr']} ({c['en']}) — {state}, {arcana}; anahtar: {c['vibe_tr']}")
+    else:
+        lines.append(f"Tarot spread ({len(tarot_draw['cards'])} cards):")
+        for i, c in enumerate(tarot_draw["cards"], 1):
+            arcana = "Major Arcana" if c["arcana"] == "major" else "Minor Arcana"
+            state = "reversed" if c["reversed"] else "upright"
+            lines.append(f"{i}) {c['position_en']}: {c['en']} — {state}, {arcana}; keywords: {c['vibe_en']}")
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Görsel varyantlar + sprite
+# -----------------------------
+def _card_size(width):
+    return width, round(width * CARD_RATIO)
+
+
+def _encode_webp(img) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, "WEBP", **WEBP_PARAMS)
+    return buf.getvalue()
+
+
+def _write_hashed(out_dir, stem, data) -> str:
+    """İçerik hash'li dosya adıyla (stem.<hash>.webp) atomik yazar; adı döner."""
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.webp"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return name
+
+
+def _source_signature(src_dir):
+    h = hashlib.sha256()
+    for key in [BACK_KEY] + [c["key"] for c in DECK]:
+        st = os.stat(os.path.join(src_dir, f"{key}.png"))
+        h.update(f"{key}:{st.st_size}:{int(st.st_mtime)};".encode())
+    h.update(json.dumps([CARD_VARIANTS, WEBP_PARAMS, SPRITE_COLUMNS], sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def build_card_assets(src_dir=CARDS_DIR, out_dir=TAROT_BUILD_DIR, force=False) -> dict:
+    """
+    Her kart (ve sırt) için CARD_VARIANTS genişliklerinde WebP + sprite sayfası.
+    Kaynaklar değişmediyse (imza aynıysa) mevcut manifest döner.
+    """
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    signature = _source_signature(src_dir)
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("signature") == signature:
+            return manifest
+
+    os.makedirs(out_dir, exist_ok=True)
+    keys = [BACK_KEY] + [c["key"] for c in DECK]
+    cell_w, cell_h = _card_size(CARD_VARIANTS[SPRITE_VARIANT])
+    rows = -(-len(keys) // SPRITE_COLUMNS)
+    sprite = Image.new("RGB", (cell_w * SPRITE_COLUMNS, cell_h * rows))
+
+    files = {}
+    positions = {}
+    for i, key in enumerate(keys):
+        with Image.open(os.path.join(src_dir, f"{key}.png")) as src:
+            src = src.convert("RGB")
+            files[key] = {}
+            # Büyükten küçüğe: her varyant bir öncekinden küçültülür
+            img = src
+            for variant, width in sorted(CARD_VARIANTS.items(), key=lambda kv: -kv[1]):
+                img = ImageOps.fit(img, _card_size(width), Image.LANCZOS)
+                files[key][variant] = _write_hashed(out_dir, f"{key}.{variant}", _encode_webp(img))
+                if variant == SPRITE_VARIANT:
+                    x, y = (i % SPRITE_COLUMNS) * cell_w, (i // SPRITE_COLUMNS) * cell_h
+                    sprite.paste(img, (x, y))
+                    positions[key] = [x, y]
+
+    manifest = {
+        "signature": signature,
+        "variants": {v: list(_card_size(w)) for v, w in CARD_VARIANTS.items()},
+        "files": files,
+        "sprite": {
+            "file": _write_hashed(out_dir, "sprite", _encode_webp(sprite)),
+            "size": [sprite.width, sprite.height],
+            "cell": [cell_w, cell_h],
+            "positions": positions,
+        },
+    }
+    tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+_manifest = None
+_asset_names = frozenset()
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> dict:
+    """Süreç başına bir kez; varyantlar yoksa veya kaynaklar değiştiyse üretilir."""
+    global _manifest, _asset_names
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                manifest = build_card_assets()
+                names = {n for variants in manifest["files"].values() for n in variants.values()}
+                names.add(manifest["sprite"]["file"])
+                _asset_names = frozenset(names)
+                _manifest = manifest
+    return _manifest
+
+
+def asset_path(name: str):
+    """Manifest'teki bir dosyanın yolu; bilinmeyen ad için None (dizin gezinmesine kapalı)."""
+    get_manifest()
+    if name not in _asset_names:
+        return None
+    return os.path.join(TAROT_BUILD_DIR, name)
+
+
+if __name__ == "__main__":
+    result = build_card_assets(force="--force" in sys.argv)
+    total = sum(os.path.getsize(os.path.join(TAROT_BUILD_DIR, n))
+                for variants in result["files"].values() for n in variants.values())
+    sprite = os.path.getsize(os.path.join(TAROT_BUILD_DIR, result["sprite"]["file"]))
+    print(f"{len(result['files'])} kart, varyantlar {total // 1024} KB, sprite {sprite // 1024} KB → {TAROT_BUILD_DIR}")
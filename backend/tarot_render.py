@@ -0,0 +1,133 @@
+# tarot_render.py
+# ===================
+# MystAI - Tarot açılımı kompozit görseli
+#
+# Kartlar bir kez (tarot.build_card_assets'in "web" WebP varyantından)
+# COMPOSITE_CARD_WIDTH genişliğine indirilip decode edilmiş halde bellekte
+# tutulur (~79 × 175 KB). Döndürülmüş kopyalar (ters kart = 180°, Kelt
+# haçındaki engel kartı = 90°) ilk ihtiyaçta üretilip saklanır. Kompozit
+# yalnızca bu bitmap'lerin yapıştırılmasıdır; dosya (açılım, kartlar,
+# yönler, format) anahtarıyla diskte cache'lenir.
+
+import os
+import threading
+import uuid
+
+from PIL import Image
+
+from metrics import cache_hit, cache_miss, span
+from tarot import BACK_KEY, CARD_RATIO, DECK, SPREADS, TAROT_BUILD_DIR, get_manifest, resolve_draw
+
+COMPOSITE_DIR = "/tmp"
+COMPOSITE_CARD_WIDTH = 240
+COMPOSITE_SOURCE_VARIANT = "web"
+# Kartlar arası boşluk ve kenar payı (kart genişliğine oran)
+COMPOSITE_GAP = 0.12
+COMPOSITE_MARGIN = 0.25
+COMPOSITE_BACKGROUND = (11, 11, 30)
+
+# format → (PIL formatı, mimetype, kaydetme parametreleri)
+COMPOSITE_FORMATS = {
+    "jpg": ("JPEG", "image/jpeg", {"quality": 88, "optimize": True}),
+    "webp": ("WEBP", "image/webp", {"quality": 82, "method": 4}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+
+_bitmaps = {}
+_rotated = {}
+_bitmap_lock = threading.Lock()
+
+
+def preload_card_bitmaps():
+    """Tüm kartları (ve sırtı) decode edip bellekte tutar; ikinci çağrı no-op."""
+    if _bitmaps:
+        return _bitmaps
+    with _bitmap_lock:
+        if not _bitmaps:
+            files = get_manifest()["files"]
+            size = (COMPOSITE_CARD_WIDTH, round(COMPOSITE_CARD_WIDTH * CARD_RATIO))
+            loaded = {}
+            for key in [BACK_KEY] + [c["key"] for c in DECK]:
+                with Image.open(os.path.join(TAROT_BUILD_DIR, files[key][COMPOSITE_SOURCE_VARIANT])) as im:
+                    loaded[key] = im.convert("RGB").resize(size, Image.LANCZOS)
+            _bitmaps.update(loaded)
+    return _bitmaps
+
+
+def _card_bitmap(key, angle):
+    """Açıya göre döndürülmüş kart; ilk kullanımdan sonra bellekten."""
+    angle %= 360
+    if angle == 0:
+        return preload_card_bitmaps()[key]
+    cached = _rotated.get((key, angle))
+    if cached is None:
+        cached = preload_card_bitmaps()[key].rotate(angle, expand=True)
+        _rotated[(key, angle)] = cached
+    return cached
+
+
+def spread_token(tarot_draw) -> str:
+    """Çekimin URL'de taşınabilir, durumsuz kimliği: kart indeksleri, ters olanlar 'r' ekli."""
+    return "-".join(f"{c['index']}{'r' if c['reversed'] else ''}" for c in tarot_draw["cards"])
+
+
+def draw_from_token(spread: str, token: str) -> dict:
+    """spread_token'ın tersi; geçersiz token için ValueError."""
+    cards = []
+    for part in token.split("-"):
+        rev = part.endswith("r")
+        digits = part[:-1] if rev else part
+        if not digits.isdigit() or int(digits) >= len(DECK):
+            raise ValueError(f"Geçersiz kart: {part}")
+        cards.append({"key": DECK[int(digits)]["key"], "reversed": rev})
+    return resolve_draw({"spread": spread, "cards": cards})
+
+
+def compose_spread(tarot_draw) -> Image.Image:
+    """Çekimi SPREADS yerleşimine göre tek bir RGB görsele yapıştırır."""
+    layout = SPREADS[tarot_draw["spread"]]["layout"]
+    card_w = COMPOSITE_CARD_WIDTH
+    card_h = round(card_w * CARD_RATIO)
+    gap = round(card_w * COMPOSITE_GAP)
+    margin = round(card_w * COMPOSITE_MARGIN)
+
+    placed = []
+    for card, (col, row, rotation) in zip(tarot_draw["cards"], layout):
+        # PIL saat yönünün tersine döndürür; ters kart fazladan 180°
+        img = _card_bitmap(card["key"], -rotation + (180 if card["reversed"] else 0))
+        cx = col * (card_w + gap)
+        cy = row * (card_h + gap)
+        placed.append((img, round(cx - img.width / 2), round(cy - img.height / 2)))
+
+    x0 = min(x for _, x, _ in placed)
+    y0 = min(y for _, _, y in placed)
+    x1 = max(x + img.width for img, x, _ in placed)
+    y1 = max(y + img.height for img, _, y in placed)
+
+    canvas = Image.new("RGB", (x1 - x0 + 2 * margin, y1 - y0 + 2 * margin), COMPOSITE_BACKGROUND)
+    for img, x, y in placed:
+        canvas.paste(img, (x - x0 + margin, y - y0 + margin))
+    return canvas
+
+
+def render_spread(tarot_draw, fmt="jpg", out_dir=COMPOSITE_DIR):
+    """
+    Kompoziti diske yazar ve (path, mimetype) döner. Aynı (açılım, kartlar,
+    yönler, format) için ikinci çağrı sadece dosya yolunu döner.
+    """
+    if fmt not in COMPOSITE_FORMATS:
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+    pil_format, mimetype, save_kwargs = COMPOSITE_FORMATS[fmt]
+    out_path = os.path.join(out_dir, f"tarot_{tarot_draw['spread']}_{spread_token(tarot_draw)}.{fmt}")
+    if os.path.exists(out_path):
+        cache_hit("tarot_spread")
+        return out_path, mimetype
+    cache_miss("tarot_spread")
+
+    with span("tarot_compose"):
+        img = compose_spread(tarot_draw)
+        # Eşzamanlı isteklerde yarım dosya servis edilmesin diye önce geçici isme yaz
+        tmp_path = f"{out_path}.{uuid.uuid4().hex}.tmp"
+        img.save(tmp_path, pil_format, **save_kwargs)
+        os.replace(tmp_path, out_path)
+    return out_path, mimetype
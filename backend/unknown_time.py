@@ -0,0 +1,156 @@
+# unknown_time.py
+# ===================
+# MystAI - Doğum saati bilinmeyen kullanıcılar için "tüm gün" profili
+#
+# Saat bilinmiyorsa tek bir tahmini harita yerine, yerel takvim günü boyunca
+# neyin kesin neyin belirsiz olduğu hesaplanır:
+#   - öğlen haritası (gezegen konumları için referans)
+#   - gün içinde burç değiştiren gezegenler ve tam geçiş saatleri
+#   - Yükselen (ASC) burcunun hangi saat aralıklarında hangi burçta olduğu
+#
+# ASC, yıldız zamanı gün içinde doğrusal ilerlediğinden kapalı formülle
+# (relocation.angles_grid) tüm gün için tek seferde örneklenir; burç
+# sınırları vektörel regula falsi ile rafine edilir. Gezegen geçişleri
+# returns.find_returns ile bulunur. Toplam maliyet ~tek harita kadardır.
+
+import numpy as np
+import swisseph as swe
+
+from astro_core import (
+    DEFAULT_HOUSE_SYSTEM,
+    PLANET_IDS,
+    PLANET_NAMES,
+    SIGNS,
+    julian_day_ut,
+)
+from chart_cache import get_chart_record
+from relocation import angles_grid
+from returns import find_returns, jd_to_local
+
+# Ortalama yıldız günü hızı (derece / gün)
+SIDEREAL_RATE = 360.98564736629
+
+# ASC örnekleme adımı (dakika) ve sınır rafinesi iterasyonu. 4 dakikada ASC
+# neredeyse doğrusal ilerler; 3 regula falsi adımı saniyenin altına iner.
+ASC_STEP_MINUTES = 4
+REFINE_ITER = 3
+
+NOON = "12:00"
+
+
+def _day_bounds(date_str, tz_name):
+    """Yerel günün başlangıcı ve bir sonraki günün başlangıcı (JD UT)."""
+    _, jd0 = julian_day_ut(date_str, "00:00", tz_name)
+    y, m, d, _ = swe.revjul(jd0 + 1.5, swe.GREG_CAL)
+    _, jd1 = julian_day_ut(f"{y:04d}-{m:02d}-{d:02d}", "00:00", tz_name)
+    return jd0, jd1
+
+
+def _asc_at(jds, lat, lon, jd0, gast0, eps):
+    state = {"eps": eps, "gast": gast0 + SIDEREAL_RATE * (np.asarray(jds) - jd0)}
+    asc, _ = angles_grid(state, lat, lon)
+    return asc
+
+
+def asc_intervals(jd0, jd1, lat, lon, tz_name):
+    """
+    [jd0, jd1) boyunca ASC burç aralıkları:
+        [{"sign", "sign_index", "start", "end", "minutes"}, ...]  (yerel saat)
+    """
+    gast0 = swe.sidtime(jd0) * 15.0
+    eps = swe.calc_ut(0.5 * (jd0 + jd1), swe.ECL_NUT)[0][0]
+
+    jds = np.linspace(jd0, jd1, int(round((jd1 - jd0) * 1440 / ASC_STEP_MINUTES)) + 1)
+    idx = (_asc_at(jds, lat, lon, jd0, gast0, eps) // 30).astype(int)
+
+    change = np.nonzero(idx[1:] != idx[:-1])[0]
+    i_old, i_new = idx[change], idx[change + 1]
+    forward = (i_new - i_old) % 12 <= 6
+    boundary = np.where(forward, i_new, i_old) * 30.0
+
+    # Vektörel regula falsi: f = wrap180(ASC − sınır) braket içinde işaret değiştirir
+    def f(x):
+        return (_asc_at(x, lat, lon, jd0, gast0, eps) - boundary + 180.0) % 360.0 - 180.0
+
+    a, b = jds[change], jds[change + 1]
+    fa, fb = f(a), f(b)
+    root = a
+    for _ in range(REFINE_ITER):
+        root = a - fa * (b - a) / np.where(fb != fa, fb - fa, 1.0)
+        fr = f(root)
+        left = np.sign(fr) == np.sign(fa)
+        a, fa = np.where(left, root, a), np.where(left, fr, fa)
+        b, fb = np.where(left, b, root), np.where(left, fb, fr)
+    edges = np.concatenate([[jd0], root, [jd1]])
+    signs = np.concatenate([[idx[0]], i_new])
+
+    out = []
+    for k, s in enumerate(signs.tolist()):
+        start, end = float(edges[k]), float(edges[k + 1])
+        out.append({
+            "sign": SIGNS[s],
+            "sign_index": s,
+            "start": jd_to_local(start, tz_name)[1],
+            "end": jd_to_local(end, tz_name)[1] if k + 1 < len(signs) else "24:00",
+            "minutes": round((end - start) * 1440.0),
+        })
+    return out
+
+
+def planet_sign_changes(jd0, jd1, tz_name):
+    """
+    Gün içinde burç değiştiren gezegenler.
+    Döner: (günlük aralıklar, [{"planet", "from", "to", "time"}, ...])
+    """
+    ranges = []
+    changes = []
+    for name, pid in PLANET_IDS.items():
+        start = swe.calc_ut(jd0, pid)[0][0]
+        end = swe.calc_ut(jd1, pid)[0][0]
+        s0, s1 = int(start // 30), int(end // 30)
+        ranges.append({
+            "name": name,
+            "start": start,
+            "end": end,
+            "sign_start": SIGNS[s0],
+            "sign_end": SIGNS[s1],
+        })
+        if s0 == s1:
+            continue
+        forward = (s1 - s0) % 12 <= 6
+        boundary = (s1 if forward else s0) * 30.0
+        for jd in find_returns(name, boundary, jd0, jd1).tolist():
+            changes.append({
+                "planet": name,
+                "from": SIGNS[s0],
+                "to": SIGNS[s1],
+                "time": jd_to_local(jd, tz_name)[1],
+                "jd": jd,
+            })
+    changes.sort(key=lambda c: c["jd"])
+    return ranges, changes
+
+
+def day_profile(date_str, lat, lon, tz_name, house_system=DEFAULT_HOUSE_SYSTEM):
+    """
+    Saat bilinmediğinde kullanılacak profil.
+    Döner: (öğlen ChartRecord'u, {"date", "timezone", "reference_time",
+            "planets", "sign_changes", "asc_intervals"})
+    """
+    jd0, jd1 = _day_bounds(date_str, tz_name)
+    record = get_chart_record(date_str, NOON, lat, lon, tz_name, house_system)
+    ranges, changes = planet_sign_changes(jd0, jd1, tz_name)
+    return record, {
+        "date": date_str,
+        "timezone": tz_name,
+        "reference_time": NOON,
+        "planets": ranges,
+        "sign_changes": changes,
+        "asc_intervals": asc_intervals(jd0, jd1, lat, lon, tz_name),
+    }
+
+
+def stable_planets(profile):
+    """Gün boyunca burcu değişmeyen gezegen adları."""
+    moving = {c["planet"] for c in profile["sign_changes"]}
+    return [name for name in PLANET_NAMES if name not in moving]
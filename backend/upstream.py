@@ -0,0 +1,339 @@
+# upstream.py
+# ===================
+# MystAI - OpenAI çağrı katmanı (chat + TTS dayanıklılığı)
+#
+# - Bağlantı havuzu : tek HTTP istemcisi (SDK'nın DefaultHttpxClient'ı),
+#                     UPSTREAM_POOL_SIZE bağlantı (keep-alive)
+# - Deadline        : gelen isteğin kalan süresi (set_deadline) her denemenin
+#                     timeout'u olur; süre bitince yeni deneme yapılmaz
+# - Yeniden deneme  : yalnızca geçici hatalarda (bağlantı, timeout, 429, 5xx);
+#                     full-jitter üstel bekleme, Retry-After'a uyulur
+# - Hedge (ops.)    : UPSTREAM_HEDGE_AFTER saniyede cevap gelmezse aynı chat
+#                     çağrısı ikinci kez gönderilir, ilk başarılı cevap kazanır
+#                     ("auto" = son başarılı çağrıların p95'i). Varsayılan kapalı:
+#                     hedge edilen çağrıların token maliyeti iki kattır.
+# - Circuit breaker : işlem (chat / tts) başına; son çağrıların hata oranı eşiği
+#                     aşınca OPEN → çağrılar ağa çıkmadan CircuitOpenError alır,
+#                     cooldown sonrası HALF_OPEN tek deneme ile kapanır
+#
+# Yerel test: python fake_upstream.py --error-rate 0.3 --latency 0.5 ve
+# OPENAI_BASE_URL=http://127.0.0.1:8765/v1 (SDK bu değişkeni kendisi okur).
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import openai
+from openai import OpenAI
+
+from metrics import span
+
+UPSTREAM_POOL_SIZE = int(os.environ.get("UPSTREAM_POOL_SIZE", "32"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", "5"))
+# Deadline yoksa (arka plan işleri) tek denemenin üst sınırı
+UPSTREAM_TIMEOUT = float(os.environ.get("UPSTREAM_TIMEOUT", "90"))
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", "2"))
+UPSTREAM_BACKOFF_BASE = float(os.environ.get("UPSTREAM_BACKOFF_BASE", "0.5"))
+UPSTREAM_BACKOFF_MAX = float(os.environ.get("UPSTREAM_BACKOFF_MAX", "8"))
+UPSTREAM_HEDGE_AFTER = os.environ.get("UPSTREAM_HEDGE_AFTER", "0")  # saniye | "auto" | 0=kapalı
+
+BREAKER_WINDOW = int(os.environ.get("UPSTREAM_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.environ.get("UPSTREAM_BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATIO = float(os.environ.get("UPSTREAM_BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_COOLDOWN = float(os.environ.get("UPSTREAM_BREAKER_COOLDOWN", "15"))
+
+# Bu sürenin altında kalan deadline ile yeni deneme başlatılmaz
+MIN_ATTEMPT_SECONDS = 0.5
+# "auto" hedge için gereken en az başarılı örnek
+HEDGE_MIN_SAMPLES = 20
+
+RETRYABLE = (
+    openai.APIConnectionError,  # APITimeoutError dahil
+    openai.RateLimitError,
+    openai.InternalServerError,
+    TimeoutError,  # hedge bekleme süresi doldu
+)
+
+
+class UpstreamError(Exception):
+    """Upstream kullanılamıyor; HTTP durum kodu ve (varsa) Retry-After taşır."""
+
+    status = 502
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(UpstreamError):
+    status = 503
+
+
+class DeadlineExceeded(UpstreamError):
+    status = 504
+
+
+# -----------------------------
+# Deadline (istek başına)
+# -----------------------------
+_deadline = ContextVar("upstream_deadline", default=None)
+
+
+def set_deadline(seconds):
+    """Geçerli bağlam için `seconds` sonra dolan deadline; reset için token döner."""
+    return _deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def clear_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining():
+    """Deadline'a kalan saniye (deadline yoksa None)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+# -----------------------------
+# Circuit breaker
+# -----------------------------
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 failure_ratio=BREAKER_FAILURE_RATIO, cooldown=BREAKER_COOLDOWN):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self._outcomes = deque(maxlen=window)
+        self._probe = False
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        return max(self.opened_at + self.cooldown - time.monotonic(), 0.0)
+
+    def allow(self):
+        """Çağrı yapılabilir mi? OPEN'da cooldown dolunca tek bir deneme geçer."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.retry_after() > 0:
+                return False
+            if self._probe:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe = True
+            return True
+
+    def record(self, ok):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe = False
+                if ok:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_ratio):
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+
+
+# -----------------------------
+# İstemci
+# -----------------------------
+def make_client(api_key, pool_size=UPSTREAM_POOL_SIZE):
+    """Havuz boyutu ayarlı, SDK retry'ı kapalı OpenAI istemcisi (retry bu katmanda)."""
+    # SDK'nın kendi HTTP kütüphanesi üzerinden (dağıtıma göre httpx/httpx2);
+    # Limits sınıfı SDK'nın varsayılan limitlerinden alınır
+    limits_cls = type(openai.DEFAULT_CONNECTION_LIMITS)
+    http_client = openai.DefaultHttpxClient(
+        limits=limits_cls(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=openai.Timeout(UPSTREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+    )
+    return OpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+
+
+def _retry_after_header(exc):
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class Upstream:
+    """
+    OpenAI istemcisini saran çağrı katmanı. `chat.completions.create` arayüzü
+    istemciyle aynıdır (daily_horoscope üreticisi de bunu kullanabilir).
+    """
+
+    def __init__(self, client, retries=UPSTREAM_RETRIES, hedge_after=UPSTREAM_HEDGE_AFTER,
+                 backoff_base=UPSTREAM_BACKOFF_BASE, backoff_max=UPSTREAM_BACKOFF_MAX):
+        self.client = client
+        self.retries = retries
+        self.hedge_after = hedge_after
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breakers = {"chat": CircuitBreaker(), "tts": CircuitBreaker()}
+        self.counters = {op: {"calls": 0, "failures": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                              "rejected": 0} for op in self.breakers}
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        # Hedge edilen çağrılar burada koşar; kaybeden deneme kendi timeout'una kadar sürer
+        self._pool = ThreadPoolExecutor(max_workers=UPSTREAM_POOL_SIZE, thread_name_prefix="upstream")
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.chat_completion))
+
+    # --- yardımcılar ---
+    def _count(self, op, key, n=1):
+        with self._lock:
+            self.counters[op][key] += n
+
+    def _attempt_timeout(self):
+        left = remaining()
+        if left is None:
+            return UPSTREAM_TIMEOUT
+        if left < MIN_ATTEMPT_SECONDS:
+            raise DeadlineExceeded("İstek süresi doldu (upstream çağrısı yapılmadı)")
+        return min(left, UPSTREAM_TIMEOUT)
+
+    def _backoff(self, attempt, exc):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        hinted = _retry_after_header(exc)
+        if hinted is not None:
+            delay = max(delay, hinted)
+        left = remaining()
+        if left is not None and delay > left - MIN_ATTEMPT_SECONDS:
+            return None
+        return delay
+
+    def _hedge_delay(self):
+        if self.hedge_after == "auto":
+            with self._lock:
+                samples = sorted(self._latencies)
+            if len(samples) < HEDGE_MIN_SAMPLES:
+                return None
+            return samples[int(0.95 * (len(samples) - 1))]
+        delay = float(self.hedge_after or 0)
+        return delay if delay > 0 else None
+
+    def _guarded(self, op, fn, timeout):
+        """Tek ağ çağrısı: breaker kontrolü + sonuç kaydı."""
+        breaker = self.breakers[op]
+        if not breaker.allow():
+            self._count(op, "rejected")
+            raise CircuitOpenError(f"Upstream ({op}) geçici olarak devre dışı", breaker.retry_after())
+        self._count(op, "calls")
+        t0 = time.perf_counter()
+        try:
+            result = fn(timeout)
+        except RETRYABLE:
+            breaker.record(False)
+            self._count(op, "failures")
+            raise
+        except Exception:
+            # 4xx vb. istemci hataları upstream sağlığını göstermez
+            breaker.record(True)
+            raise
+        breaker.record(True)
+        if op == "chat":
+            with self._lock:
+                self._latencies.append(time.perf_counter() - t0)
+        return result
+
+    def _hedged(self, op, fn, timeout):
+        hedge = self._hedge_delay()
+        if hedge is None or hedge >= timeout or self.breakers[op].state != CircuitBreaker.CLOSED:
+            return self._guarded(op, fn, timeout)
+        deadline = time.monotonic() + timeout
+        primary = self._pool.submit(self._guarded, op, fn, timeout)
+        pending = {primary}
+        if not wait(pending, timeout=hedge).done:
+            self._count(op, "hedges")
+            pending.add(self._pool.submit(self._guarded, op, fn, timeout - hedge))
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"Upstream ({op}) {timeout:.1f} sn içinde cevap vermedi")
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is not primary:
+                    self._count(op, "hedge_wins")
+                return result
+        raise error
+
+    def _call(self, op, fn, hedge=False):
+        with span(f"upstream_{op}"):
+            return self._retrying(op, fn, hedge)
+
+    def _retrying(self, op, fn, hedge):
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout()
+            try:
+                if hedge:
+                    return self._hedged(op, fn, timeout)
+                return self._guarded(op, fn, timeout)
+            except RETRYABLE as e:
+                delay = self._backoff(attempt, e) if attempt < self.retries else None
+                if delay is None:
+                    if isinstance(e, (openai.APITimeoutError, TimeoutError)) and remaining() is not None:
+                        raise DeadlineExceeded(f"Upstream ({op}) süre içinde cevap vermedi") from e
+                    raise UpstreamError(f"Upstream ({op}) hatası: {e}", _retry_after_header(e)) from e
+                attempt += 1
+                self._count(op, "retries")
+                time.sleep(delay)
+
+    # --- public API ---
+    def chat_completion(self, **kwargs):
+        return self._call(
+            "chat",
+            lambda timeout: self.client.chat.completions.create(timeout=timeout, **kwargs),
+            hedge=True,
+        )
+
+    def speech_to_file(self, path, **kwargs):
+        """TTS çıktısını dosyaya yazar; başarısız denemenin yarım dosyası silinir."""
+
+        def attempt(timeout):
+            try:
+                with self.client.audio.speech.with_streaming_response.create(timeout=timeout, **kwargs) as response:
+                    response.stream_to_file(path)
+            except Exception:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+
+        self._call("tts", attempt)
+        return path
+
+    def stats(self):
+        with self._lock:
+            counters = {op: dict(c) for op, c in self.counters.items()}
+        for op, breaker in self.breakers.items():
+            counters[op]["breaker"] = breaker.state
+            counters[op]["trips"] = breaker.trips
+        return counters